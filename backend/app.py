@@ -1,36 +1,59 @@
 import os
+from importlib import import_module
 from dotenv import load_dotenv
-import redis
-from rq import Queue
 
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 from flask_smorest import abort, Api
 from flask_jwt_extended import JWTManager
-from flask_migrate import Migrate
 from flask_cors import CORS
 
 from db import db
 from blocklist import BLOCKLIST
-
-from resources.group import blp as GroupBlueprint
-from resources.invitation import blp as InvitationBlueprint
-from resources.user import blp as UserBlueprint
-from resources.expense import blp as ExpenseBlueprint
-from resources.settlement import blp as SettlementBlueprint
-from resources.history import blp as HistoryBlueprint
-
-
-def create_app(db_url = None):
+from config import REDIS_CONNECT_TIMEOUT_SECONDS
+
+# Resource modules, imported by create_app() rather than when this module is imported
+BLUEPRINT_MODULES = (
+    "resources.group",
+    "resources.invitation",
+    "resources.user",
+    "resources.expense",
+    "resources.settlement",
+    "resources.history",
+    "resources.events",
+    "resources.sync",
+    "resources.stats",
+    "resources.export",
+    "resources.archive",
+)
+
+
+def create_app(db_url = None, with_api=True):
+    """
+    Build the Flask app. Background jobs pass with_api=False: they only need the
+    database, so the resource modules are not imported and no routes are registered.
+    """
     app = Flask(__name__)
     load_dotenv()
 
+    from commands import register_commands
+    from utils.live_events import create_broker
+    from utils.preview_cache import create_preview_cache, register_preview_invalidation
+    from utils.balances import register_checkpoint_invalidation
+    from utils.tracing import init_tracing, create_job_queue, register_request_tracing
+
+    # Spans are only recorded when TRACING is set (see utils/tracing.py)
+    init_tracing("splitfree-api")
+
     # Setup Redis Queue for background jobs
     redis_url = os.getenv("REDIS_URL")
     if redis_url:
         try:
-            connection = redis.from_url(redis_url)
+            import redis
+
+            # Fail fast when Redis is unreachable instead of waiting for the OS connect timeout
+            connection = redis.from_url(redis_url, socket_connect_timeout=REDIS_CONNECT_TIMEOUT_SECONDS)
             connection.ping()
-            app.queue = Queue(name="emails", connection=connection)
+            app.queue = create_job_queue("emails", connection)
             app.redis_connection = connection
             app.logger.info(f"✅ Redis connected successfully at {redis_url}")
         except Exception as e:
@@ -42,6 +65,12 @@ def create_app(db_url = None):
         app.queue = None
         app.redis_connection = None
 
+    # Live updates go through Redis pub/sub when available, in-process otherwise
+    app.event_broker = create_broker(app.redis_connection)
+    app.preview_cache = create_preview_cache(app.redis_connection)
+    app.balance_cache = create_preview_cache(app.redis_connection, namespace="balance-summary")
+    app.stats_cache = create_preview_cache(app.redis_connection, namespace="group-stats")
+
     app.config["PROPAGATE_EXCEPTIONS"] = True
     app.config["API_TITLE"] = "SplitFree REST API"
     app.config["API_VERSION"] = "v1"
@@ -65,7 +94,13 @@ def create_app(db_url = None):
     app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
     
     db.init_app(app)
-    migrate = Migrate(app, db)
+    register_preview_invalidation(db.session)
+    register_checkpoint_invalidation(db.session)
+    # Flask-Migrate pulls in Alembic; only the `flask` CLI (`flask db upgrade`) needs it
+    if os.getenv("FLASK_RUN_FROM_CLI"):
+        from flask_migrate import Migrate
+        Migrate(app, db)
+    register_commands(app)
     
     # Enable CORS for frontend communication
     allowed_origins = [
@@ -147,39 +182,51 @@ def create_app(db_url = None):
             401
         )
 
-    # Health check endpoint
+    # Health check endpoints, answered from probes cached by a background refresher
+    from utils.health import HealthMonitor
+    app.health_monitor = HealthMonitor(app)
+
     @app.route('/health')
     def health_check():
         """Health check endpoint with worker and Redis status"""
+        redis_check = app.health_monitor.current()["checks"]["redis"]
         status = {
             "status": "healthy",
-            "redis_available": bool(app.redis_connection),
+            "redis_available": bool(app.redis_connection) and redis_check["ok"],
             "queue_available": bool(app.queue),
-            "email_mode": "async" if app.queue else "sync"
+            "email_mode": "async" if app.queue else "sync",
+            "redis_status": redis_check["status"]
         }
-        
-        # Test Redis connection if available
-        if app.redis_connection:
-            try:
-                app.redis_connection.ping()
-                status["redis_status"] = "connected"
-            except:
-                status["redis_status"] = "disconnected"
-                status["redis_available"] = False
-        else:
-            status["redis_status"] = "not_configured"
-            
         return jsonify(status)
 
-   
-    api.register_blueprint(GroupBlueprint)
-    api.register_blueprint(InvitationBlueprint)
-    api.register_blueprint(UserBlueprint)
-    api.register_blueprint(ExpenseBlueprint)
-    api.register_blueprint(SettlementBlueprint)
-    api.register_blueprint(HistoryBlueprint)
+    @app.route('/health/live')
+    def liveness_check():
+        """Liveness probe: the process is up and serving requests (no dependency checks)."""
+        return jsonify({"status": "alive"})
+
+    @app.route('/health/ready')
+    def readiness_check():
+        """Readiness probe: database, Redis and queue workers, from the cached probe results."""
+        ready, body = app.health_monitor.readiness()
+        return jsonify(body), 200 if ready else 503
+
+    if with_api:
+        from utils.metrics import register_metrics, render_metrics
+        register_metrics(app)
+        register_request_tracing(app)
+
+        # Prometheus scrape endpoint (aggregated across gunicorn workers, see utils/metrics.py)
+        @app.route('/metrics')
+        def metrics():
+            body, content_type = render_metrics(app)
+            return Response(body, content_type=content_type)
+
+        for module in BLUEPRINT_MODULES:
+            api.register_blueprint(import_module(module).blp)
 
     return app
 
-# Create app instance for Gunicorn
-app = create_app()
+
+if __name__ == "__main__":
+    # Development server (`python app.py`); gunicorn uses the factory: "app:create_app()"
+    create_app().run(debug=True)
@@ -0,0 +1,9 @@
+"""
+Benchmarks and stress scripts for the SplitFree API.
+
+Each module is runnable on its own, e.g. `python -m benchmarks.concurrency_stress`
+from the backend directory. `micro` and `throughput` run on a synthetic dataset
+(`synthetic`) and write JSON results that `compare` diffs between releases.
+`query_budgets` fails when a request runs more SQL statements than its budget;
+`eager_loading` records statement counts that `compare` diffs as well.
+"""
@@ -0,0 +1,167 @@
+"""
+Balance engine throughput: NumPy vs the pure-Python fallback.
+
+Two measurements at --rows ledger rows (default 10M):
+
+- engine: net_cents() alone over in-memory (creditor, debtor, cents) batches, the
+  shape rows come back from the database in;
+- database: group_balances() for one group seeded with --rows split rows, i.e. the
+  column-only query plus the fold, as /balances runs it without a checkpoint. NumPy
+  is only used there on PostgreSQL (psycopg2), through binary COPY.
+
+Both engines must produce identical balances; the run fails otherwise.
+
+Usage (from backend/):
+    python -m benchmarks.balance_engine
+    python -m benchmarks.balance_engine --rows 1000000 --members 200 --skip-db
+"""
+
+import argparse
+import contextlib
+import os
+import random
+import sys
+import time
+
+
+def _batches(rows, members, batch_rows, seed):
+    """A handful of distinct random batches, cycled until `rows` rows are produced."""
+    rng = random.Random(seed)
+    distinct = [
+        [(rng.randrange(1, members + 1), rng.randrange(1, members + 1), rng.randrange(1, 50000))
+         for _ in range(batch_rows)]
+        for _ in range(8)
+    ]
+    produced = 0
+    index = 0
+    while produced < rows:
+        batch = distinct[index % len(distinct)][:rows - produced]
+        produced += len(batch)
+        index += 1
+        yield batch
+
+
+@contextlib.contextmanager
+def _without_numpy():
+    from utils import balance_engine
+
+    balance_engine.numpy_available()  # Load it first so nothing re-imports it inside the block
+    saved = balance_engine.np
+    balance_engine.np = None
+    try:
+        yield
+    finally:
+        balance_engine.np = saved
+
+
+def _bench_engine(rows, members, batch_rows, seed):
+    from utils.balance_engine import net_cents, numpy_available
+
+    results = {}
+    engines = ["python"] + (["numpy"] if numpy_available() else [])
+    for engine in engines:
+        started = time.perf_counter()
+        totals = net_cents(_batches(rows, members, batch_rows, seed), use_numpy=engine == "numpy")
+        results[engine] = (time.perf_counter() - started, totals)
+    return results
+
+
+def _seed(app, rows, members):
+    from db import db
+    from models import GroupModel, UserModel, ExpenseModel, ExpenseSplitModel
+
+    splits_per_expense = min(members, 10)
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        users = [UserModel(username=f"engine-{i}", email=f"engine-{i}@example.com", password="x")
+                 for i in range(members)]
+        group = GroupModel(name="balance engine benchmark", description="load test",
+                           member_count=members, admin_count=1)
+        db.session.add_all(users + [group])
+        db.session.commit()
+        user_ids = [u.id for u in users]
+
+        rng = random.Random(0)
+        expenses = rows // splits_per_expense
+        batch = 20000
+        for offset in range(0, expenses, batch):
+            count = min(batch, expenses - offset)
+            db.session.execute(ExpenseModel.__table__.insert(), [
+                {"id": offset + i + 1, "description": f"expense {offset + i}", "amount": 100,
+                 "split_type": "unequal", "paid_by": user_ids[(offset + i) % members], "group_id": group.id}
+                for i in range(count)
+            ])
+            db.session.execute(ExpenseSplitModel.__table__.insert(), [
+                {"amount": rng.randrange(1, 10000) / 100, "expense_id": offset + i + 1, "group_id": group.id,
+                 "user_id": user_ids[(offset + i + k) % members]}
+                for i in range(count) for k in range(splits_per_expense)
+            ])
+            db.session.commit()
+        return group.id, expenses * splits_per_expense
+
+
+def _bench_database(app, group_id):
+    from db import db
+    from utils.balances import group_balances
+    from utils.balance_engine import numpy_available
+
+    results = {}
+    with app.app_context():
+        copy_available = (db.engine.dialect.name, db.engine.dialect.driver) == ("postgresql", "psycopg2")
+    engines = ["python"] + (["numpy"] if numpy_available() and copy_available else [])
+    for engine in engines:
+        with app.app_context():
+            context = _without_numpy() if engine == "python" else contextlib.nullcontext()
+            with context:
+                started = time.perf_counter()
+                balances = group_balances(group_id, use_checkpoint=False)
+                results[engine] = (time.perf_counter() - started, balances)
+            db.session.remove()
+    return results
+
+
+def _report(title, rows, results):
+    print(title)
+    for engine, (elapsed, _) in results.items():
+        print(f"  {engine:>7}: {elapsed:8.2f}s  {rows / elapsed / 1e6:6.2f} M rows/s")
+    if len(results) == 2 and results["numpy"][1] != results["python"][1]:
+        print("  MISMATCH: engines disagree")
+        return False
+    if "numpy" not in results:
+        print("  numpy: skipped (not installed, or no binary COPY on this database)")
+    return True
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db-url", default="sqlite:////tmp/splitfree-balance-engine.db")
+    parser.add_argument("--rows", type=int, default=10000000, help="ledger rows (splits)")
+    parser.add_argument("--members", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--skip-db", action="store_true", help="only benchmark the in-memory engine")
+    parser.add_argument("--skip-seed", action="store_true", help="reuse the database from a previous run")
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault("JWT_SECRET_KEY", "benchmark-secret-key-not-for-production")
+    from app import create_app
+    from config import BALANCE_ENGINE_BATCH_ROWS
+
+    ok = _report(f"engine, {args.rows:,} rows in batches of {BALANCE_ENGINE_BATCH_ROWS:,}:", args.rows,
+                 _bench_engine(args.rows, args.members, BALANCE_ENGINE_BATCH_ROWS, args.seed))
+
+    if not args.skip_db:
+        app = create_app(args.db_url)
+        if args.skip_seed:
+            group_id, rows = 1, args.rows
+        else:
+            started = time.perf_counter()
+            group_id, rows = _seed(app, args.rows, args.members)
+            print(f"seeded {rows:,} split rows in {time.perf_counter() - started:.1f}s")
+        ok = _report(f"group_balances() over {rows:,} split rows:", rows, _bench_database(app, group_id)) and ok
+
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
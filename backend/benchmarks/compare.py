@@ -0,0 +1,76 @@
+"""
+Compare two benchmark result files and flag regressions.
+
+Matches benchmarks by name and compares their median latency (or, for the
+throughput total, requests per second). A benchmark more than --threshold percent
+slower than in the baseline is a regression, as is one that runs more SQL
+statements (suites that record `queries`, e.g. eager_loading).
+
+Usage (from backend/):
+    python -m benchmarks.compare results/micro-v1.4.json results/micro.json
+    python -m benchmarks.compare old.json new.json --threshold 5
+
+Exits with status 1 if anything regressed.
+"""
+
+import argparse
+import json
+import sys
+
+
+def _load(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def _change(old, new):
+    """Slowdown in percent (positive is worse) between two result entries, or None."""
+    if "median_ms" in old and "median_ms" in new and old["median_ms"]:
+        return (new["median_ms"] - old["median_ms"]) / old["median_ms"] * 100
+    if "requests_per_sec" in old and "requests_per_sec" in new and new["requests_per_sec"]:
+        return (old["requests_per_sec"] - new["requests_per_sec"]) / new["requests_per_sec"] * 100
+    return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--threshold", type=float, default=10, help="allowed slowdown in percent")
+    args = parser.parse_args(argv)
+
+    baseline, current = _load(args.baseline), _load(args.current)
+    if baseline.get("suite") != current.get("suite"):
+        print(f"warning: comparing suite {baseline.get('suite')!r} with {current.get('suite')!r}")
+    if baseline.get("parameters") != current.get("parameters"):
+        print("warning: the runs used different parameters")
+
+    regressions = 0
+    names = sorted(set(baseline["results"]) | set(current["results"]))
+    width = max((len(name) for name in names), default=10)
+    for name in names:
+        old, new = baseline["results"].get(name), current["results"].get(name)
+        if old is None or new is None:
+            print(f"{name:<{width}}  {'only in ' + ('current' if old is None else 'baseline')}")
+            continue
+        change = _change(old, new)
+        if change is None:
+            continue
+        flag = ""
+        if change > args.threshold:
+            flag = "  REGRESSION"
+        queries = ""
+        if "queries" in old and "queries" in new:
+            queries = f"  queries {old['queries']} -> {new['queries']}"
+            if new["queries"] > old["queries"]:
+                flag = "  REGRESSION"
+        if flag:
+            regressions += 1
+        print(f"{name:<{width}}  {change:+7.1f}%{queries}{flag}")
+
+    print(f"{regressions} regression(s) above {args.threshold:g}%")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
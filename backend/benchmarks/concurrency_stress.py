@@ -0,0 +1,266 @@
+"""
+Concurrency stress test for group writes.
+
+Many threads hammer a handful of groups with a racy request mix through the Flask
+test client: equal-split expenses, settlements, member removals and admins demoting
+themselves, while balance checkpoints are taken in between. Afterwards the ledger
+invariants are checked directly in the database:
+
+- balances in every group sum to zero
+- nobody who left a group still has a non-zero balance in it
+- every group still has at least one admin
+- groups.member_count/admin_count match the membership rows
+- checkpoint-based balances match a full replay
+
+A second phase then sends only expenses and settlements to one group from every
+thread: ledger writes don't conflict with each other, so none of them may get a 409.
+
+Usage (from backend/):
+    python -m benchmarks.concurrency_stress --db-url sqlite:////tmp/splitfree-stress.db
+    python -m benchmarks.concurrency_stress --db-url postgresql://localhost/splitfree_stress --threads 32
+
+Exits with status 1 if an invariant is violated.
+"""
+
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+
+
+def _setup(app, groups, members_per_group):
+    from flask_jwt_extended import create_access_token
+    from db import db
+    from models import UserModel, GroupModel, GroupUserModel
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+
+        layout = []
+        for g in range(groups):
+            users = [UserModel(username=f"u{g}_{i}", email=f"u{g}_{i}@stress.local", password="x")
+                     for i in range(members_per_group)]
+            db.session.add_all(users)
+            group = GroupModel(name=f"stress-{g}", description="stress",
+                               member_count=members_per_group, admin_count=2)
+            db.session.add(group)
+            db.session.flush()
+            # Two admins, so the "last admin" check is actually contested
+            for i, user in enumerate(users):
+                db.session.add(GroupUserModel(group_id=group.id, user_id=user.id, is_admin=i < 2))
+            layout.append({
+                "group_id": group.id,
+                "admins": [u.id for u in users[:2]],
+                "members": [u.id for u in users],
+            })
+        db.session.commit()
+
+        tokens = {}
+        for entry in layout:
+            for user_id in entry["members"]:
+                tokens[user_id] = {"Authorization": "Bearer " + create_access_token(identity=str(user_id))}
+    return layout, tokens
+
+
+def _worker(app, layout, tokens, requests_per_thread, stats, seed):
+    rng = random.Random(seed)
+    client = app.test_client()
+    for n in range(requests_per_thread):
+        entry = rng.choice(layout)
+        group_id = entry["group_id"]
+        admin = rng.choice(entry["admins"])
+        member = rng.choice(entry["members"][2:])
+        action = rng.random()
+
+        if action < 0.45:
+            kind = "expense"
+            payer = rng.choice(entry["members"])
+            response = client.post(f"/group/{group_id}/expense", headers=tokens[payer], json={
+                "amount": rng.randint(1, 500),
+                "description": f"stress-{seed}-{n}",
+                "paid_by": payer,
+            })
+        elif action < 0.6:
+            kind = "settlement"
+            paid_by, paid_to = rng.sample(entry["members"], 2)
+            response = client.post(f"/group/{group_id}/settlement", headers=tokens[paid_by], json={
+                "amount": rng.randint(1, 50), "paid_by": paid_by, "paid_to": paid_to,
+            })
+        elif action < 0.85:
+            kind = "remove_member"
+            response = client.delete(f"/group/{group_id}/user/{member}", headers=tokens[admin])
+        elif action < 0.95:
+            kind = "demote_self"
+            response = client.delete(f"/group/{group_id}/admin", headers=tokens[admin],
+                                     json={"user_id": admin})
+        else:
+            stats[("checkpoint", _checkpoint(app, group_id))] += 1
+            continue
+        stats[(kind, response.status_code)] += 1
+
+
+def _ledger_worker(app, group_id, members, tokens, requests_per_thread, stats, seed):
+    """Expense/settlement-only traffic to a single group."""
+    rng = random.Random(seed)
+    client = app.test_client()
+    for n in range(requests_per_thread):
+        if rng.random() < 0.75:
+            payer = rng.choice(members)
+            response = client.post(f"/group/{group_id}/expense", headers=tokens[payer], json={
+                "amount": rng.randint(1, 500), "description": f"ledger-{seed}-{n}", "paid_by": payer,
+            })
+            stats[("expense", response.status_code)] += 1
+        else:
+            paid_by, paid_to = rng.sample(members, 2)
+            response = client.post(f"/group/{group_id}/settlement", headers=tokens[paid_by], json={
+                "amount": rng.randint(1, 50), "paid_by": paid_by, "paid_to": paid_to,
+            })
+            stats[("settlement", response.status_code)] += 1
+
+
+def _run(target, args_for, threads):
+    workers = [threading.Thread(target=target, args=args_for(i)) for i in range(threads)]
+    started = time.perf_counter()
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    return time.perf_counter() - started
+
+
+def _report(title, stats, threads, elapsed):
+    total = sum(stats.values())
+    print(f"{title}: {total} requests from {threads} threads in {elapsed:.1f}s ({total / elapsed:.0f} req/s)")
+    for (kind, status), count in sorted(stats.items()):
+        print(f"  {kind:<14} {status}  x{count}")
+
+
+def _checkpoint(app, group_id):
+    """What the scheduled checkpoint job does for one group; returns a status label."""
+    from db import db
+    from utils.balances import create_balance_checkpoint
+    from utils.concurrency import ConcurrentUpdateError
+
+    with app.app_context():
+        try:
+            created = create_balance_checkpoint(group_id)
+            db.session.commit()
+            return "created" if created else "unchanged"
+        except ConcurrentUpdateError:
+            db.session.rollback()
+            return "conflict"
+
+
+def _check_invariants(app):
+    from db import db
+    from models import (ExpenseModel, ExpenseSplitModel, ExpenseParticipantModel, SettlementModel,
+                        GroupUserModel, GroupModel)
+    from utils.balances import group_balances as balances_from_checkpoint
+
+    violations = []
+    with app.app_context():
+        balances = defaultdict(lambda: defaultdict(float))
+        rows = db.session.query(
+            ExpenseSplitModel.group_id, ExpenseModel.paid_by, ExpenseSplitModel.user_id, ExpenseSplitModel.amount
+        ).join(ExpenseSplitModel, ExpenseSplitModel.expense_id == ExpenseModel.id)
+        for group_id, payer_id, user_id, amount in rows:
+            if user_id != payer_id:
+                balances[group_id][user_id] -= float(amount)
+                balances[group_id][payer_id] += float(amount)
+        misplaced = db.session.query(ExpenseSplitModel.id).join(
+            ExpenseModel, ExpenseSplitModel.expense_id == ExpenseModel.id
+        ).filter(ExpenseSplitModel.group_id != ExpenseModel.group_id).count()
+        if misplaced:
+            violations.append(f"{misplaced} split(s) with a group_id different from their expense")
+        indexed = set(db.session.query(ExpenseParticipantModel.expense_id, ExpenseParticipantModel.user_id))
+        compact = set()
+        for e in ExpenseModel.query.filter(ExpenseModel.participants.isnot(None)):
+            compact |= {(e.id, user_id) for user_id in e.participant_ids}
+            for user_id in e.participant_ids:
+                if user_id != e.paid_by:
+                    balances[e.group_id][user_id] -= float(e.share_amount)
+                    balances[e.group_id][e.paid_by] += float(e.share_amount)
+        if indexed != compact:
+            violations.append(f"expense_participants out of sync with {len(compact ^ indexed)} participant(s)")
+        for s in SettlementModel.query.all():
+            balances[s.group_id][s.paid_by] += float(s.amount)
+            balances[s.group_id][s.paid_to] -= float(s.amount)
+
+        members = defaultdict(set)
+        admins = Counter()
+        for group_id, user_id, is_admin in db.session.query(
+                GroupUserModel.group_id, GroupUserModel.user_id, GroupUserModel.is_admin):
+            members[group_id].add(user_id)
+            admins[group_id] += int(bool(is_admin))
+
+        for group in GroupModel.query.all():
+            group_balances = balances[group.id]
+            total = sum(group_balances.values())
+            if abs(total) > 0.05:
+                violations.append(f"group {group.id}: balances sum to {total:.2f}")
+            for user_id, balance in group_balances.items():
+                if abs(balance) > 0.05 and user_id not in members[group.id]:
+                    violations.append(f"group {group.id}: removed user {user_id} has balance {balance:.2f}")
+            if admins[group.id] < 1:
+                violations.append(f"group {group.id}: no admin left")
+            if (group.member_count, group.admin_count) != (len(members[group.id]), admins[group.id]):
+                violations.append(f"group {group.id}: counters {group.member_count}/{group.admin_count} "
+                                  f"!= actual {len(members[group.id])}/{admins[group.id]}")
+            incremental = balances_from_checkpoint(group.id)
+            for user_id in set(incremental) | set(group_balances):
+                if abs(incremental.get(user_id, 0.0) - group_balances.get(user_id, 0.0)) > 0.05:
+                    violations.append(f"group {group.id}: checkpointed balance of user {user_id} "
+                                      f"{incremental.get(user_id, 0.0):.2f} != {group_balances.get(user_id, 0.0):.2f}")
+    return violations
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db-url", default="sqlite:////tmp/splitfree-stress.db")
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=100, help="requests per thread")
+    parser.add_argument("--groups", type=int, default=3)
+    parser.add_argument("--members", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault("JWT_SECRET_KEY", "stress-test-secret-key-not-for-production")
+    from app import create_app
+
+    app = create_app(args.db_url)
+    layout, tokens = _setup(app, args.groups, args.members)
+
+    stats = Counter()
+    elapsed = _run(_worker, lambda i: (app, layout, tokens, args.requests, stats, args.seed + i), args.threads)
+    _report("mixed", stats, args.threads, elapsed)
+
+    from db import db
+    from models import GroupUserModel
+
+    group_id = layout[0]["group_id"]
+    with app.app_context():
+        members = [row[0] for row in db.session.query(GroupUserModel.user_id).filter_by(group_id=group_id)]
+    ledger_stats = Counter()
+    elapsed = _run(_ledger_worker, lambda i: (app, group_id, members, tokens, args.requests, ledger_stats,
+                                              args.seed + 1000 + i), args.threads)
+    _report("ledger only, one group", ledger_stats, args.threads, elapsed)
+
+    violations = _check_invariants(app)
+    conflicts = sum(count for (_, status), count in ledger_stats.items() if status == 409)
+    if conflicts:
+        violations.append(f"{conflicts} ledger-only write(s) got 409 Conflict")
+    if violations:
+        print(f"FAILED: {len(violations)} invariant violation(s)")
+        for v in violations:
+            print(f"  {v}")
+        return 1
+    print("OK: ledger invariants hold")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
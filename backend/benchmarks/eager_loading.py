@@ -0,0 +1,91 @@
+"""
+SQL statements and latency of the read-heavy endpoints that serialize relationships.
+
+Seeds one large group (see benchmarks/query_budgets.py) and, for each endpoint below,
+counts the statements one call runs and times --repeat calls:
+
+- GET /group/<id>: the group with its members (GroupSchema.users)
+- GET /group/<id>/expense and /expense/<expense_id>: expenses with their split rows
+- GET /group/<id>/history: expenses, splits and settlements
+- POST /group/<id>/invite-email and /invite-emails: invitations with their inviter
+  (GroupInvitationSchema.invited_by), the bulk one with --invite-batch addresses
+
+Run it before and after a change to loader options and diff the result files; compare
+reports latency and statement count changes.
+
+Usage (from backend/):
+    python -m benchmarks.eager_loading --output results/loading-before.json
+    python -m benchmarks.eager_loading --output results/loading-after.json
+    python -m benchmarks.compare results/loading-before.json results/loading-after.json
+"""
+
+import argparse
+import itertools
+import os
+import sys
+
+from benchmarks import harness
+from benchmarks.query_budgets import GroupSize, seed
+from utils.query_budget import QueryCounter
+
+
+def _endpoints(ctx, invite_batch):
+    """(name, method, path, callable returning request kwargs)"""
+    g = ctx["group_id"]
+    headers = ctx["admin"]
+    counter = itertools.count()
+    return [
+        ("group_get", "GET", f"/group/{g}", lambda: {"headers": headers}),
+        ("expense_list", "GET", f"/group/{g}/expense", lambda: {"headers": headers}),
+        ("expense_get", "GET", f"/group/{g}/expense/{ctx['unequal_expense_id']}", lambda: {"headers": headers}),
+        ("history_get", "GET", f"/group/{g}/history", lambda: {"headers": headers}),
+        # Fresh addresses every call: pending invitations are rejected
+        ("invite_email", "POST", f"/group/{g}/invite-email",
+         lambda: {"headers": headers, "json": {"email": f"single{next(counter)}@loading.local"}}),
+        ("invite_emails", "POST", f"/group/{g}/invite-emails",
+         lambda: {"headers": headers, "json": {"emails": [f"bulk{next(counter)}@loading.local"
+                                                          for _ in range(invite_batch)]}}),
+    ]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db-url", default="sqlite:////tmp/splitfree-loading.db",
+                        help="database to seed (dropped and recreated)")
+    parser.add_argument("--members", type=int, default=100)
+    parser.add_argument("--expenses", type=int, default=300)
+    parser.add_argument("--invite-batch", type=int, default=25, help="addresses per bulk invitation")
+    parser.add_argument("--repeat", type=int, default=20, help="timed calls per endpoint")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault("JWT_SECRET_KEY", "benchmark-secret-key-not-for-production")
+    from app import create_app
+
+    app = create_app(args.db_url)
+    ctx = seed(app, GroupSize("loading", args.members, args.expenses, settlements=50, other_groups=5))
+    client = app.test_client()
+
+    results = {}
+    for name, method, path, make_kwargs in _endpoints(ctx, args.invite_batch):
+        def call():
+            response = client.open(path, method=method, **make_kwargs())
+            assert response.status_code < 400, response.get_data(as_text=True)
+
+        call()  # Warm up
+        with QueryCounter() as counter:
+            call()
+        results[name] = dict(harness.measure(call, args.repeat, warmup=0), queries=counter.count)
+
+    harness.print_results(results)
+    print("\nstatements per call:")
+    for name, stats in results.items():
+        print(f"  {name:<16} {stats['queries']:>5}")
+    parameters = {"members": args.members, "expenses": args.expenses, "invite_batch": args.invite_batch,
+                  "repeat": args.repeat}
+    harness.write_results(args.output, "eager_loading", args.db_url, parameters, results)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,135 @@
+"""
+Memory profile of streamed group exports.
+
+Seeds one group with --rows expense splits (--splits per expense), then consumes
+export_chunks() for each format the way the HTTP response would, sampling the
+process RSS as bytes go out. With a server-side cursor and chunked serialization
+the RSS column should stay flat from the first sample to the last; a growing
+column means something is buffering the whole export.
+
+Usage (from backend/):
+    python -m benchmarks.export_memory
+    python -m benchmarks.export_memory --rows 1000000 --formats csv jsonl parquet --gzip
+"""
+
+import argparse
+import datetime
+import os
+import sys
+import time
+
+
+def _rss_mb():
+    """Current resident set size (Linux /proc), falling back to peak RSS elsewhere."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except (OSError, ValueError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _seed(app, rows, splits_per_expense):
+    from db import db
+    from models import GroupModel, UserModel, ExpenseModel, ExpenseSplitModel, SettlementModel
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        users = [UserModel(username=f"export-{i}", email=f"export-{i}@example.com", password="x")
+                 for i in range(splits_per_expense)]
+        group = GroupModel(name="export benchmark", description="load test",
+                           member_count=len(users), admin_count=1)
+        db.session.add_all(users + [group])
+        db.session.commit()
+        user_ids = [u.id for u in users]
+
+        expenses = rows // splits_per_expense
+        start = datetime.date(2020, 1, 1)
+        batch = 20000
+        for offset in range(0, expenses, batch):
+            count = min(batch, expenses - offset)
+            db.session.execute(ExpenseModel.__table__.insert(), [
+                {"id": offset + i + 1, "description": f"expense {offset + i}", "amount": 100,
+                 "split_type": "equal", "paid_by": user_ids[(offset + i) % len(user_ids)],
+                 "group_id": group.id, "date": start + datetime.timedelta(days=(offset + i) % 1500)}
+                for i in range(count)
+            ])
+            db.session.execute(ExpenseSplitModel.__table__.insert(), [
+                {"amount": round(100 / splits_per_expense, 2), "expense_id": offset + i + 1, "user_id": uid,
+                 "group_id": group.id}
+                for i in range(count) for uid in user_ids
+            ])
+            db.session.commit()
+
+        db.session.execute(SettlementModel.__table__.insert(), [
+            {"amount": 10, "paid_by": user_ids[i % len(user_ids)], "paid_to": user_ids[(i + 1) % len(user_ids)],
+             "group_id": group.id}
+            for i in range(1000)
+        ])
+        db.session.commit()
+        return group.id, expenses * splits_per_expense + 1000
+
+
+def _profile(app, group_id, fmt, compress, sample_seconds):
+    from db import db
+    from utils.export import export_chunks
+
+    with app.app_context():
+        points = []
+        total = 0
+        started = time.perf_counter()
+        next_sample = started + sample_seconds
+        baseline = _rss_mb()
+        for chunk in export_chunks(group_id, fmt, compress):
+            total += len(chunk)
+            if time.perf_counter() >= next_sample:
+                points.append((total, _rss_mb()))
+                next_sample += sample_seconds
+        elapsed = time.perf_counter() - started
+        points.append((total, _rss_mb()))
+        db.session.remove()
+    return baseline, points, elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db-url", default="sqlite:////tmp/splitfree-export-memory.db")
+    parser.add_argument("--rows", type=int, default=1000000, help="expense split rows to export")
+    parser.add_argument("--splits", type=int, default=4, help="splits per expense")
+    parser.add_argument("--formats", nargs="+", default=["csv", "jsonl", "parquet"])
+    parser.add_argument("--gzip", action="store_true")
+    parser.add_argument("--sample-seconds", type=float, default=2.0, help="interval between RSS samples")
+    parser.add_argument("--skip-seed", action="store_true", help="reuse the database from a previous run")
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault("JWT_SECRET_KEY", "benchmark-secret-key-not-for-production")
+    from app import create_app
+    from utils.export import parquet_available
+
+    app = create_app(args.db_url)
+    if args.skip_seed:
+        group_id, rows = 1, None
+    else:
+        started = time.perf_counter()
+        group_id, rows = _seed(app, args.rows, args.splits)
+        print(f"seeded {rows:,} rows in {time.perf_counter() - started:.1f}s")
+
+    for fmt in args.formats:
+        if fmt == "parquet" and not parquet_available():
+            print("parquet: skipped (pyarrow not installed)")
+            continue
+        baseline, points, elapsed = _profile(app, group_id, fmt, args.gzip, args.sample_seconds)
+        total_bytes = points[-1][0]
+        label = f"{fmt}{'.gz' if args.gzip else ''}"
+        rss = [mb for _, mb in points]
+        print(f"{label:>12}: {total_bytes / 2 ** 20:,.1f} MB in {elapsed:.1f}s "
+              f"({total_bytes / 2 ** 20 / elapsed:,.1f} MB/s), RSS baseline {baseline:.1f} MB, "
+              f"min {min(rss):.1f} / max {max(rss):.1f} MB during export")
+        for sent, mb in points:
+            print(f"{'':>14}{sent / 2 ** 20:>10,.1f} MB sent  rss {mb:8.1f} MB")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
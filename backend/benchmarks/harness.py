@@ -0,0 +1,99 @@
+"""
+Timing and result files shared by the benchmark suites.
+
+Every suite writes one JSON document:
+
+    {"suite": ..., "environment": {...}, "parameters": {...},
+     "results": {name: {"runs", "min_ms", "median_ms", "mean_ms", "p95_ms", "p99_ms", "max_ms", "ops_per_sec"}}}
+
+`python -m benchmarks.compare old.json new.json` diffs two of them.
+"""
+
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import time
+
+
+def measure(func, repeat=20, warmup=2):
+    """Call `func` warmup + repeat times; timing stats of the measured calls (milliseconds)."""
+    for _ in range(warmup):
+        func()
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - started) * 1000)
+    return summarize(samples)
+
+
+def percentile(ordered, pct):
+    """`pct` percentile of an already sorted list."""
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def summarize(samples_ms):
+    ordered = sorted(samples_ms)
+    mean = statistics.fmean(ordered)
+    return {
+        "runs": len(ordered),
+        "min_ms": round(ordered[0], 3),
+        "median_ms": round(statistics.median(ordered), 3),
+        "mean_ms": round(mean, 3),
+        "p95_ms": round(percentile(ordered, 95), 3),
+        "p99_ms": round(percentile(ordered, 99), 3),
+        "max_ms": round(ordered[-1], 3),
+        "ops_per_sec": round(1000 / mean, 1) if mean else None,
+    }
+
+
+def _git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              timeout=5, check=True).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def environment(db_url):
+    import flask
+    import sqlalchemy
+    from utils.balance_engine import numpy_available
+
+    return {
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "git_revision": _git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "flask": flask.__version__ if hasattr(flask, "__version__") else None,
+        "sqlalchemy": sqlalchemy.__version__,
+        "database": sqlalchemy.engine.make_url(db_url).get_backend_name(),
+        "numpy": numpy_available(),
+    }
+
+
+def write_results(path, suite, db_url, parameters, results):
+    document = {
+        "suite": suite,
+        "environment": environment(db_url),
+        "parameters": parameters,
+        "results": results,
+    }
+    if path:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(document, f, indent=2, sort_keys=True)
+        print(f"results written to {path}")
+    return document
+
+
+def print_results(results):
+    width = max((len(name) for name in results), default=10)
+    print(f"{'benchmark':<{width}}  {'median ms':>10}  {'p95 ms':>10}  {'ops/s':>10}")
+    for name, stats in results.items():
+        print(f"{name:<{width}}  {stats['median_ms']:>10.3f}  {stats['p95_ms']:>10.3f}  {stats['ops_per_sec'] or 0:>10.1f}")
@@ -0,0 +1,295 @@
+"""
+HTTP load test with a production-like traffic mix.
+
+Virtual users log in, then loop over a weighted mix of requests separated by
+exponentially distributed think time:
+
+- dashboard: GET /group
+- poll balances: GET /group/<id>/balances
+- create expense: POST /group/<id>/expense
+- browse history: GET /group/<id>/history
+- refresh: POST /refresh, and an occasional fresh login
+- invite: POST /group/<id>/invite-email (only for users who admin a group)
+
+Each virtual user is a synthetic user (see benchmarks/synthetic.py) who belongs to
+at least one group. By default the app is served in-process by a threaded Werkzeug
+server with RQ on fakeredis (jobs are queued, never run). Use --target to load an
+already running server instead, e.g. a gunicorn config under test, pointed at the
+same database:
+
+    DATABASE_URL=sqlite:////tmp/splitfree-bench.db gunicorn -w 4 -b 127.0.0.1:8000 "app:create_app()"
+    python -m benchmarks.load_test --target http://127.0.0.1:8000 --step-vus 20 --steps 6
+
+In step-load mode (--steps > 1) --step-vus more virtual users are added every
+--step-duration seconds. Each step reports throughput and latency percentiles; the
+first step that adds users without raising throughput by --saturation-gain percent
+is reported as the saturation point.
+
+Needs httpx (and optionally fakeredis), which are not in requirements.txt:
+    pip install httpx fakeredis
+
+Usage (from backend/):
+    python -m benchmarks.load_test --vus 20 --step-duration 30
+    python -m benchmarks.load_test --vus 10 --step-vus 10 --steps 5 --output results/load.json
+"""
+
+import argparse
+import asyncio
+import itertools
+import os
+import random
+import sys
+import threading
+import time
+
+from benchmarks import harness, synthetic
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+# Action -> relative weight in the mix
+TRAFFIC_MIX = {
+    "dashboard": 15,
+    "poll_balances": 40,
+    "create_expense": 10,
+    "browse_history": 10,
+    "refresh": 4,
+    "login": 1,
+    "invite": 2,
+}
+
+
+def _accounts(app):
+    """[(user_id, email, group_ids, admin_group_ids)] of users with at least one group."""
+    from db import db
+    from models import GroupUserModel, UserModel
+
+    with app.app_context():
+        groups = {}
+        for user_id, email, group_id, is_admin in (db.session.query(UserModel.id, UserModel.email,
+                                                                    GroupUserModel.group_id, GroupUserModel.is_admin)
+                                                   .join(GroupUserModel, GroupUserModel.user_id == UserModel.id)):
+            entry = groups.setdefault(user_id, (email, [], []))
+            entry[1].append(group_id)
+            if is_admin:
+                entry[2].append(group_id)
+        return [(user_id, email, group_ids, admin_ids) for user_id, (email, group_ids, admin_ids) in groups.items()]
+
+
+def _serve(app, port):
+    """Serve `app` from a background thread; returns (base_url, server)."""
+    from werkzeug.serving import make_server
+
+    try:
+        import fakeredis
+        from rq import Queue
+
+        app.queue = Queue(name="emails", connection=fakeredis.FakeStrictRedis())
+    except ImportError:
+        print("fakeredis not installed: emails are skipped instead of queued")
+
+    server = make_server("127.0.0.1", port, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_port}", server
+
+
+class _Recorder:
+    def __init__(self):
+        self.step = 0
+        self.samples = []  # (step, action, latency ms, ok)
+
+    def record(self, action, started, response):
+        ok = response is not None and response.status_code < 400
+        self.samples.append((self.step, action, (time.perf_counter() - started) * 1000, ok))
+
+
+async def _virtual_user(client, account, recorder, think_time, seed, counter, stop):
+    user_id, email, group_ids, admin_ids = account
+    rng = random.Random(seed)
+    actions = list(TRAFFIC_MIX)
+    weights = [TRAFFIC_MIX[a] for a in actions]
+    tokens = {}
+
+    async def send(action, method, url, token=None, **kwargs):
+        headers = {"Authorization": f"Bearer {token}"} if token else None
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, url, headers=headers, **kwargs)
+        except httpx.HTTPError:
+            response = None
+        recorder.record(action, started, response)
+        return response
+
+    async def login():
+        response = await send("login", "POST", "/login",
+                              json={"email": email, "password": synthetic.SYNTHETIC_PASSWORD})
+        if response is not None and response.status_code == 200:
+            tokens.update(response.json())
+
+    await login()
+    while not stop.is_set():
+        if not tokens:
+            await asyncio.sleep(1)
+            await login()
+            continue
+
+        action = rng.choices(actions, weights)[0]
+        if action == "invite" and not admin_ids:
+            action = "poll_balances"
+        group_id = rng.choice(admin_ids if action == "invite" else group_ids)
+        access = tokens["access_token"]
+
+        if action == "dashboard":
+            await send(action, "GET", "/group", access)
+        elif action == "poll_balances":
+            await send(action, "GET", f"/group/{group_id}/balances", access)
+        elif action == "browse_history":
+            await send(action, "GET", f"/group/{group_id}/history", access)
+        elif action == "create_expense":
+            await send(action, "POST", f"/group/{group_id}/expense", access, json={
+                "amount": rng.randint(100, 20000) / 100, "paid_by": user_id,
+                "description": f"load {seed} {next(counter)}"
+            })
+        elif action == "refresh" and "refresh_token" in tokens:
+            # Refresh tokens are single use: the server blocklists them
+            response = await send(action, "POST", "/refresh", tokens.pop("refresh_token"))
+            if response is not None and response.status_code == 200:
+                tokens["access_token"] = response.json()["access_token"]
+        elif action in ("refresh", "login"):
+            await login()
+        else:
+            await send(action, "POST", f"/group/{group_id}/invite-email", access,
+                       json={"email": f"load-invite-{seed}-{next(counter)}@bench.local"})
+
+        if think_time:
+            try:
+                await asyncio.wait_for(stop.wait(), rng.expovariate(1 / think_time))
+            except asyncio.TimeoutError:
+                pass
+
+
+async def _run(base_url, accounts, args, recorder):
+    limits = httpx.Limits(max_connections=args.vus + args.step_vus * (args.steps - 1))
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=args.timeout) as client:
+        stop = asyncio.Event()
+        counter = itertools.count()
+        rng = random.Random(args.seed)
+        tasks = []
+        step_times = []
+        for step in range(args.steps):
+            recorder.step = step
+            target = args.vus + step * args.step_vus
+            while len(tasks) < target:
+                account = rng.choice(accounts)
+                tasks.append(asyncio.create_task(_virtual_user(
+                    client, account, recorder, args.think_time, args.seed * 100003 + len(tasks), counter, stop
+                )))
+            started = time.perf_counter()
+            await asyncio.sleep(args.step_duration)
+            step_times.append((target, time.perf_counter() - started))
+        stop.set()
+        await asyncio.gather(*tasks)
+        return step_times
+
+
+def _report(recorder, step_times, saturation_gain):
+    results = {}
+    print(f"{'step':>4}  {'users':>5}  {'req/s':>8}  {'p50 ms':>8}  {'p95 ms':>8}  {'p99 ms':>8}  {'errors':>6}")
+    best = 0.0
+    saturation = None
+    for step, (users, elapsed) in enumerate(step_times):
+        samples = [s for s in recorder.samples if s[0] == step]
+        if not samples:
+            continue
+        stats = harness.summarize([latency for _, _, latency, _ in samples])
+        rate = len(samples) / elapsed
+        errors = sum(1 for *_, ok in samples if not ok)
+        results[f"step{step}"] = dict(stats, users=users, requests_per_sec=round(rate, 1), errors=errors)
+        print(f"{step:>4}  {users:>5}  {rate:>8.1f}  {stats['median_ms']:>8.1f}  {stats['p95_ms']:>8.1f}  "
+              f"{stats['p99_ms']:>8.1f}  {errors:>6}")
+        if step and saturation is None and rate < best * (1 + saturation_gain / 100):
+            saturation = users
+        best = max(best, rate)
+
+    total_time = sum(elapsed for _, elapsed in step_times)
+    print(f"\n{'endpoint':<15}  {'requests':>8}  {'req/s':>8}  {'p50 ms':>8}  {'p95 ms':>8}  {'p99 ms':>8}  {'errors':>6}")
+    for action in TRAFFIC_MIX:
+        samples = [s for s in recorder.samples if s[1] == action]
+        if not samples:
+            continue
+        stats = harness.summarize([latency for _, _, latency, _ in samples])
+        errors = sum(1 for *_, ok in samples if not ok)
+        results[action] = dict(stats, requests_per_sec=round(len(samples) / total_time, 1), errors=errors)
+        print(f"{action:<15}  {len(samples):>8}  {len(samples) / total_time:>8.1f}  {stats['median_ms']:>8.1f}  "
+              f"{stats['p95_ms']:>8.1f}  {stats['p99_ms']:>8.1f}  {errors:>6}")
+
+    if len(step_times) > 1:
+        if saturation is None:
+            print(f"\nno saturation up to {step_times[-1][0]} users")
+        else:
+            print(f"\nsaturation: throughput stopped growing at {saturation} users")
+    results["total"] = {"requests": len(recorder.samples),
+                        "requests_per_sec": round(len(recorder.samples) / total_time, 1),
+                        "errors": sum(1 for *_, ok in recorder.samples if not ok),
+                        "saturation_users": saturation}
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db-url", default="sqlite:////tmp/splitfree-bench.db")
+    parser.add_argument("--target", help="base URL of a running server (default: serve the app in-process)")
+    parser.add_argument("--port", type=int, default=0, help="port of the in-process server (default: any free port)")
+    parser.add_argument("--vus", type=int, default=10, help="virtual users in the first step")
+    parser.add_argument("--step-vus", type=int, default=10, help="virtual users added per step")
+    parser.add_argument("--steps", type=int, default=1, help="load steps; more than one enables step-load mode")
+    parser.add_argument("--step-duration", type=float, default=30, help="seconds per step")
+    parser.add_argument("--think-time", type=float, default=1.0, help="mean seconds between a user's requests")
+    parser.add_argument("--timeout", type=float, default=30, help="request timeout in seconds")
+    parser.add_argument("--saturation-gain", type=float, default=5,
+                        help="minimum throughput gain (percent) per step before calling saturation")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--skip-generate", action="store_true", help="reuse the dataset from a previous run")
+    synthetic.add_arguments(parser)
+    args = parser.parse_args(argv)
+
+    if httpx is None:
+        print("httpx is required: pip install httpx")
+        return 1
+
+    os.environ.setdefault("JWT_SECRET_KEY", "benchmark-secret-key-not-for-production")
+    from app import create_app
+
+    app = create_app(args.db_url)
+    config = synthetic.config_from_args(args)
+    if not args.skip_generate:
+        counts = synthetic.generate(app, config)
+        print("dataset: " + ", ".join(f"{table} {count:,}" for table, count in sorted(counts.items())))
+    accounts = _accounts(app)
+
+    server = None
+    base_url = args.target
+    if not base_url:
+        base_url, server = _serve(app, args.port)
+    print(f"load: {base_url}, {args.vus} users + {args.step_vus} per step, "
+          f"{args.steps} step(s) of {args.step_duration:g}s")
+
+    recorder = _Recorder()
+    try:
+        step_times = asyncio.run(_run(base_url, accounts, args, recorder))
+    finally:
+        if server is not None:
+            server.shutdown()
+
+    results = _report(recorder, step_times, args.saturation_gain)
+    parameters = dict(vars(config), target=args.target, vus=args.vus, step_vus=args.step_vus,
+                      steps=args.steps, step_duration=args.step_duration, think_time=args.think_time,
+                      traffic_mix=TRAFFIC_MIX)
+    harness.write_results(args.output, "load", args.db_url, parameters, results)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,139 @@
+"""
+Micro-benchmarks for the hot paths of the SplitFree API.
+
+Runs against a synthetic dataset (see benchmarks/synthetic.py) and times, for the
+largest group and a median-sized one:
+
+- _compute_balances(group_id)
+- GET /group/<id>/history (GroupHistory.get through the test client)
+- POST /group/<id>/expense (GroupExpense.post, equal and unequal splits)
+- ExpenseSchema / HistoryItemSchema serialization of the group's expenses
+
+Results go to a JSON file; compare two runs with `python -m benchmarks.compare`.
+
+Usage (from backend/):
+    python -m benchmarks.micro --output results/micro.json
+    python -m benchmarks.micro --db-url postgresql://localhost/splitfree_bench --groups 500 --repeat 50
+    python -m benchmarks.micro --skip-generate   # reuse the dataset from a previous run
+"""
+
+import argparse
+import datetime
+import itertools
+import os
+import sys
+
+from benchmarks import harness, synthetic
+
+
+def _pick_groups(app):
+    """(label, group_id, member_id, other_member_id) for the largest and a median-sized group."""
+    from db import db
+    from models import GroupModel, GroupUserModel
+
+    with app.app_context():
+        groups = db.session.query(GroupModel.id).order_by(GroupModel.member_count, GroupModel.id).all()
+        picked = [("large", groups[-1][0]), ("median", groups[len(groups) // 2][0])]
+        result = []
+        for label, group_id in picked:
+            members = [row[0] for row in db.session.query(GroupUserModel.user_id)
+                       .filter_by(group_id=group_id).order_by(GroupUserModel.user_id).limit(2)]
+            result.append((label, group_id, members[0], members[1]))
+        return result
+
+
+def _bench_group(app, client, label, group_id, member_id, other_id, repeat):
+    from flask_jwt_extended import create_access_token
+    from db import db
+    from models import ExpenseModel
+    from resources.settlement import _compute_balances
+    from schemas import ExpenseSchema, HistoryItemSchema
+
+    results = {}
+    with app.app_context():
+        headers = {"Authorization": "Bearer " + create_access_token(identity=str(member_id))}
+
+    def compute_balances():
+        with app.app_context():
+            _compute_balances(group_id)
+            db.session.remove()
+
+    results[f"compute_balances[{label}]"] = harness.measure(compute_balances, repeat)
+
+    def history():
+        response = client.get(f"/group/{group_id}/history", headers=headers)
+        assert response.status_code == 200, response.get_data(as_text=True)
+
+    results[f"history_get[{label}]"] = harness.measure(history, repeat)
+
+    # Unique descriptions: the endpoint rejects same-day duplicates
+    counter = itertools.count()
+
+    def post_equal():
+        response = client.post(f"/group/{group_id}/expense", headers=headers, json={
+            "amount": 42.5, "description": f"micro equal {label} {next(counter)}", "paid_by": member_id
+        })
+        assert response.status_code == 201, response.get_data(as_text=True)
+
+    def post_unequal():
+        response = client.post(f"/group/{group_id}/expense", headers=headers, json={
+            "amount": 30, "description": f"micro unequal {label} {next(counter)}", "paid_by": member_id,
+            "split_type": "unequal",
+            "splits": [{"user_id": member_id, "amount": 10}, {"user_id": other_id, "amount": 20}]
+        })
+        assert response.status_code == 201, response.get_data(as_text=True)
+
+    results[f"expense_post_equal[{label}]"] = harness.measure(post_equal, repeat)
+    results[f"expense_post_unequal[{label}]"] = harness.measure(post_unequal, repeat)
+
+    # Serialization only: models and history items are loaded once, outside the timing
+    with app.app_context():
+        expenses = ExpenseModel.query.filter_by(group_id=group_id).all()
+        for expense in expenses:
+            expense.split_items
+        response = client.get(f"/group/{group_id}/history", headers=headers)
+        items = response.get_json()["items"]
+        for item in items:
+            if item.get("date"):
+                item["date"] = datetime.date.fromisoformat(item["date"])
+
+        expense_schema = ExpenseSchema(many=True)
+        history_schema = HistoryItemSchema(many=True)
+        results[f"serialize_expenses[{label}]"] = harness.measure(lambda: expense_schema.dump(expenses), repeat)
+        results[f"serialize_history[{label}]"] = harness.measure(lambda: history_schema.dump(items), repeat)
+        db.session.remove()
+
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db-url", default="sqlite:////tmp/splitfree-bench.db")
+    parser.add_argument("--repeat", type=int, default=20, help="timed calls per benchmark")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--skip-generate", action="store_true", help="reuse the dataset from a previous run")
+    synthetic.add_arguments(parser)
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault("JWT_SECRET_KEY", "benchmark-secret-key-not-for-production")
+    from app import create_app
+
+    app = create_app(args.db_url)
+    config = synthetic.config_from_args(args)
+    if not args.skip_generate:
+        counts = synthetic.generate(app, config)
+        print("dataset: " + ", ".join(f"{table} {count:,}" for table, count in sorted(counts.items())))
+
+    client = app.test_client()
+    results = {}
+    for label, group_id, member_id, other_id in _pick_groups(app):
+        results.update(_bench_group(app, client, label, group_id, member_id, other_id, args.repeat))
+
+    harness.print_results(results)
+    parameters = dict(vars(config), repeat=args.repeat)
+    harness.write_results(args.output, "micro", args.db_url, parameters, results)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
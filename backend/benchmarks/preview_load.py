@@ -0,0 +1,127 @@
+"""
+Load test for the public group preview endpoint (/group/code/<code>).
+
+Seeds --groups public groups, then fires --requests preview lookups from --threads
+threads through the Flask test client, once with the preview cache disabled and
+once with it enabled. The traffic mimics link unfurlers (a few hot codes) mixed with
+enumeration (--invalid-ratio of lookups for codes that don't exist). Reports
+throughput, latency percentiles and SQL statements per request for both runs.
+
+Usage (from backend/):
+    python -m benchmarks.preview_load
+    python -m benchmarks.preview_load --groups 5000 --requests 50000 --threads 16
+"""
+
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+
+
+def _percentile(values, pct):
+    values = sorted(values)
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def _seed(app, groups):
+    from db import db
+    from models import GroupModel
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        rows = [GroupModel(name=f"preview-{i}", description="load test", member_count=random.randint(1, 50))
+                for i in range(groups)]
+        db.session.add_all(rows)
+        db.session.commit()
+        return [g.invite_code for g in rows]
+
+
+def _run(app, codes, total, threads, invalid_ratio, seed):
+    from sqlalchemy import event
+    from db import db
+
+    statements = [0]
+    lock = threading.Lock()
+
+    def count(*args):
+        with lock:
+            statements[0] += 1
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, "before_cursor_execute", count)
+
+    hot = codes[:max(1, len(codes) // 20)]
+    latencies = []
+
+    def worker(n, worker_seed):
+        rng = random.Random(worker_seed)
+        client = app.test_client()
+        local = []
+        for _ in range(n):
+            if rng.random() < invalid_ratio:
+                code = f"SPLIT-{rng.randrange(10 ** 6):06d}"
+            elif rng.random() < 0.8:
+                code = rng.choice(hot)
+            else:
+                code = rng.choice(codes)
+            started = time.perf_counter()
+            client.get(f"/group/code/{code}")
+            local.append(time.perf_counter() - started)
+        with lock:
+            latencies.extend(local)
+
+    per_thread = total // threads
+    pool = [threading.Thread(target=worker, args=(per_thread, seed + i)) for i in range(threads)]
+    started = time.perf_counter()
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    elapsed = time.perf_counter() - started
+    event.remove(engine, "before_cursor_execute", count)
+
+    done = len(latencies)
+    return {
+        "requests": done,
+        "rps": done / elapsed,
+        "p50_ms": _percentile(latencies, 50) * 1000,
+        "p95_ms": _percentile(latencies, 95) * 1000,
+        "p99_ms": _percentile(latencies, 99) * 1000,
+        "queries_per_request": statements[0] / done,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db-url", default="sqlite:////tmp/splitfree-preview-load.db")
+    parser.add_argument("--groups", type=int, default=2000)
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--invalid-ratio", type=float, default=0.2)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault("JWT_SECRET_KEY", "benchmark-secret-key-not-for-production")
+    from app import create_app
+
+    app = create_app(args.db_url)
+    codes = _seed(app, args.groups)
+    cache = app.preview_cache
+
+    for label, preview_cache in (("uncached", None), ("cached", cache)):
+        app.preview_cache = preview_cache
+        result = _run(app, codes, args.requests, args.threads, args.invalid_ratio, args.seed)
+        print(f"{label:>9}: {result['requests']:,} req, {result['rps']:,.0f} req/s, "
+              f"p50 {result['p50_ms']:.2f}ms p95 {result['p95_ms']:.2f}ms p99 {result['p99_ms']:.2f}ms, "
+              f"{result['queries_per_request']:.2f} queries/req")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,115 @@
+"""
+Cold start time of the app, measured in fresh interpreters.
+
+Each scenario runs --runs times in a new `python` process:
+
+- import: `import app` alone (what `flask`, gunicorn and the worker pay first)
+- worker: import + create_app(with_api=False), as background jobs build it
+- web: import + create_app(), as gunicorn builds it
+
+One extra web run under `python -X importtime` lists the modules that contribute
+most to the import. Exits with status 1 if the median web cold start exceeds
+--budget-ms.
+
+Usage (from backend/):
+    python -m benchmarks.startup
+    python -m benchmarks.startup --runs 20 --budget-ms 800 --output results/startup.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from benchmarks import harness
+
+# Median web cold start (import + create_app) must stay below this
+DEFAULT_BUDGET_MS = 1000
+
+_PROBE = """
+import json, time
+started = time.perf_counter()
+import app
+imported = time.perf_counter()
+if {create!r}:
+    app.create_app(with_api={with_api!r})
+created = time.perf_counter()
+print(json.dumps({{"import_ms": (imported - started) * 1000, "total_ms": (created - started) * 1000}}))
+"""
+
+SCENARIOS = {
+    "import": {"create": False, "with_api": True},
+    "worker": {"create": True, "with_api": False},
+    "web": {"create": True, "with_api": True},
+}
+
+
+def _env(db_url):
+    env = dict(os.environ)
+    env.setdefault("JWT_SECRET_KEY", "benchmark-secret-key-not-for-production")
+    env["DATABASE_URL"] = db_url
+    env.pop("FLASK_RUN_FROM_CLI", None)
+    return env
+
+
+def _run(scenario, env, extra_args=()):
+    result = subprocess.run([sys.executable, *extra_args, "-c", _PROBE.format(**SCENARIOS[scenario])],
+                            capture_output=True, text=True, env=env, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1]), result.stderr
+
+
+def _slowest_imports(env, top):
+    """(module, cumulative ms) of the top-level imports that cost the most, from -X importtime."""
+    _, stderr = _run("web", env, ["-X", "importtime"])
+    costs = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if not cumulative.strip().isdigit():
+            continue
+        # Direct imports of the probe and of app (one or two levels deep)
+        depth = (len(name) - len(name.lstrip())) // 2
+        if depth <= 1:
+            costs[name.strip()] = max(costs.get(name.strip(), 0), int(cumulative) / 1000)
+    return sorted(costs.items(), key=lambda item: -item[1])[:top]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db-url", default="sqlite:////tmp/splitfree-startup.db")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS,
+                        help="maximum median web cold start in milliseconds")
+    parser.add_argument("--top", type=int, default=10, help="slowest imports to list")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    env = _env(args.db_url)
+    _run("web", env)  # Warm the filesystem cache and bytecode files
+
+    results = {}
+    for scenario in SCENARIOS:
+        samples = [_run(scenario, env)[0] for _ in range(args.runs)]
+        results[scenario] = dict(harness.summarize([s["total_ms"] for s in samples]),
+                                 import_median_ms=round(statistics.median(s["import_ms"] for s in samples), 3))
+
+    harness.print_results(results)
+    slowest = _slowest_imports(env, args.top)
+    print("\nslowest imports (cumulative ms):")
+    for module, ms in slowest:
+        print(f"  {module:<40} {ms:8.1f}")
+    results["slowest_imports"] = dict(slowest)
+
+    web = results["web"]["median_ms"]
+    within = web <= args.budget_ms
+    print(f"\nweb cold start {web:.0f} ms, budget {args.budget_ms:.0f} ms: {'OK' if within else 'OVER BUDGET'}")
+    harness.write_results(args.output, "startup", args.db_url, {"runs": args.runs, "budget_ms": args.budget_ms},
+                          results)
+    return 0 if within else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,216 @@
+"""
+Deterministic synthetic data for benchmarks.
+
+Generates users, groups whose member counts follow a configurable distribution,
+expenses with a mix of split types (equal splits stored compactly, unequal and
+percentage splits as split rows) and settlements, and loads them with bulk
+inserts. The same --seed always produces the same database, so results from
+different releases are comparable.
+
+Usage (from backend/):
+    python -m benchmarks.synthetic --db-url sqlite:////tmp/splitfree-bench.db
+    python -m benchmarks.synthetic --db-url postgresql://localhost/splitfree_bench \\
+        --users 20000 --groups 2000 --members lognormal:8:1.0 --expenses 200
+"""
+
+import argparse
+import datetime
+import math
+import os
+import random
+import sys
+import time
+from dataclasses import dataclass, field
+
+# Split types of generated expenses and their relative weights
+DEFAULT_SPLIT_MIX = {"equal": 0.7, "unequal": 0.2, "percentage": 0.1}
+
+INSERT_BATCH = 5000
+
+# Every synthetic user logs in with user<N>@bench.local and this password
+SYNTHETIC_PASSWORD = "bench-password"
+
+
+@dataclass
+class SyntheticConfig:
+    users: int = 2000
+    groups: int = 200
+    # "fixed:N", "uniform:LOW:HIGH" or "lognormal:MEDIAN:SIGMA" (clamped to [2, max_members])
+    members: str = "lognormal:6:0.8"
+    max_members: int = 200
+    expenses: int = 100  # Per group, on average
+    settlements: int = 10  # Per group, on average
+    split_mix: dict = field(default_factory=lambda: dict(DEFAULT_SPLIT_MIX))
+    seed: int = 42
+
+
+def _member_count(rng, spec, max_members):
+    kind, *params = spec.split(":")
+    if kind == "fixed":
+        count = int(params[0])
+    elif kind == "uniform":
+        count = rng.randint(int(params[0]), int(params[1]))
+    elif kind == "lognormal":
+        count = round(rng.lognormvariate(math.log(float(params[0])), float(params[1])))
+    else:
+        raise ValueError(f"Unknown member distribution: {spec}")
+    return max(2, min(count, max_members))
+
+
+def _cents(amount):
+    return round(amount / 100, 2)
+
+
+class _Loader:
+    """Buffers rows per table and flushes them with executemany inserts, parents first."""
+
+    def __init__(self, session):
+        self.session = session
+        self.pending = {}  # Tables in order of first use, which is foreign key order
+        self.counts = {}
+
+    def add(self, table, row):
+        rows = self.pending.setdefault(table, [])
+        rows.append(row)
+        if len(rows) >= INSERT_BATCH:
+            self.flush()
+
+    def flush(self):
+        for table, rows in self.pending.items():
+            if rows:
+                self.session.execute(table.insert(), rows)
+                self.counts[table.name] = self.counts.get(table.name, 0) + len(rows)
+                self.pending[table] = []
+
+
+def generate(app, config):
+    """Drop and recreate the schema of `app`, then load a synthetic dataset. Returns row counts."""
+    from db import db
+    from models import (UserModel, GroupModel, GroupUserModel, ExpenseModel, ExpenseSplitModel,
+                        ExpenseParticipantModel, SettlementModel)
+    from passlib.hash import pbkdf2_sha256
+    from utils.splits import encode_participants, equal_share
+
+    rng = random.Random(config.seed)
+    split_types = list(config.split_mix)
+    split_weights = [config.split_mix[t] for t in split_types]
+    start = datetime.date(2023, 1, 1)
+    # One hash shared by all users: hashing each password would dominate generation
+    password = pbkdf2_sha256.hash(SYNTHETIC_PASSWORD)
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        load = _Loader(db.session)
+
+        for user_id in range(1, config.users + 1):
+            load.add(UserModel.__table__, {"id": user_id, "username": f"user{user_id}",
+                                           "email": f"user{user_id}@bench.local", "password": password})
+        load.flush()
+
+        expense_id = split_id = settlement_id = membership_id = 0
+        for group_id in range(1, config.groups + 1):
+            members = sorted(rng.sample(range(1, config.users + 1),
+                                        min(_member_count(rng, config.members, config.max_members), config.users)))
+            load.add(GroupModel.__table__, {
+                "id": group_id, "name": f"group{group_id}", "description": "synthetic",
+                "invite_code": f"BENCH-{group_id:08d}", "is_public": False,
+                "member_count": len(members), "admin_count": 1, "version": 1, "change_log_floor": 0
+            })
+            for position, user_id in enumerate(members):
+                membership_id += 1
+                load.add(GroupUserModel.__table__, {"id": membership_id, "group_id": group_id, "user_id": user_id,
+                                                    "is_admin": position == 0, "version": 1})
+
+            for _ in range(rng.randint(config.expenses // 2, config.expenses * 3 // 2)):
+                expense_id += 1
+                split_type = rng.choices(split_types, split_weights)[0]
+                amount_cents = rng.randint(100, 50000)
+                row = {
+                    "id": expense_id, "description": f"expense {expense_id}", "amount": _cents(amount_cents),
+                    "split_type": split_type, "paid_by": rng.choice(members), "group_id": group_id,
+                    "date": start + datetime.timedelta(days=rng.randrange(730)),
+                    "participants": None, "participant_count": None, "share_amount": None
+                }
+                if split_type == "equal":
+                    row.update(participants=encode_participants(members), participant_count=len(members),
+                               share_amount=equal_share(row["amount"], len(members)))
+                load.add(ExpenseModel.__table__, row)
+                if split_type == "equal":
+                    for user_id in members:
+                        load.add(ExpenseParticipantModel.__table__, {"expense_id": expense_id, "group_id": group_id,
+                                                                     "user_id": user_id})
+                    continue
+
+                # Unequal / percentage: a random subset of members with random weights
+                chosen = rng.sample(members, rng.randint(min(2, len(members)), len(members)))
+                weights = [rng.random() + 0.1 for _ in chosen]
+                shares = [int(amount_cents * w / sum(weights)) for w in weights]
+                shares[0] += amount_cents - sum(shares)
+                for user_id, share in zip(chosen, shares):
+                    split_id += 1
+                    load.add(ExpenseSplitModel.__table__, {"id": split_id, "amount": _cents(share),
+                                                           "expense_id": expense_id, "group_id": group_id,
+                                                           "user_id": user_id})
+
+            for _ in range(rng.randint(config.settlements // 2, config.settlements * 3 // 2)):
+                settlement_id += 1
+                paid_by, paid_to = rng.sample(members, 2)
+                load.add(SettlementModel.__table__, {"id": settlement_id, "amount": _cents(rng.randint(100, 20000)),
+                                                     "paid_by": paid_by, "paid_to": paid_to, "group_id": group_id})
+
+        load.flush()
+        db.session.commit()
+        _reset_sequences(db)
+        return dict(load.counts)
+
+
+def _reset_sequences(db):
+    """Explicit ids bypass PostgreSQL sequences; move them past the loaded rows."""
+    if db.engine.dialect.name != "postgresql":
+        return
+    with db.engine.begin() as connection:
+        for table in ("users", "groups", "group_user", "expenses", "expense_splits", "settlements"):
+            connection.exec_driver_sql(
+                f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+                f"COALESCE((SELECT MAX(id) FROM {table}), 0) + 1, false)"
+            )
+
+
+def add_arguments(parser):
+    """Dataset options shared by every benchmark that generates data."""
+    defaults = SyntheticConfig()
+    parser.add_argument("--users", type=int, default=defaults.users)
+    parser.add_argument("--groups", type=int, default=defaults.groups)
+    parser.add_argument("--members", default=defaults.members,
+                        help="member count distribution: fixed:N, uniform:LOW:HIGH or lognormal:MEDIAN:SIGMA")
+    parser.add_argument("--max-members", type=int, default=defaults.max_members)
+    parser.add_argument("--expenses", type=int, default=defaults.expenses, help="expenses per group (average)")
+    parser.add_argument("--settlements", type=int, default=defaults.settlements, help="settlements per group (average)")
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+
+
+def config_from_args(args):
+    return SyntheticConfig(users=args.users, groups=args.groups, members=args.members,
+                           max_members=args.max_members, expenses=args.expenses,
+                           settlements=args.settlements, seed=args.seed)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db-url", default="sqlite:////tmp/splitfree-bench.db")
+    add_arguments(parser)
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault("JWT_SECRET_KEY", "benchmark-secret-key-not-for-production")
+    from app import create_app
+
+    started = time.perf_counter()
+    counts = generate(create_app(args.db_url), config_from_args(args))
+    print(f"generated in {time.perf_counter() - started:.1f}s: "
+          + ", ".join(f"{table} {count:,}" for table, count in sorted(counts.items())))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
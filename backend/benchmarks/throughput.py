@@ -0,0 +1,160 @@
+"""
+End-to-end throughput through the Flask test client.
+
+Worker threads each drive their own test client with a weighted mix of reads and
+writes against random groups of a synthetic dataset (see benchmarks/synthetic.py),
+as random members of those groups, for --duration seconds. Reports overall
+requests/s plus latency per request type; non-2xx responses are counted as errors.
+
+This measures the application stack in-process (routing, auth, schemas, ORM,
+database); it does not include a WSGI server or the network.
+
+Usage (from backend/):
+    python -m benchmarks.throughput --output results/throughput.json
+    python -m benchmarks.throughput --db-url postgresql://localhost/splitfree_bench --threads 16 --duration 60
+"""
+
+import argparse
+import itertools
+import os
+import random
+import sys
+import threading
+import time
+
+from benchmarks import harness, synthetic
+
+# Request type -> relative weight in the mix
+REQUEST_MIX = {
+    "list_groups": 10,
+    "balances": 25,
+    "history": 15,
+    "expenses": 15,
+    "my_balances": 10,
+    "post_expense": 15,
+    "post_settlement": 10,
+}
+
+
+def _sample_memberships(app, groups, seed):
+    """{group_id: [member tokens]} for up to `groups` random groups."""
+    from flask_jwt_extended import create_access_token
+    from db import db
+    from models import GroupUserModel
+
+    with app.app_context():
+        memberships = {}
+        for group_id, user_id in db.session.query(GroupUserModel.group_id, GroupUserModel.user_id):
+            memberships.setdefault(group_id, []).append(user_id)
+        picked = random.Random(seed).sample(sorted(memberships), min(groups, len(memberships)))
+        return {
+            group_id: [(user_id, {"Authorization": "Bearer " + create_access_token(identity=str(user_id))})
+                       for user_id in memberships[group_id]]
+            for group_id in picked
+        }
+
+
+def _request(client, kind, group_id, members, rng, counter):
+    user_id, headers = rng.choice(members)
+    if kind == "list_groups":
+        return client.get("/group", headers=headers)
+    if kind == "balances":
+        return client.get(f"/group/{group_id}/balances", headers=headers)
+    if kind == "history":
+        return client.get(f"/group/{group_id}/history", headers=headers)
+    if kind == "expenses":
+        return client.get(f"/group/{group_id}/expense", headers=headers)
+    if kind == "my_balances":
+        return client.get("/user/me/balances", headers=headers)
+    if kind == "post_expense":
+        return client.post(f"/group/{group_id}/expense", headers=headers, json={
+            "amount": rng.randint(100, 20000) / 100, "description": f"throughput {next(counter)}",
+            "paid_by": user_id
+        })
+    other_id = rng.choice([m for m, _ in members if m != user_id])
+    return client.post(f"/group/{group_id}/settlement", headers=headers, json={
+        "amount": rng.randint(100, 5000) / 100, "paid_by": user_id, "paid_to": other_id
+    })
+
+
+def _worker(app, memberships, deadline, seed, counter, samples, errors, lock):
+    client = app.test_client()
+    rng = random.Random(seed)
+    kinds = list(REQUEST_MIX)
+    weights = [REQUEST_MIX[k] for k in kinds]
+    group_ids = sorted(memberships)
+    local = {kind: [] for kind in kinds}
+    failed = {}
+
+    while time.perf_counter() < deadline:
+        kind = rng.choices(kinds, weights)[0]
+        group_id = rng.choice(group_ids)
+        started = time.perf_counter()
+        response = _request(client, kind, group_id, memberships[group_id], rng, counter)
+        local[kind].append((time.perf_counter() - started) * 1000)
+        if response.status_code >= 300:
+            failed[kind] = failed.get(kind, 0) + 1
+
+    with lock:
+        for kind, values in local.items():
+            samples[kind].extend(values)
+        for kind, count in failed.items():
+            errors[kind] = errors.get(kind, 0) + count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db-url", default="sqlite:////tmp/splitfree-bench.db")
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=20, help="seconds of load")
+    parser.add_argument("--active-groups", type=int, default=50, help="groups the requests are spread over")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--skip-generate", action="store_true", help="reuse the dataset from a previous run")
+    synthetic.add_arguments(parser)
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault("JWT_SECRET_KEY", "benchmark-secret-key-not-for-production")
+    from app import create_app
+
+    app = create_app(args.db_url)
+    config = synthetic.config_from_args(args)
+    if not args.skip_generate:
+        counts = synthetic.generate(app, config)
+        print("dataset: " + ", ".join(f"{table} {count:,}" for table, count in sorted(counts.items())))
+
+    memberships = _sample_memberships(app, args.active_groups, args.seed)
+    samples = {kind: [] for kind in REQUEST_MIX}
+    errors = {}
+    lock = threading.Lock()
+    counter = itertools.count()  # next() is atomic under the GIL
+
+    started = time.perf_counter()
+    deadline = started + args.duration
+    threads = [
+        threading.Thread(target=_worker, args=(app, memberships, deadline, args.seed + i, counter,
+                                               samples, errors, lock))
+        for i in range(args.threads)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    results = {kind: dict(harness.summarize(values), errors=errors.get(kind, 0))
+               for kind, values in samples.items() if values}
+    total = sum(len(values) for values in samples.values())
+    results["total"] = {"requests": total, "errors": sum(errors.values()),
+                        "requests_per_sec": round(total / elapsed, 1)}
+
+    harness.print_results({kind: stats for kind, stats in results.items() if kind != "total"})
+    print(f"{total:,} requests in {elapsed:.1f}s: {total / elapsed:.1f} req/s, "
+          f"{results['total']['errors']} errors")
+    parameters = dict(vars(config), threads=args.threads, duration=args.duration,
+                      active_groups=args.active_groups, request_mix=REQUEST_MIX)
+    harness.write_results(args.output, "throughput", args.db_url, parameters, results)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
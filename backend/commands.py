@@ -0,0 +1,105 @@
+"""
+Flask CLI maintenance commands, e.g. `flask groups reconcile-counts`, `flask groups check-checkpoints`,
+`flask groups compact-splits`.
+"""
+
+import click
+from flask.cli import AppGroup
+
+from db import db
+from models import GroupModel, GroupUserModel, ExpenseModel, BalanceCheckpointModel
+from utils.balances import group_balances
+from utils.splits import compact_group_splits
+from config import COMPACT_SPLITS_BATCH_SIZE
+
+groups_cli = AppGroup("groups", help="Group maintenance commands.")
+
+
+@groups_cli.command("reconcile-counts")
+@click.option("--dry-run", is_flag=True, help="Only report groups whose counters drifted.")
+def reconcile_counts(dry_run):
+    """Recompute groups.member_count/admin_count from group_user and fix any drift."""
+    actual = {
+        group_id: (members, admins or 0)
+        for group_id, members, admins in db.session.query(
+            GroupUserModel.group_id,
+            db.func.count(GroupUserModel.id),
+            db.func.sum(db.case((GroupUserModel.is_admin.is_(True), 1), else_=0))
+        ).group_by(GroupUserModel.group_id)
+    }
+
+    drifted = 0
+    for group_id, member_count, admin_count in db.session.query(
+            GroupModel.id, GroupModel.member_count, GroupModel.admin_count):
+        members, admins = actual.get(group_id, (0, 0))
+        if (member_count, admin_count) == (members, admins):
+            continue
+        drifted += 1
+        click.echo(f"group {group_id}: members {member_count} -> {members}, admins {admin_count} -> {admins}")
+        if not dry_run:
+            GroupModel.query.filter_by(id=group_id).update(
+                {GroupModel.member_count: members, GroupModel.admin_count: admins},
+                synchronize_session=False
+            )
+
+    if not dry_run:
+        db.session.commit()
+    verb = "need reconciling" if dry_run else "reconciled"
+    click.echo(f"{drifted} group(s) {verb}")
+
+
+@groups_cli.command("check-checkpoints")
+@click.option("--group-id", type=int, default=None, help="Only check this group.")
+@click.option("--repair", is_flag=True, help="Delete checkpoints of groups that disagree with a full replay.")
+def check_checkpoints(group_id, repair):
+    """Compare checkpoint-based balances with a full replay of every checkpointed group."""
+    query = db.session.query(BalanceCheckpointModel.group_id).distinct()
+    if group_id is not None:
+        query = query.filter(BalanceCheckpointModel.group_id == group_id)
+
+    checked = mismatched = 0
+    for (gid,) in query.order_by(BalanceCheckpointModel.group_id):
+        checked += 1
+        incremental = group_balances(gid)
+        replayed = group_balances(gid, use_checkpoint=False)
+        diffs = {
+            uid: (incremental.get(uid, 0.0), replayed.get(uid, 0.0))
+            for uid in set(incremental) | set(replayed)
+            if abs(incremental.get(uid, 0.0) - replayed.get(uid, 0.0)) > 0.005
+        }
+        if not diffs:
+            continue
+        mismatched += 1
+        for uid, (got, expected) in sorted(diffs.items()):
+            click.echo(f"group {gid}: user {uid} checkpointed {got:.2f} != replayed {expected:.2f}")
+        if repair:
+            BalanceCheckpointModel.query.filter_by(group_id=gid).delete(synchronize_session=False)
+
+    if repair:
+        db.session.commit()
+    click.echo(f"{checked} group(s) checked, {mismatched} mismatched" + (" (checkpoints dropped)" if repair and mismatched else ""))
+
+
+@groups_cli.command("compact-splits")
+@click.option("--group-id", type=int, default=None, help="Only compact this group.")
+@click.option("--batch-size", type=int, default=COMPACT_SPLITS_BATCH_SIZE, show_default=True,
+              help="Expenses converted per transaction.")
+def compact_splits(group_id, batch_size):
+    """Move equal splits written as one row per participant to compact storage."""
+    query = db.session.query(ExpenseModel.group_id).filter(
+        ExpenseModel.split_type == "equal", ExpenseModel.participants.is_(None)).distinct()
+    if group_id is not None:
+        query = query.filter(ExpenseModel.group_id == group_id)
+
+    group_ids = [gid for (gid,) in query.order_by(ExpenseModel.group_id)]
+    converted = 0
+    for gid in group_ids:
+        count = compact_group_splits(gid, batch_size)
+        if count:
+            click.echo(f"group {gid}: {count} expense(s) compacted")
+        converted += count
+    click.echo(f"{converted} expense(s) compacted in {len(group_ids)} group(s)")
+
+
+def register_commands(app):
+    app.cli.add_command(groups_cli)
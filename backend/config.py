@@ -14,3 +14,89 @@ DEFAULT_GROUP_PUBLIC = True
 # Pagination
 DEFAULT_PAGE_SIZE = 20
 MAX_PAGE_SIZE = 100
+
+# Activity notifications
+NOTIFICATION_DIGEST_WINDOW_MINUTES = 15  # Events in one window are coalesced into one email per user
+NOTIFICATION_DIGEST_BATCH_SIZE = 5000  # Max events fanned out per digest run
+NOTIFICATION_DIGEST_MAX_ATTEMPTS = 6  # Failed runs before an event is dropped (retries back off 1, 2, 4... windows)
+
+# Live group updates (/group/<id>/events)
+LIVE_EVENTS_BACKLOG_SIZE = 200  # Recent events kept per group for resume/long-poll
+LIVE_EVENTS_HEARTBEAT_SECONDS = 15  # SSE keep-alive comment interval
+LIVE_EVENTS_STREAM_MAX_SECONDS = 300  # Clients reconnect (with Last-Event-ID) after this
+LIVE_EVENTS_LONG_POLL_TIMEOUT = 25  # Max seconds a long-poll request waits
+LIVE_EVENTS_TICKET_SECONDS = 30  # Lifetime of the ?ticket= an EventSource connects with
+
+# Delta sync change log (/group/<id>/changes)
+CHANGE_LOG_RETENTION_DAYS = 90  # Older changes are compacted; clients behind that resync fully
+CHANGE_LOG_PAGE_SIZE = 500  # Max changes returned per request
+CHANGE_LOG_COMPACTION_BATCH_SIZE = 5000  # Rows deleted per statement when compacting
+
+# Optimistic concurrency control on group writes
+OCC_MAX_RETRIES = 5  # Attempts before answering 409
+OCC_RETRY_BACKOFF_SECONDS = 0.01  # Base backoff, doubled per attempt (with jitter)
+
+# Invitation maintenance
+INVITATION_SWEEP_INTERVAL_MINUTES = 60  # How often expired/used invitations are purged
+INVITATION_PURGE_GRACE_HOURS = 24  # Keep expired/used invitations this long (clear error messages)
+INVITATION_PURGE_BATCH_SIZE = 1000  # Rows deleted per statement
+
+# Invite codes
+INVITE_CODE_BLOCK_SIZE = 1000  # Sequence numbers reserved per database round trip
+
+# Public group preview cache (/group/code/<code>)
+GROUP_PREVIEW_CACHE_TTL_SECONDS = 300  # Valid public groups
+GROUP_PREVIEW_NEGATIVE_TTL_SECONDS = 60  # Invalid codes and private groups
+GROUP_PREVIEW_CACHE_MAX_ENTRIES = 10000  # In-process cache size when Redis is unavailable
+
+# Bulk membership operations
+BULK_MEMBERSHIP_MAX_ITEMS = 500  # Max user ids / emails per bulk request
+
+# Cross-group balance summary (/user/me/balances)
+BALANCE_SUMMARY_CACHE_TTL_SECONDS = 600  # Entries are keyed by group versions, so TTL only bounds memory
+
+# Group analytics (/group/<id>/stats)
+GROUP_STATS_CACHE_TTL_SECONDS = 3600  # Keyed by group version, so TTL only bounds memory
+GROUP_STATS_TOP_PAYERS = 5
+
+# Group exports (/group/<id>/export)
+EXPORT_BATCH_SIZE = 2000  # Rows fetched per server-side cursor round trip
+EXPORT_CHUNK_BYTES = 64 * 1024  # Serialized bytes buffered before a chunk is sent
+EXPORT_PARQUET_ROW_GROUP_SIZE = 50000  # Rows per Parquet row group (bounds memory for Parquet)
+EXPORT_JOB_TIMEOUT_SECONDS = 3600  # Background export jobs (?mode=job)
+EXPORT_RESULT_TTL_SECONDS = 24 * 3600  # How long a finished export job (and its file) stays available
+
+# Group archiving (cold storage for old expenses)
+ARCHIVE_MIN_AGE_DAYS = 365  # Only expenses older than this can be archived
+ARCHIVE_BATCH_SIZE = 5000  # Expenses per archive row (one transaction each)
+
+# Balance checkpoints (incremental balance computation)
+BALANCE_CHECKPOINT_INTERVAL_MINUTES = 30  # How often groups are scanned for new checkpoints
+BALANCE_CHECKPOINT_MIN_ROWS = 5000  # Splits + settlements since the last checkpoint before taking a new one
+BALANCE_CHECKPOINT_BATCH_GROUPS = 200  # Max groups checkpointed per run
+BALANCE_CHECKPOINTS_KEPT = 2  # Older checkpoints of a group are deleted
+
+# Compact equal splits (flask groups compact-splits)
+COMPACT_SPLITS_BATCH_SIZE = 1000  # Legacy equal-split expenses converted per transaction
+
+# Balance engine (utils/balance_engine.py)
+BALANCE_ENGINE_BATCH_ROWS = 100000  # Ledger rows folded per batch (bounds memory for huge groups)
+
+# App startup (app.py)
+REDIS_CONNECT_TIMEOUT_SECONDS = 0.5  # Redis connect timeout; an unreachable Redis must not stall startup
+
+# Metrics (/metrics, utils/metrics.py)
+METRICS_HTTP_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)  # Request latency buckets (seconds)
+METRICS_DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1)  # SQL statement latency buckets
+METRICS_EMAIL_BUCKETS = (0.25, 0.5, 1, 2.5, 5, 10, 30)  # Email send latency buckets (SMTP timeout is 30s)
+
+# Tracing (utils/tracing.py, enabled with TRACING=console|file|otlp)
+TRACING_DEFAULT_SAMPLE_RATIO = 0.1  # Fraction of new traces recorded unless TRACING_SAMPLE_RATIO is set
+TRACING_DEFAULT_FILE = "/tmp/splitfree-traces.jsonl"  # Span output for TRACING=file unless TRACING_FILE is set
+TRACING_STATEMENT_MAX_LENGTH = 1000  # SQL text kept on db spans
+
+# Health probes (/health, /health/live, /health/ready)
+HEALTH_PROBE_INTERVAL_SECONDS = 2  # How often the background refresher probes the database, Redis and workers
+HEALTH_PROBE_STALE_SECONDS = 10  # /health/ready fails if the last probe is older than this (refresher stuck)
+HEALTH_WORKER_HEARTBEAT_MAX_AGE_SECONDS = 420  # RQ's default worker TTL; older heartbeats mean a dead worker
+HEALTH_REQUIRE_WORKER = False  # Whether readiness also needs a live RQ worker
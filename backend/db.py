@@ -1,3 +1,10 @@
+import os
+
 from flask_sqlalchemy import SQLAlchemy
 
-db = SQLAlchemy()
\ No newline at end of file
+db = SQLAlchemy()
+
+# Loader strategy of relationships that endpoints load explicitly (selectinload/joinedload
+# options). SQLALCHEMY_LAZY_RAISE=1 makes any load they forgot raise instead of quietly
+# running one more query (python -m benchmarks.query_budgets --lazy-raise).
+LAZY = "raise_on_sql" if os.getenv("SQLALCHEMY_LAZY_RAISE") else "select"
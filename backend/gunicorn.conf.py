@@ -0,0 +1,41 @@
+"""
+Gunicorn settings, loaded automatically from the working directory
+(`gunicorn "app:create_app()"`, see Dockerfile).
+
+Live updates (/group/<id>/events) hold a request open for minutes (SSE) or up to
+LIVE_EVENTS_LONG_POLL_TIMEOUT seconds (long-poll), so workers are threaded: each open
+stream occupies one thread, not a whole worker process.
+
+Every worker writes its /metrics samples to PROMETHEUS_MULTIPROC_DIR so that a scrape
+answered by any one worker covers all of them (see utils/metrics.py).
+"""
+
+import multiprocessing
+import os
+import shutil
+
+worker_class = "gthread"
+workers = int(os.getenv("GUNICORN_WORKERS", multiprocessing.cpu_count() * 2 + 1))
+# Concurrent requests (including open event streams) per worker. Streams release
+# their DB connection, so this can exceed the SQLAlchemy pool size
+threads = int(os.getenv("GUNICORN_THREADS", 32))
+# gthread workers heartbeat independently of long-running requests; this only
+# bounds requests that never return
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 60))
+
+# Must be set before a worker imports prometheus_client
+os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", "/tmp/splitfree-metrics")
+
+
+def on_starting(server):
+    # Samples of a previous run would otherwise be added to this one
+    directory = os.environ["PROMETHEUS_MULTIPROC_DIR"]
+    shutil.rmtree(directory, ignore_errors=True)
+    os.makedirs(directory, exist_ok=True)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+
+    # Drop the exited worker's live gauges (pool connections)
+    multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,126 @@
+"""optionally hash-partition expenses and expense_splits by group_id (PostgreSQL)
+
+Opt-in: nothing happens unless the database is PostgreSQL and a partition count is
+passed as an x-argument, e.g.
+
+    flask db -x partitions=16 upgrade
+
+SQLite (development) and PostgreSQL without the argument keep plain tables. Both
+tables are rebuilt as PARTITION BY HASH (group_id) with the same number of
+partitions, so a group's expenses and splits live in matching partitions and group
+scoped queries touch one partition. PostgreSQL requires the partition key in every
+unique constraint, so primary keys become (id, group_id) and splits (and
+expense_participants, when present) reference expenses by (expense_id, group_id).
+Ids still come from the existing sequences.
+
+The rebuild copies both tables inside the migration transaction; run it in a
+maintenance window. Downgrading turns partitioned tables back into plain ones.
+
+Revision ID: 8c4f6a0d2e91
+Revises: 7b3e5f9c1d80
+Create Date: 2026-10-19 21:32:47.905113
+
+"""
+from alembic import context, op
+
+
+# revision identifiers, used by Alembic.
+revision = '8c4f6a0d2e91'
+down_revision = '7b3e5f9c1d80'
+branch_labels = None
+depends_on = None
+
+# Foreign keys and indexes to restore after a rebuild, per table
+CONSTRAINTS = {
+    'expenses': [
+        ('expenses_paid_by_fkey', 'FOREIGN KEY (paid_by) REFERENCES users (id)'),
+        ('expenses_group_id_fkey', 'FOREIGN KEY (group_id) REFERENCES groups (id)'),
+    ],
+    'expense_splits': [
+        ('expense_splits_user_id_fkey', 'FOREIGN KEY (user_id) REFERENCES users (id)'),
+        ('expense_splits_group_id_fkey', 'FOREIGN KEY (group_id) REFERENCES groups (id)'),
+    ],
+}
+INDEXES = {
+    'expenses': [
+        ('ix_expenses_paid_by', 'paid_by'),
+        ('ix_expenses_group_id_date', 'group_id, date'),
+    ],
+    'expense_splits': [
+        ('ix_expense_splits_user_id', 'user_id'),
+        ('ix_expense_splits_expense_id', 'expense_id'),
+        ('ix_expense_splits_group_id_expense_id', 'group_id, expense_id'),
+    ],
+}
+
+
+def _requested_partitions():
+    return int(context.get_x_argument(as_dictionary=True).get('partitions', 0))
+
+
+def _is_partitioned(table):
+    return bool(op.get_bind().exec_driver_sql(
+        "SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid "
+        f"WHERE c.relname = '{table}' AND pg_table_is_visible(c.oid)"
+    ).scalar())
+
+
+def _table_exists(table):
+    return bool(op.get_bind().exec_driver_sql(f"SELECT to_regclass('{table}')").scalar())
+
+
+def _rebuild(table, partitions):
+    """Recreate `table` with the same rows, hash-partitioned by group_id if `partitions` > 0."""
+    old = f'{table}_unpartitioned' if partitions else f'{table}_partitioned'
+    op.execute(f'ALTER TABLE {table} RENAME TO {old}')
+    op.execute(f'CREATE TABLE {table} (LIKE {old} INCLUDING DEFAULTS)'
+               + (' PARTITION BY HASH (group_id)' if partitions else ''))
+    for remainder in range(partitions):
+        op.execute(f'CREATE TABLE {table}_p{remainder} PARTITION OF {table} '
+                   f'FOR VALUES WITH (MODULUS {partitions}, REMAINDER {remainder})')
+    op.execute(f'INSERT INTO {table} SELECT * FROM {old}')
+
+    # Keep the id sequence alive when the old table goes away
+    op.execute(f'ALTER SEQUENCE {table}_id_seq OWNED BY {table}.id')
+    op.execute(f'DROP TABLE {old} CASCADE')
+
+    primary_key = 'id, group_id' if partitions else 'id'
+    op.execute(f'ALTER TABLE {table} ADD CONSTRAINT {table}_pkey PRIMARY KEY ({primary_key})')
+    for name, definition in CONSTRAINTS[table]:
+        op.execute(f'ALTER TABLE {table} ADD CONSTRAINT {name} {definition}')
+    expense_key = 'expense_id, group_id) REFERENCES expenses (id, group_id)' if partitions \
+        else 'expense_id) REFERENCES expenses (id)'
+    if table == 'expense_splits':
+        op.execute(f'ALTER TABLE expense_splits ADD CONSTRAINT expense_splits_expense_id_fkey '
+                   f'FOREIGN KEY ({expense_key}')
+    if table == 'expenses' and not context.is_offline_mode() and _table_exists('expense_participants'):
+        # Dropped by the CASCADE above; expense_participants (b2f7d9a4c613) carries group_id
+        op.execute(f'ALTER TABLE expense_participants ADD CONSTRAINT expense_participants_expense_id_fkey '
+                   f'FOREIGN KEY ({expense_key} ON DELETE CASCADE')
+    for name, columns in INDEXES[table]:
+        op.execute(f'CREATE INDEX {name} ON {table} ({columns})')
+    op.execute(f'ANALYZE {table}')
+
+
+def upgrade():
+    partitions = _requested_partitions()
+    if op.get_context().dialect.name != 'postgresql' or partitions < 2:
+        return
+
+    # expenses first: dropping the old table cascades to the splits foreign key,
+    # which the splits rebuild then points at the new table
+    _rebuild('expenses', partitions)
+    _rebuild('expense_splits', partitions)
+
+
+def downgrade():
+    if op.get_context().dialect.name != 'postgresql':
+        return
+    if context.is_offline_mode():
+        if not _requested_partitions():
+            return
+    elif not _is_partitioned('expenses'):
+        return
+
+    _rebuild('expenses', 0)
+    _rebuild('expense_splits', 0)
@@ -3,5 +3,12 @@ from models.user import UserModel
 from models.group_user import GroupUserModel
 from models.expense import ExpenseModel
 from models.expense_split import ExpenseSplitModel
+from models.expense_participant import ExpenseParticipantModel
 from models.settlement import SettlementModel
-from models.group_invitation import GroupInvitationModel
\ No newline at end of file
+from models.group_invitation import GroupInvitationModel
+from models.notification_event import NotificationEventModel
+from models.notification_delivery import NotificationDeliveryModel
+from models.group_change import GroupChangeModel
+from models.invite_code_counter import InviteCodeCounterModel
+from models.group_archive import GroupArchiveModel
+from models.balance_checkpoint import BalanceCheckpointModel
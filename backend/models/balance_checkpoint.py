@@ -0,0 +1,23 @@
+from db import db
+from datetime import datetime
+
+
+class BalanceCheckpointModel(db.Model):
+    """Net balances of a group's ledger up to (and including) the given expense/settlement ids."""
+    __tablename__ = "balance_checkpoints"
+
+    id = db.Column(db.Integer, primary_key=True)
+    group_id = db.Column(db.Integer, db.ForeignKey("groups.id"), nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    max_expense_id = db.Column(db.Integer, nullable=False)
+    max_settlement_id = db.Column(db.Integer, nullable=False)
+    balances = db.Column(db.Text, nullable=False)  # JSON {"user_id": amount}
+
+    group = db.relationship("GroupModel", backref=db.backref("balance_checkpoints", cascade="all, delete",
+                                                             lazy="dynamic"))
+
+    __table_args__ = (db.Index('ix_balance_checkpoints_group_id_id', 'group_id', 'id'),)
+
+    def __repr__(self):
+        return f'<BalanceCheckpoint {self.id} -> Group {self.group_id} (<= e{self.max_expense_id}/s{self.max_settlement_id})>'
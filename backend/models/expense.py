@@ -1,4 +1,9 @@
-from db import db
+from collections import namedtuple
+
+from db import db, LAZY
+
+# A split of a compact equal-split expense; it has no expense_splits row (id is None)
+VirtualSplit = namedtuple("VirtualSplit", ["id", "position", "user_id", "amount"])
 
 class ExpenseModel(db.Model):
     __tablename__ = "expenses"
@@ -8,15 +13,37 @@ class ExpenseModel(db.Model):
     amount = db.Column(db.Numeric(10, 2), nullable=False)
     split_type = db.Column(db.String(20), nullable=False, default="equal")
 
-    paid_by = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
+    paid_by = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False, index=True)
     group_id = db.Column(db.Integer, db.ForeignKey("groups.id"), nullable=False)
     date = db.Column(db.Date, nullable=True)
 
-    groups = db.relationship("GroupModel", back_populates="expenses")
-    payer = db.relationship("UserModel", back_populates="expenses_paid")
+    # Equal splits are stored compactly instead of one expense_splits row per participant:
+    # the sorted participant ids ("3,7,12"), their count and the per-head share (see utils/splits.py)
+    participants = db.Column(db.Text, nullable=True)
+    participant_count = db.Column(db.Integer, nullable=True)
+    share_amount = db.Column(db.Numeric(10, 2), nullable=True)
+
+    groups = db.relationship("GroupModel", back_populates="expenses", lazy=LAZY)
+    payer = db.relationship("UserModel", back_populates="expenses_paid", lazy=LAZY)
     splits = db.relationship(
         "ExpenseSplitModel",
         back_populates="expenses",
         cascade="all, delete, delete-orphan",
-        order_by="ExpenseSplitModel.id"
-    )
\ No newline at end of file
+        order_by="ExpenseSplitModel.id",
+        lazy=LAZY
+    )
+
+    # Stats and history filter a group's expenses by date
+    __table_args__ = (db.Index('ix_expenses_group_id_date', 'group_id', 'date'),)
+
+    @property
+    def participant_ids(self):
+        return [int(uid) for uid in self.participants.split(",")] if self.participants else []
+
+    @property
+    def split_items(self):
+        """The expense's splits: stored rows, or virtual ones for a compact equal split."""
+        if self.participants is None:
+            return self.splits
+        return [VirtualSplit(None, position, user_id, self.share_amount)
+                for position, user_id in enumerate(self.participant_ids, start=1)]
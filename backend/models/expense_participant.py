@@ -0,0 +1,17 @@
+from db import db
+
+
+class ExpenseParticipantModel(db.Model):
+    """
+    One participant of a compact equal-split expense. The amounts live on the expense;
+    these rows only make "which expenses does this user take part in" an index lookup.
+    """
+    __tablename__ = "expense_participants"
+
+    expense_id = db.Column(db.Integer, db.ForeignKey("expenses.id", ondelete="CASCADE"), primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), primary_key=True, index=True)
+    # The expense's group; on partitioned databases the expense is referenced by (expense_id, group_id)
+    group_id = db.Column(db.Integer, db.ForeignKey("groups.id"), nullable=False)
+
+    def __repr__(self):
+        return f'<ExpenseParticipant {self.expense_id} -> User {self.user_id}>'
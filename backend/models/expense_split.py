@@ -1,4 +1,4 @@
-from db import db
+from db import db, LAZY
 
 class ExpenseSplitModel(db.Model):
     __tablename__ = "expense_splits"
@@ -6,8 +6,12 @@ class ExpenseSplitModel(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     amount = db.Column(db.Numeric(10, 2), nullable=False)
 
-    expense_id = db.Column(db.Integer, db.ForeignKey("expenses.id"), nullable=False)
-    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
+    expense_id = db.Column(db.Integer, db.ForeignKey("expenses.id"), nullable=False, index=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False, index=True)
+    # Denormalized from expenses.group_id so split queries can filter by group without a join
+    group_id = db.Column(db.Integer, db.ForeignKey("groups.id"), nullable=False)
 
-    expenses = db.relationship("ExpenseModel", back_populates="splits")
-    users = db.relationship("UserModel", back_populates="splits")
\ No newline at end of file
+    expenses = db.relationship("ExpenseModel", back_populates="splits", lazy=LAZY)
+    users = db.relationship("UserModel", back_populates="splits", lazy=LAZY)
+
+    __table_args__ = (db.Index('ix_expense_splits_group_id_expense_id', 'group_id', 'expense_id'),)
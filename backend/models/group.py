@@ -1,6 +1,5 @@
-from db import db
-import random
-import string
+from db import db, LAZY
+from utils.invite_codes import allocate_invite_code
 
 class GroupModel(db.Model):
     __tablename__ = "groups"
@@ -10,8 +9,17 @@ class GroupModel(db.Model):
     description = db.Column(db.String(80), nullable=False)
     invite_code = db.Column(db.String(20), unique=True, nullable=False)
     is_public = db.Column(db.Boolean, default=True, nullable=False)
+    # Maintained by membership writes (see bump_membership_version), read instead of COUNT(*)
+    member_count = db.Column(db.Integer, default=0, nullable=False)
+    admin_count = db.Column(db.Integer, default=0, nullable=False)
+    # Advanced by every membership or ledger write; cache keys and change detection use it
+    version = db.Column(db.Integer, default=1, nullable=False)
+    # Advanced only by membership/admin writes; ledger writes check it (see utils/concurrency.py)
+    membership_version = db.Column(db.Integer, default=1, nullable=False)
+    # Versions at or below this were compacted out of the change log
+    change_log_floor = db.Column(db.Integer, default=0, nullable=False)
 
-    users = db.relationship("UserModel", back_populates="groups", secondary="group_user")
+    users = db.relationship("UserModel", back_populates="groups", secondary="group_user", lazy=LAZY)
     expenses = db.relationship(
         "ExpenseModel", 
         back_populates="groups",
@@ -30,18 +38,13 @@ class GroupModel(db.Model):
     
     @classmethod
     def generate_invite_code(cls):
-        """Generate a random invite code like SPLIT-ABC123"""
-        letters = ''.join(random.choices(string.ascii_uppercase, k=3))
-        numbers = ''.join(random.choices(string.digits, k=3))
-        return f"SPLIT-{letters}{numbers}"
+        """Generate an invite code like SPLIT-7K2M9QXD"""
+        return allocate_invite_code()
     
     @classmethod
     def generate_unique_invite_code(cls):
-        """Generate a unique invite code that doesn't exist in database"""
-        while True:
-            code = cls.generate_invite_code()
-            if not cls.query.filter_by(invite_code=code).first():
-                return code
+        """Generate an invite code that is unique by construction (no database lookup)"""
+        return allocate_invite_code()
     
     def regenerate_invite_code(self):
         """Generate a new invite code for this group"""
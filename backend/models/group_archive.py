@@ -0,0 +1,28 @@
+from db import db
+from datetime import datetime
+
+
+class GroupArchiveModel(db.Model):
+    """A batch of a group's old expenses moved out of the hot tables."""
+    __tablename__ = "group_archives"
+
+    id = db.Column(db.Integer, primary_key=True)
+    group_id = db.Column(db.Integer, db.ForeignKey("groups.id"), nullable=False, index=True)
+    archived_by = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    first_date = db.Column(db.Date, nullable=True)
+    last_date = db.Column(db.Date, nullable=True)
+    max_expense_id = db.Column(db.Integer, nullable=False)
+    expense_count = db.Column(db.Integer, nullable=False)
+    split_count = db.Column(db.Integer, nullable=False)
+
+    # Closing balance contribution of the archived expenses: JSON [[debtor, creditor, "amount"], ...]
+    edges = db.Column(db.Text, nullable=False)
+    # zlib-compressed JSON list of the archived expenses with their splits
+    payload = db.Column(db.LargeBinary, nullable=False)
+
+    group = db.relationship("GroupModel", backref=db.backref("archives", cascade="all, delete", lazy="dynamic"))
+
+    def __repr__(self):
+        return f'<GroupArchive {self.id} -> Group {self.group_id} ({self.expense_count} expenses)>'
@@ -0,0 +1,24 @@
+from db import db
+from datetime import datetime
+
+
+class GroupChangeModel(db.Model):
+    """
+    Append-only change log used for delta sync. The row id doubles as the
+    ledger version: clients remember the highest id they have applied.
+    """
+    __tablename__ = "group_changes"
+
+    id = db.Column(db.Integer, primary_key=True)
+    group_id = db.Column(db.Integer, db.ForeignKey("groups.id"), nullable=False)
+    entity = db.Column(db.String(20), nullable=False)  # "expense" | "settlement" | "membership"
+    entity_id = db.Column(db.Integer, nullable=False)
+    op = db.Column(db.String(10), nullable=False)  # "upsert" | "delete"
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+
+    group = db.relationship("GroupModel", backref=db.backref("changes", cascade="all, delete", lazy="dynamic"))
+
+    __table_args__ = (db.Index('ix_group_changes_group_id_id', 'group_id', 'id'),)
+
+    def __repr__(self):
+        return f'<GroupChange {self.id} {self.op} {self.entity}:{self.entity_id} -> Group {self.group_id}>'
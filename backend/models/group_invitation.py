@@ -1,4 +1,4 @@
-from db import db
+from db import db, LAZY
 from datetime import datetime, timedelta
 import uuid
 from config import INVITATION_EXPIRY_DAYS, INVITATION_EXPIRY_HOURS, INVITATION_EXPIRY_MINUTES
@@ -17,8 +17,24 @@ class GroupInvitationModel(db.Model):
     invited_by_user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
     
     # Relationships
-    group = db.relationship("GroupModel", backref="invitations")
-    invited_by = db.relationship("UserModel", foreign_keys=[invited_by_user_id])
+    group = db.relationship("GroupModel", backref="invitations", lazy=LAZY)
+    invited_by = db.relationship("UserModel", foreign_keys=[invited_by_user_id], lazy=LAZY)
+
+    __table_args__ = (
+        # Only pending invitations are looked up by group/email, so index just those rows
+        db.Index(
+            'ix_group_invitations_pending', 'group_id', 'email', 'expires_at',
+            postgresql_where=db.text('used_at IS NULL'),
+            sqlite_where=db.text('used_at IS NULL')
+        ),
+        # Range scans for the expiry sweeper
+        db.Index('ix_group_invitations_expires_at', 'expires_at'),
+        db.Index(
+            'ix_group_invitations_used_at', 'used_at',
+            postgresql_where=db.text('used_at IS NOT NULL'),
+            sqlite_where=db.text('used_at IS NOT NULL')
+        ),
+    )
     
     def __init__(self, group_id, email, invited_by_user_id, **kwargs):
         super(GroupInvitationModel, self).__init__(**kwargs)
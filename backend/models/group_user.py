@@ -7,7 +7,11 @@ class GroupUserModel(db.Model):
     group_id = db.Column(db.Integer, db.ForeignKey("groups.id"), unique=False, nullable=False)
     user_id = db.Column(db.Integer, db.ForeignKey("users.id"), unique=False, nullable=False)
     is_admin = db.Column(db.Boolean, default=False, nullable=False) 
+    version = db.Column(db.Integer, nullable=False)
     
     # Ensure unique group-user combinations
     __table_args__ = (db.UniqueConstraint('group_id', 'user_id', name='unique_group_user'),)
+
+    # Updates/deletes check the row version, so concurrent edits of one membership conflict
+    __mapper_args__ = {"version_id_col": version}
     
@@ -0,0 +1,9 @@
+from db import db
+
+
+class InviteCodeCounterModel(db.Model):
+    """Next unreserved invite code sequence number; see utils/invite_codes.py."""
+    __tablename__ = "invite_code_counters"
+
+    name = db.Column(db.String(40), primary_key=True)
+    next_value = db.Column(db.BigInteger, nullable=False, default=1)
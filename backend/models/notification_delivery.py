@@ -0,0 +1,14 @@
+from db import db
+from datetime import datetime
+
+
+class NotificationDeliveryModel(db.Model):
+    """A pending notification event already emailed to one recipient (removed once the event is processed)."""
+    __tablename__ = "notification_deliveries"
+
+    event_id = db.Column(db.Integer, db.ForeignKey("notification_events.id", ondelete="CASCADE"), primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    delivered_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f'<NotificationDelivery {self.event_id} -> User {self.user_id}>'
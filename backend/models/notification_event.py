@@ -0,0 +1,23 @@
+from db import db
+from datetime import datetime
+
+
+class NotificationEventModel(db.Model):
+    __tablename__ = "notification_events"
+
+    id = db.Column(db.Integer, primary_key=True)
+    group_id = db.Column(db.Integer, db.ForeignKey("groups.id"), nullable=False)
+    actor_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
+    event_type = db.Column(db.String(20), nullable=False)  # "expense" | "settlement"
+    object_id = db.Column(db.Integer, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    processed_at = db.Column(db.DateTime, nullable=True, index=True)
+    # Failed digest runs; the event is skipped until next_attempt_at (see tasks.py)
+    attempts = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    next_attempt_at = db.Column(db.DateTime, nullable=True)
+
+    group = db.relationship("GroupModel", backref=db.backref("notification_events", cascade="all, delete"))
+    deliveries = db.relationship("NotificationDeliveryModel", cascade="all, delete", passive_deletes=True)
+
+    def __repr__(self):
+        return f'<NotificationEvent {self.event_type}:{self.object_id} -> Group {self.group_id}>'
@@ -1,4 +1,4 @@
-from db import db
+from db import db, LAZY
 
 class SettlementModel(db.Model):
     __tablename__ = "settlements"
@@ -6,11 +6,11 @@ class SettlementModel(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     amount = db.Column(db.Numeric(10, 2), nullable=False)
 
-    paid_by = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
-    paid_to = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
+    paid_by = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False, index=True)
+    paid_to = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False, index=True)
     group_id = db.Column(db.Integer, db.ForeignKey("groups.id"), nullable=False)
 
     # Relationships
-    payer = db.relationship("UserModel", foreign_keys=[paid_by])
-    receiver = db.relationship("UserModel", foreign_keys=[paid_to])
-    group = db.relationship("GroupModel", back_populates="settlements")
+    payer = db.relationship("UserModel", foreign_keys=[paid_by], lazy=LAZY)
+    receiver = db.relationship("UserModel", foreign_keys=[paid_to], lazy=LAZY)
+    group = db.relationship("GroupModel", back_populates="settlements", lazy=LAZY)
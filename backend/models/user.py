@@ -1,4 +1,4 @@
-from db import db
+from db import db, LAZY
 
 
 class UserModel(db.Model):
@@ -10,10 +10,11 @@ class UserModel(db.Model):
     password = db.Column(db.String(256), nullable=False)
 
     #relationship with groups
-    groups = db.relationship("GroupModel", back_populates="users", secondary="group_user")
+    groups = db.relationship("GroupModel", back_populates="users", secondary="group_user", lazy=LAZY)
 
     #relationship with expense
     expenses_paid = db.relationship("ExpenseModel", back_populates="payer", lazy="dynamic")
 
     #relationship with splits
-    splits = db.relationship("ExpenseSplitModel", back_populates="users", cascade="all, delete, delete-orphan")
\ No newline at end of file
+    splits = db.relationship("ExpenseSplitModel", back_populates="users", cascade="all, delete, delete-orphan",
+                             lazy=LAZY)
\ No newline at end of file
@@ -0,0 +1,59 @@
+from datetime import date, timedelta
+
+from flask_smorest import Blueprint, abort
+from flask.views import MethodView
+from flask_jwt_extended import jwt_required, get_jwt_identity
+
+from models import GroupModel, GroupArchiveModel
+from schemas import GroupArchiveCreateSchema, GroupArchiveSchema
+from utils.permissions import check_group_membership, check_group_admin
+from utils.archive import archive_group_expenses
+from utils.live_events import publish_group_event
+from utils.concurrency import optimistic_retry
+from config import ARCHIVE_MIN_AGE_DAYS
+
+blp = Blueprint("Archive", __name__, description="Cold storage for old group expenses")
+
+
+@blp.route("/group/<int:group_id>/archives")
+class GroupArchives(MethodView):
+
+    @jwt_required()
+    @blp.response(200, GroupArchiveSchema(many=True))
+    def get(self, group_id):
+        """List archived expense batches of a group - only if user is a member."""
+        # Get the current logged-in user ID
+        current_user_id = int(get_jwt_identity())
+        check_group_membership(group_id, current_user_id)
+
+        return GroupArchiveModel.query.filter_by(group_id=group_id).order_by(GroupArchiveModel.id).all()
+
+    @jwt_required()
+    @blp.arguments(GroupArchiveCreateSchema)
+    @blp.response(201, GroupArchiveSchema(many=True))
+    @optimistic_retry
+    def post(self, archive_data, group_id):
+        """Move expenses dated before `before` into cold storage. Only group admins can archive.
+
+        Balances are unchanged; archived expenses can no longer be edited and are shown by
+        /history only with ?include_archived=true.
+        """
+        # Get the current logged-in user ID
+        current_user_id = int(get_jwt_identity())
+
+        # Check if the current user is an admin of this group
+        check_group_admin(group_id, current_user_id)
+        GroupModel.query.get_or_404(group_id)
+
+        latest = date.today() - timedelta(days=ARCHIVE_MIN_AGE_DAYS)
+        before = archive_data["before"] or latest
+        if before > latest:
+            abort(400, message=f"Only expenses older than {ARCHIVE_MIN_AGE_DAYS} days can be archived")
+
+        archives = archive_group_expenses(group_id, before, archived_by=current_user_id)
+        if archives:
+            publish_group_event(group_id, "expenses_archived", {
+                "before": before.isoformat(),
+                "expense_count": sum(a.expense_count for a in archives)
+            })
+        return archives, 201
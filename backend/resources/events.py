@@ -0,0 +1,147 @@
+import json
+import math
+import time
+from flask import current_app, request, Response, stream_with_context
+from flask_smorest import Blueprint, abort
+from flask.views import MethodView
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from itsdangerous import URLSafeTimedSerializer, BadSignature, SignatureExpired
+
+from db import db
+from utils.permissions import check_group_membership
+from config import (LIVE_EVENTS_HEARTBEAT_SECONDS, LIVE_EVENTS_STREAM_MAX_SECONDS,
+                    LIVE_EVENTS_LONG_POLL_TIMEOUT, LIVE_EVENTS_TICKET_SECONDS)
+
+blp = Blueprint("Events", __name__, description="Live group updates")
+
+
+def _last_event_id():
+    """Resume point from the SSE Last-Event-ID header or the `since` query parameter."""
+    raw = request.headers.get("Last-Event-ID") or request.args.get("since")
+    if raw is None:
+        return None
+    try:
+        return int(raw)
+    except ValueError:
+        abort(400, message="Invalid event id")
+
+
+def _ticket_serializer():
+    # Own salt: a ticket is not an access token and can't be used as one
+    return URLSafeTimedSerializer(current_app.config["JWT_SECRET_KEY"], salt="group-events-ticket")
+
+
+def _ticket_user_id(group_id):
+    """User id of a valid ?ticket= for this group, or abort 401."""
+    ticket = request.args.get("ticket")
+    if not ticket:
+        abort(401, message="Request does not contain an access token or events ticket.")
+    try:
+        claims = _ticket_serializer().loads(ticket, max_age=LIVE_EVENTS_TICKET_SECONDS)
+    except SignatureExpired:
+        abort(401, message="The events ticket has expired.")
+    except BadSignature:
+        abort(401, message="Invalid events ticket.")
+    if claims.get("group_id") != group_id:
+        abort(401, message="Invalid events ticket.")
+    return claims["user_id"]
+
+
+def _format_sse(event):
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(event, default=str)}\n\n"
+
+
+@blp.route("/group/<int:group_id>/events/ticket")
+class GroupEventsTicket(MethodView):
+
+    @jwt_required()
+    def post(self, group_id):
+        """Issue a short-lived ticket for connecting to the group's event stream - only if user is a member.
+
+        EventSource cannot send headers, so it connects with ?ticket=<ticket> instead of
+        an access token in the URL. Fetch a new ticket before every (re)connect.
+        """
+        current_user_id = int(get_jwt_identity())
+        check_group_membership(group_id, current_user_id)
+
+        ticket = _ticket_serializer().dumps({"user_id": current_user_id, "group_id": group_id})
+        return {"ticket": ticket, "expires_in": LIVE_EVENTS_TICKET_SECONDS}, 201
+
+
+@blp.route("/group/<int:group_id>/events")
+class GroupEvents(MethodView):
+
+    @jwt_required(optional=True)
+    def get(self, group_id):
+        """Stream live group updates as server-sent events - only if user is a member.
+
+        Pass ?mode=poll for the long-poll fallback, which waits for the next events after
+        ?since=<id> and returns them as JSON. Authenticate with the Authorization header
+        or, from EventSource, with ?ticket=<ticket> (POST /group/<id>/events/ticket).
+        """
+        identity = get_jwt_identity()
+        current_user_id = int(identity) if identity is not None else _ticket_user_id(group_id)
+        check_group_membership(group_id, current_user_id)
+
+        # Don't pin a pooled DB connection for the lifetime of the stream
+        db.session.close()
+
+        broker = current_app.event_broker
+        since = _last_event_id()
+
+        if request.args.get("mode") == "poll":
+            return self._long_poll(broker, group_id, since or 0)
+
+        subscription = broker.subscribe(group_id)
+
+        def stream():
+            try:
+                yield "retry: 3000\n\n"
+
+                # Subscribed first, so nothing published during the replay is lost
+                seen = since or 0
+                if since is not None:
+                    for event in broker.recent(group_id, since):
+                        seen = event["id"]
+                        yield _format_sse(event)
+
+                deadline = time.monotonic() + LIVE_EVENTS_STREAM_MAX_SECONDS
+                while time.monotonic() < deadline:
+                    event = subscription.get(timeout=LIVE_EVENTS_HEARTBEAT_SECONDS)
+                    if event is None:
+                        yield ": keep-alive\n\n"
+                    elif event["id"] > seen:
+                        seen = event["id"]
+                        yield _format_sse(event)
+            finally:
+                subscription.close()
+
+        return Response(
+            stream_with_context(stream()),
+            mimetype="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
+
+    @staticmethod
+    def _long_poll(broker, group_id, since):
+        try:
+            timeout = float(request.args.get("timeout", LIVE_EVENTS_LONG_POLL_TIMEOUT))
+        except ValueError:
+            abort(400, message="Invalid timeout")
+        if not math.isfinite(timeout):
+            abort(400, message="Invalid timeout")
+        timeout = min(timeout, LIVE_EVENTS_LONG_POLL_TIMEOUT)
+
+        subscription = broker.subscribe(group_id)
+        try:
+            events = broker.recent(group_id, since)
+            if not events:
+                event = subscription.get(timeout=max(timeout, 0))
+                if event is not None:
+                    # Pick up anything else published in the same burst
+                    events = broker.recent(group_id, since) or [event]
+        finally:
+            subscription.close()
+
+        last_id = events[-1]["id"] if events else since
+        return {"group_id": group_id, "last_event_id": last_id, "events": events}, 200
@@ -3,11 +3,17 @@ from flask_smorest import Blueprint, abort
 from flask.views import MethodView
 from flask_jwt_extended import jwt_required, get_jwt, get_jwt_identity
 from sqlalchemy.exc import SQLAlchemyError, IntegrityError
+from sqlalchemy.orm import joinedload, selectinload, raiseload
 
 from schemas import ExpenseSchema, ExpenseCreateSchema
 from db import db
 from models import ExpenseModel, GroupModel, ExpenseSplitModel, SettlementModel, GroupUserModel
 from utils.permissions import check_group_membership, check_expense_permission
+from utils.notifications import record_group_event, EXPENSE_EVENT
+from utils.live_events import publish_group_event, balance_delta
+from utils.change_log import record_change, EXPENSE, DELETE
+from utils.concurrency import optimistic_retry, read_membership_version, bump_ledger_version
+from utils.splits import encode_participants, equal_share, add_participant_rows, delete_participant_rows
 
 blp = Blueprint("Expense", __name__, description="Operations on expenses")
 
@@ -17,6 +23,7 @@ class GroupExpense(MethodView):
     @jwt_required()
     @blp.arguments(ExpenseCreateSchema)
     @blp.response(201, ExpenseSchema)
+    @optimistic_retry
     def post(self, expense_data, group_id):
         """Create a new expense in a group."""
         
@@ -27,14 +34,15 @@ class GroupExpense(MethodView):
         check_group_membership(group_id, current_user_id)
 
         group = GroupModel.query.get_or_404(group_id)
-        users = group.users
+        membership_version = group.membership_version
+        # Member ids only (the split participants), not the user rows
+        member_ids = {row[0] for row in db.session.query(GroupUserModel.user_id).filter_by(group_id=group_id)}
 
-        if not users:
+        if not member_ids:
             abort(400, message="No users in this group to split expense.")
 
         # Validate that paid_by user exists and is in the group
         payer_id = expense_data["paid_by"]
-        member_ids = {u.id for u in users}
         if payer_id not in member_ids:
             abort(400, message="Payer must be a member of the group.")
 
@@ -61,23 +69,20 @@ class GroupExpense(MethodView):
             group_id=group_id,
             split_type=split_type
         )
+        if split_type == "equal":
+            # Equal split among all members, stored compactly on the expense (no split rows)
+            expense.participants = encode_participants(member_ids)
+            expense.participant_count = len(member_ids)
+            expense.share_amount = equal_share(expense.amount, len(member_ids))
 
         try:
             db.session.add(expense)
             db.session.flush()
+            expense_id = expense.id
 
-            # Handle different split types
+            # Handle different split types (equal splits need no split rows)
             if split_type == "equal":
-                # Equal split among all members
-                share = expense.amount / len(users)
-                for user in users:
-                    split = ExpenseSplitModel(
-                        expense_id=expense.id,
-                        user_id=user.id,
-                        amount=share
-                    )
-                    db.session.add(split)
-            
+                add_participant_rows(group_id, {expense_id: member_ids})
             elif split_type == "unequal":
                 # Unequal split with custom amounts
                 if not custom_splits:
@@ -93,6 +98,7 @@ class GroupExpense(MethodView):
                     
                     split = ExpenseSplitModel(
                         expense_id=expense.id,
+                        group_id=group_id,
                         user_id=split_data["user_id"],
                         amount=split_data["amount"]
                     )
@@ -114,6 +120,7 @@ class GroupExpense(MethodView):
                     amount = (split_data["percentage"] / 100) * float(expense.amount)
                     split = ExpenseSplitModel(
                         expense_id=expense.id,
+                        group_id=group_id,
                         user_id=split_data["user_id"],
                         amount=amount
                     )
@@ -122,6 +129,12 @@ class GroupExpense(MethodView):
             else:
                 abort(400, message=f"Invalid split type: {split_type}. Must be 'equal', 'unequal', or 'percentage'")
 
+            # Queue group members' notification in the same transaction
+            record_group_event(group_id, current_user_id, EXPENSE_EVENT, expense.id)
+            record_change(group_id, EXPENSE, expense.id)
+
+            # Fails if membership changed since we picked the split participants
+            bump_ledger_version(group_id, membership_version)
             db.session.commit()
         
         except IntegrityError:
@@ -132,6 +145,16 @@ class GroupExpense(MethodView):
             db.session.rollback()
             abort(500, message=f"An error occurred while creating expense: {str(e)}")
 
+        # Reload the committed expense with its split rows in one query
+        expense = db.session.get(ExpenseModel, expense_id, options=[joinedload(ExpenseModel.splits)],
+                                 populate_existing=True)
+
+        publish_group_event(
+            group_id, "expense_created",
+            ExpenseSchema().dump(expense),
+            balance_delta(expense.paid_by, [(s.user_id, s.amount) for s in expense.split_items])
+        )
+
         return expense
     
     @jwt_required()
@@ -156,28 +179,44 @@ class GroupExpense(MethodView):
         if not group_user:
             abort(403, message="Access denied. You are not a member of this group.")
         
-        group = GroupModel.query.get_or_404(group_id)
-        expenses = ExpenseModel.query.filter_by(group_id=group_id).all()
+        # Split rows of all expenses in one query instead of one per expense; membership implies the group exists
+        expenses = (
+            ExpenseModel.query
+            .options(selectinload(ExpenseModel.splits), raiseload("*"))
+            .filter_by(group_id=group_id)
+            .all()
+        )
         return expenses
     
 @blp.route("/group/<int:group_id>/expense/<int:expense_id>")
 class ExpenseDetail(MethodView):
 
     @jwt_required()
+    @optimistic_retry
     def delete(self, group_id, expense_id):
         """Delete an expense and warn if settlements may be affected - only if user is admin or expense creator."""
         
         current_user_id = int(get_jwt_identity())
+        membership_version = read_membership_version(group_id)
         
-        expense = ExpenseModel.query.filter_by(id=expense_id, group_id=group_id).first_or_404()
+        # Split rows are needed for the balance delta and the delete cascade
+        expense = (ExpenseModel.query.options(selectinload(ExpenseModel.splits))
+                   .filter_by(id=expense_id, group_id=group_id).first_or_404())
         
         # Check if user can delete this expense (admin or expense creator)
         check_expense_permission(expense, current_user_id)
         
         settlements_count = SettlementModel.query.filter_by(group_id=group_id).count()
+        delta = balance_delta(expense.paid_by, [(s.user_id, s.amount) for s in expense.split_items], sign=-1)
         
+        if expense.participants is not None:
+            delete_participant_rows([expense_id])
         db.session.delete(expense)
+        record_change(group_id, EXPENSE, expense_id, DELETE)
+        bump_ledger_version(group_id, membership_version)
         db.session.commit()
+
+        publish_group_event(group_id, "expense_deleted", {"id": expense_id}, delta)
         
         message = "Expense deleted successfully"
         if settlements_count > 0:
@@ -195,4 +234,5 @@ class ExpenseDetail(MethodView):
         # Check if the user is a member of this group
         check_group_membership(group_id, current_user_id)
         
-        return ExpenseModel.query.filter_by(id=expense_id, group_id=group_id).first_or_404()
\ No newline at end of file
+        return (ExpenseModel.query.options(joinedload(ExpenseModel.splits))
+                .filter_by(id=expense_id, group_id=group_id).first_or_404())
\ No newline at end of file
@@ -0,0 +1,118 @@
+import os
+
+from flask import current_app, Response, stream_with_context, send_file, url_for
+from flask_smorest import Blueprint, abort
+from flask.views import MethodView
+from flask_jwt_extended import jwt_required, get_jwt_identity
+
+from models import GroupModel
+from schemas import GroupExportQuerySchema
+from utils.permissions import check_group_membership
+from utils.export import EXPORT_FORMATS, export_chunks, export_filename, parquet_available
+from utils.archive import archived_through
+from config import EXPORT_JOB_TIMEOUT_SECONDS, EXPORT_RESULT_TTL_SECONDS
+
+blp = Blueprint("Export", __name__, description="Full group data exports")
+
+
+@blp.route("/group/<int:group_id>/export")
+class GroupExport(MethodView):
+
+    @jwt_required()
+    @blp.arguments(GroupExportQuerySchema, location="query")
+    def get(self, query_args, group_id):
+        """Export every expense split and settlement of a group - only if user is a member.
+
+        `format` is csv (default), jsonl or parquet; `gzip=true` compresses on the fly.
+        The file is streamed as it is read from the database. With `mode=job` the export
+        is written by a background worker instead and a status URL is returned (202).
+        Archived expenses are included unless `include_archived=false`; the
+        X-Archived-Through header carries the date of the newest archived expense.
+        """
+        # Get the current logged-in user ID
+        current_user_id = int(get_jwt_identity())
+        check_group_membership(group_id, current_user_id)
+        GroupModel.query.get_or_404(group_id)
+
+        fmt = query_args["format"]
+        compress = query_args["gzip"]
+        if fmt == "parquet" and not parquet_available():
+            abort(400, message="Parquet export is not available on this server")
+
+        include_archived = query_args["include_archived"]
+        if query_args["mode"] == "job":
+            return self._enqueue(group_id, fmt, compress, include_archived, current_user_id)
+
+        filename = export_filename(group_id, fmt, compress)
+        mimetype = "application/gzip" if compress else EXPORT_FORMATS[fmt][0]
+        headers = {
+            "Content-Disposition": f'attachment; filename="{filename}"',
+            "X-Accel-Buffering": "no"
+        }
+        archived_date = archived_through(group_id)
+        if archived_date:
+            headers["X-Archived-Through"] = archived_date.isoformat()
+        return Response(
+            stream_with_context(export_chunks(group_id, fmt, compress, include_archived)),
+            mimetype=mimetype,
+            headers=headers
+        )
+
+    @staticmethod
+    def _enqueue(group_id, fmt, compress, include_archived, user_id):
+        from tasks import export_group_data
+
+        if not getattr(current_app, "queue", None):
+            abort(503, message="Background exports are not available (no job queue)")
+
+        job = current_app.queue.enqueue(
+            export_group_data, group_id, fmt, compress, include_archived,
+            job_timeout=EXPORT_JOB_TIMEOUT_SECONDS,
+            result_ttl=EXPORT_RESULT_TTL_SECONDS,
+            meta={"group_id": group_id, "requested_by": user_id}
+        )
+        current_app.logger.info(f"Export job queued: {job.id}")
+        return {
+            "job_id": job.id,
+            "status": job.get_status(),
+            "status_url": url_for("Export.GroupExportJob", group_id=group_id, job_id=job.id)
+        }, 202
+
+
+@blp.route("/group/<int:group_id>/export/<string:job_id>")
+class GroupExportJob(MethodView):
+
+    @jwt_required()
+    def get(self, group_id, job_id):
+        """Get the status of a background export, or download it once finished - only if user is a member."""
+        # Get the current logged-in user ID
+        current_user_id = int(get_jwt_identity())
+        check_group_membership(group_id, current_user_id)
+
+        connection = getattr(current_app, "redis_connection", None)
+        if connection is None:
+            abort(503, message="Background exports are not available (no job queue)")
+
+        from rq.job import Job
+        from rq.exceptions import NoSuchJobError
+
+        try:
+            job = Job.fetch(job_id, connection=connection)
+        except NoSuchJobError:
+            abort(404, message="Export not found or expired")
+        if job.meta.get("group_id") != group_id:
+            abort(404, message="Export not found or expired")
+
+        if job.is_failed:
+            return {"job_id": job.id, "status": "failed"}, 500
+
+        result = job.return_value() if job.is_finished else None
+        if not result:
+            return {"job_id": job.id, "status": job.get_status()}, 202
+
+        if not os.path.exists(result["path"]):
+            abort(404, message="Export not found or expired")
+        response = send_file(result["path"], as_attachment=True, download_name=result["filename"])
+        if result.get("archived_through"):
+            response.headers["X-Archived-Through"] = result["archived_through"]
+        return response
@@ -4,15 +4,21 @@ from flask_smorest import Blueprint, abort
 from flask.views import MethodView
 from flask_jwt_extended import jwt_required, get_jwt, get_jwt_identity
 from sqlalchemy.exc import SQLAlchemyError, IntegrityError
+from sqlalchemy.orm import joinedload, selectinload
 
 from schemas import (GroupSchema, GroupCreateSchema, UserIdInputSchema, GroupMemberSchema,
                      GroupInviteEmailSchema, GroupJoinByCodeSchema, GroupInvitationSchema, 
-                     GroupCodeInfoSchema)
+                     GroupCodeInfoSchema, BulkUserIdsInputSchema)
 from db import db
 from models import (GroupModel, GroupUserModel, UserModel, SettlementModel, ExpenseModel, 
                     ExpenseSplitModel, GroupInvitationModel)
 from utils.permissions import check_group_membership, check_group_admin
 from resources.settlement import _compute_balances
+from utils.live_events import publish_group_event
+from utils.change_log import record_change, record_changes, MEMBERSHIP, DELETE
+from utils.concurrency import (optimistic_retry, read_group_version, bump_group_version,
+                               bump_membership_version)
+from utils.splits import COMPACT, has_participant
 
 blp = Blueprint("Group", __name__, description="Operations on group")
 
@@ -27,10 +33,10 @@ class GroupList(MethodView):
         # Get the current logged-in user ID
         current_user_id = int(get_jwt_identity())
         
-        # Query groups where the current user is a member
+        # Query groups where the current user is a member, with all their members in one more query
         user_groups = db.session.query(GroupModel).join(
             GroupUserModel, GroupModel.id == GroupUserModel.group_id
-        ).filter(GroupUserModel.user_id == current_user_id).all()
+        ).filter(GroupUserModel.user_id == current_user_id).options(selectinload(GroupModel.users)).all()
         
         return user_groups
 
@@ -49,12 +55,16 @@ class GroupList(MethodView):
             abort(404, message="Current user not found")
         
         group = GroupModel(**group_data)
+        group.member_count = 1
+        group.admin_count = 1
         try:
             db.session.add(group)
             db.session.flush()
+            group_id = group.id
             # Make the group creator an admin
             group_user = GroupUserModel(group_id=group.id, user_id=current_user_id, is_admin=True)
             db.session.add(group_user)
+            record_change(group.id, MEMBERSHIP, current_user_id)
             
             db.session.commit()
         except IntegrityError:
@@ -65,7 +75,8 @@ class GroupList(MethodView):
             db.session.rollback()
             abort(500, message="An error occurred while creating group.")
         
-        return group
+        # Reload the committed group together with its (single) member in one query
+        return db.session.get(GroupModel, group_id, options=[joinedload(GroupModel.users)], populate_existing=True)
 
     
 @blp.route("/group/<int:group_id>")
@@ -82,9 +93,14 @@ class Group(MethodView):
         # Check if the user is a member of this group
         check_group_membership(group_id, current_user_id)
         
-        return GroupModel.query.get_or_404(group_id)
+        # Group and members in one query (GroupSchema dumps users)
+        group = db.session.get(GroupModel, group_id, options=[joinedload(GroupModel.users)])
+        if not group:
+            abort(404, message="Group not found")
+        return group
 
     @jwt_required()
+    @optimistic_retry
     def delete(self, group_id):
         """Delete group permanently. Cannot delete if group has expenses or settlements. Only group admins can delete."""
         
@@ -95,6 +111,7 @@ class Group(MethodView):
         check_group_admin(group_id, current_user_id)
         
         group = GroupModel.query.get_or_404(group_id)
+        group_version = group.version
         
         # Check for constraints that prevent deletion
         constraints = []
@@ -104,6 +121,11 @@ class Group(MethodView):
         if expenses_count > 0:
             constraints.append(f"has {expenses_count} expense(s)")
         
+        # Check if group has any archived expenses
+        archived_count = group.archives.count()
+        if archived_count > 0:
+            constraints.append(f"has {archived_count} archived expense batch(es)")
+        
         # Check if group has any settlements
         settlements_count = group.settlements.count()
         if settlements_count > 0:
@@ -113,9 +135,13 @@ class Group(MethodView):
             constraint_text = ", ".join(constraints)
             abort(400, message=f"Cannot delete group. Group {constraint_text}. Please clear all financial activity first.")
         
+        # Claim the group first so a concurrent expense/settlement cannot slip in
+        bump_group_version(group_id, group_version)
         db.session.delete(group)
         db.session.commit()
 
+        publish_group_event(group_id, "group_deleted", {"id": group_id})
+
         return {"message":"Group deleted successfully"}, 200
     
 
@@ -124,6 +150,7 @@ class UserToGroup(MethodView):
 
     @jwt_required()
     @blp.arguments(UserIdInputSchema)
+    @optimistic_retry
     def post(self, user_data, group_id):
         """Add a user to a group by user ID. Only group admins can add users."""
         
@@ -143,6 +170,7 @@ class UserToGroup(MethodView):
         group = GroupModel.query.get(group_id)
         if not group:
             abort(404, message="Group not found")
+        group_version = group.version
 
         # Check if user already in group
         existing = GroupUserModel.query.filter_by(group_id=group_id, user_id=user_id).first()
@@ -153,10 +181,15 @@ class UserToGroup(MethodView):
         group_user = GroupUserModel(group_id=group_id, user_id=user_id)
         try:
             db.session.add(group_user)
+            record_change(group_id, MEMBERSHIP, user_id)
+            bump_membership_version(group_id, group_version, member_delta=1)
             db.session.commit()
         except SQLAlchemyError:
             abort(500, message="An error occurred while adding user to group.")
 
+        publish_group_event(group_id, "member_added",
+                            {"id": user.id, "username": user.username, "email": user.email, "is_admin": False})
+
         return {"message": f"{user.username} is added to {group.name}"}, 201
 
 
@@ -164,6 +197,7 @@ class UserToGroup(MethodView):
 class RemoveUserFromGroup(MethodView):
 
     @jwt_required()
+    @optimistic_retry
     def delete(self, group_id, user_id):
         """Remove a user from a group. Prevents removal if user has financial obligations. Only group admins can remove users."""
         
@@ -172,6 +206,10 @@ class RemoveUserFromGroup(MethodView):
         
         # Check if the current user is an admin of this group
         check_group_admin(group_id, current_user_id)
+
+        # Everything below is decided on this snapshot; the commit fails if it changes
+        group_version = read_group_version(group_id)
+        group = db.session.get(GroupModel, group_id)
         
         group_user = GroupUserModel.query.filter_by(group_id=group_id, user_id=user_id).first()
         if not group_user:
@@ -179,50 +217,180 @@ class RemoveUserFromGroup(MethodView):
         
         # Check if admin is trying to remove themselves
         if current_user_id == user_id:
-            total_members = GroupUserModel.query.filter_by(group_id=group_id).count()
-            if total_members == 1:
+            if group.member_count == 1:
                 abort(400, message="Cannot remove yourself from group. You are the only member. Delete the group instead.")
             
             # Check if they are the only admin in the group
-            admin_count = GroupUserModel.query.filter_by(group_id=group_id, is_admin=True).count()
-            if admin_count == 1 and group_user.is_admin:
+            if group.admin_count == 1 and group_user.is_admin:
                 abort(400, message="Cannot remove yourself from group. You are the only admin. Assign another admin first.")
         
         elif group_user.is_admin:
-            admin_count = GroupUserModel.query.filter_by(group_id=group_id, is_admin=True).count()
-            if admin_count == 1:
+            if group.admin_count == 1:
                 abort(400, message="Cannot remove the only admin from group. Assign another admin first.")
         
         try:
             balances = _compute_balances(group_id)
             user_balance = balances.get(user_id, 0.0)
-            
-            # Allow removal only if balance is zero (within a small tolerance for floating point precision)
-            if abs(user_balance) > 0.01:  # More than 1 cent difference
-                if user_balance > 0:
-                    abort(400, message=f"Cannot remove user from group. User is owed ${user_balance:.2f}. Please settle all balances first.")
-                else:
-                    abort(400, message=f"Cannot remove user from group. User owes ${abs(user_balance):.2f}. Please settle all balances first.")
-        except Exception as e:
+        except SQLAlchemyError:
             constraints = []
             
             # Check if user has unsettled expense splits
             user_splits = (ExpenseSplitModel.query
-                          .join(ExpenseModel)
-                          .filter(ExpenseModel.group_id == group_id, ExpenseSplitModel.user_id == user_id)
+                          .filter(ExpenseSplitModel.group_id == group_id, ExpenseSplitModel.user_id == user_id)
                           .count())
+            user_splits += (ExpenseModel.query
+                            .filter(ExpenseModel.group_id == group_id, COMPACT, has_participant(user_id))
+                            .count())
             if user_splits > 0:
                 constraints.append(f"has {user_splits} unsettled expense split(s)")
             
             if constraints:
                 constraint_text = ", ".join(constraints)
                 abort(400, message=f"Cannot remove user from group. User {constraint_text}. Please settle all balances first.")
+        else:
+            # Allow removal only if balance is zero (within a small tolerance for floating point precision)
+            if abs(user_balance) > 0.01:  # More than 1 cent difference
+                if user_balance > 0:
+                    abort(400, message=f"Cannot remove user from group. User is owed ${user_balance:.2f}. Please settle all balances first.")
+                else:
+                    abort(400, message=f"Cannot remove user from group. User owes ${abs(user_balance):.2f}. Please settle all balances first.")
         
+        was_admin = group_user.is_admin
         db.session.delete(group_user)
+        record_change(group_id, MEMBERSHIP, user_id, DELETE)
+        bump_membership_version(group_id, group_version, member_delta=-1, admin_delta=-1 if was_admin else 0)
         db.session.commit()
+
+        publish_group_event(group_id, "member_removed", {"id": user_id})
+
         return {"message": "User removed from group successfully"}, 200
 
 
+@blp.route("/group/<int:group_id>/users")
+class BulkGroupUsers(MethodView):
+
+    @jwt_required()
+    @blp.arguments(BulkUserIdsInputSchema)
+    @optimistic_retry
+    def post(self, user_data, group_id):
+        """Add many users to a group at once. Only group admins can add users. Returns a per-user report."""
+        
+        # Get the current logged-in user ID
+        current_user_id = int(get_jwt_identity())
+        
+        # Check if the current user is an admin of this group
+        check_group_admin(group_id, current_user_id)
+        group_version = read_group_version(group_id)
+
+        user_ids = list(dict.fromkeys(user_data["user_ids"]))
+
+        # Resolve everything with two set-based queries
+        users = {u.id: u for u in UserModel.query.filter(UserModel.id.in_(user_ids))}
+        existing = {row[0] for row in db.session.query(GroupUserModel.user_id).filter(
+            GroupUserModel.group_id == group_id, GroupUserModel.user_id.in_(user_ids))}
+
+        results = []
+        added = []
+        for user_id in user_ids:
+            if user_id not in users:
+                results.append({"user_id": user_id, "status": "not_found"})
+            elif user_id in existing:
+                results.append({"user_id": user_id, "status": "already_member"})
+            else:
+                added.append(user_id)
+                results.append({"user_id": user_id, "status": "added"})
+
+        if added:
+            try:
+                db.session.add_all([GroupUserModel(group_id=group_id, user_id=user_id) for user_id in added])
+                record_changes(group_id, MEMBERSHIP, added)
+                bump_membership_version(group_id, group_version, member_delta=len(added))
+                db.session.commit()
+            except SQLAlchemyError:
+                db.session.rollback()
+                abort(500, message="An error occurred while adding users to group.")
+
+            publish_group_event(group_id, "members_added", {"members": [
+                {"id": user_id, "username": users[user_id].username,
+                 "email": users[user_id].email, "is_admin": False}
+                for user_id in added
+            ]})
+
+        return {"added": len(added), "results": results}, 200
+
+    @jwt_required()
+    @blp.arguments(BulkUserIdsInputSchema)
+    @optimistic_retry
+    def delete(self, user_data, group_id):
+        """Remove many users from a group at once. Users with open balances, and the last admin, are skipped. Only group admins can remove users."""
+        
+        # Get the current logged-in user ID
+        current_user_id = int(get_jwt_identity())
+        
+        # Check if the current user is an admin of this group
+        check_group_admin(group_id, current_user_id)
+
+        # Everything below is decided on this snapshot; the commit fails if it changes
+        group_version = read_group_version(group_id)
+        group = db.session.get(GroupModel, group_id)
+
+        user_ids = list(dict.fromkeys(user_data["user_ids"]))
+        memberships = {gu.user_id: gu for gu in GroupUserModel.query.filter(
+            GroupUserModel.group_id == group_id, GroupUserModel.user_id.in_(user_ids))}
+
+        # One balance computation for the whole batch
+        balances = _compute_balances(group_id)
+
+        remaining_members = group.member_count
+        remaining_admins = group.admin_count
+        results = []
+        removed = []
+        for user_id in user_ids:
+            group_user = memberships.get(user_id)
+            if not group_user:
+                results.append({"user_id": user_id, "status": "not_found"})
+                continue
+
+            user_balance = balances.get(user_id, 0.0)
+            if abs(user_balance) > 0.01:
+                results.append({"user_id": user_id, "status": "has_balance", "balance": round(user_balance, 2)})
+                continue
+
+            if remaining_members == 1:
+                results.append({"user_id": user_id, "status": "last_member"})
+                continue
+
+            if group_user.is_admin and remaining_admins == 1:
+                results.append({"user_id": user_id, "status": "last_admin"})
+                continue
+
+            remaining_members -= 1
+            if group_user.is_admin:
+                remaining_admins -= 1
+            removed.append(group_user)
+            results.append({"user_id": user_id, "status": "removed"})
+
+        if removed:
+            removed_ids = [gu.user_id for gu in removed]
+            try:
+                for group_user in removed:
+                    db.session.delete(group_user)
+                record_changes(group_id, MEMBERSHIP, removed_ids, DELETE)
+                bump_membership_version(
+                    group_id, group_version,
+                    member_delta=remaining_members - group.member_count,
+                    admin_delta=remaining_admins - group.admin_count
+                )
+                db.session.commit()
+            except SQLAlchemyError:
+                db.session.rollback()
+                abort(500, message="An error occurred while removing users from group.")
+
+            publish_group_event(group_id, "members_removed", {"ids": removed_ids})
+
+        return {"removed": len(removed), "results": results}, 200
+
+
 @blp.route("/group/<int:group_id>/members")
 class GroupMembers(MethodView):
 
@@ -267,6 +435,7 @@ class GroupAdminManagement(MethodView):
 
     @jwt_required()
     @blp.arguments(UserIdInputSchema)
+    @optimistic_retry
     def post(self, user_data, group_id):
         """Make a user admin of the group. Only existing group admins can do this."""
         
@@ -275,6 +444,7 @@ class GroupAdminManagement(MethodView):
         
         # Check if the current user is an admin of this group
         check_group_admin(group_id, current_user_id)
+        group_version = read_group_version(group_id)
         
         user_id = user_data.get("user_id")
         
@@ -292,17 +462,22 @@ class GroupAdminManagement(MethodView):
         
         # Make user admin
         target_group_user.is_admin = True
+        record_change(group_id, MEMBERSHIP, user_id)
+        bump_membership_version(group_id, group_version, admin_delta=1)
         
         try:
             db.session.commit()
         except SQLAlchemyError:
             db.session.rollback()
             abort(500, message="An error occurred while updating admin status.")
+
+        publish_group_event(group_id, "member_updated", {"id": user_id, "is_admin": True})
         
         return {"message": "User has been made admin successfully"}, 200
 
     @jwt_required()
     @blp.arguments(UserIdInputSchema)
+    @optimistic_retry
     def delete(self, user_data, group_id):
         """Remove admin privileges from a user. Only existing group admins can do this."""
 
@@ -310,16 +485,15 @@ class GroupAdminManagement(MethodView):
         
         # Check if the current user is an admin of this group
         check_group_admin(group_id, current_user_id)
+
+        # The admin count below is only valid for this snapshot; the commit fails if it changes
+        group_version = read_group_version(group_id)
+        group = db.session.get(GroupModel, group_id)
         
         user_id = user_data.get("user_id")
         
         # Prevent user from removing their own admin privileges if they're the only admin
-        admin_count = GroupUserModel.query.filter_by(
-            group_id=group_id, 
-            is_admin=True
-        ).count()
-        
-        if admin_count == 1 and user_id == current_user_id:
+        if group.admin_count == 1 and user_id == current_user_id:
             abort(400, message="Cannot remove admin privileges. At least one admin must remain in the group.")
         
         # Check if target user is a member of this group
@@ -336,12 +510,16 @@ class GroupAdminManagement(MethodView):
         
         # Remove admin privileges
         target_group_user.is_admin = False
+        record_change(group_id, MEMBERSHIP, user_id)
+        bump_membership_version(group_id, group_version, admin_delta=-1)
         
         try:
             db.session.commit()
         except SQLAlchemyError:
             db.session.rollback()
             abort(500, message="An error occurred while updating admin status.")
+
+        publish_group_event(group_id, "member_updated", {"id": user_id, "is_admin": False})
         
         return {"message": "Admin privileges removed successfully"}, 200
 
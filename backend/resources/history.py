@@ -1,10 +1,12 @@
 from flask_smorest import Blueprint
 from flask.views import MethodView
-from sqlalchemy.orm import joinedload
+from sqlalchemy.orm import selectinload, raiseload
 from flask_jwt_extended import jwt_required, get_jwt, get_jwt_identity
 
 from models import ExpenseModel, ExpenseSplitModel, SettlementModel, GroupModel, GroupUserModel
-from schemas import ExpenseHistoryResponseSchema, ExpenseHistoryItemSchema, SettlementHistoryItemSchema
+from schemas import (ExpenseHistoryResponseSchema, ExpenseHistoryItemSchema, SettlementHistoryItemSchema,
+                     GroupHistoryQuerySchema)
+from utils.archive import archived_history_items
 
 blp = Blueprint("History", __name__, description="Expense and settlement history")
 
@@ -12,9 +14,13 @@ blp = Blueprint("History", __name__, description="Expense and settlement history
 class GroupHistory(MethodView):
 
     @jwt_required()
+    @blp.arguments(GroupHistoryQuerySchema, location="query")
     @blp.response(200, ExpenseHistoryResponseSchema)
-    def get(self, group_id):
-        """Get complete expense and settlement history for a group - only if user is a member."""
+    def get(self, query_args, group_id):
+        """Get complete expense and settlement history for a group - only if user is a member.
+
+        Archived expenses are only read from cold storage with ?include_archived=true.
+        """
         
         # Check if the user is a member of this group
         current_user_id = int(get_jwt_identity())
@@ -27,12 +33,11 @@ class GroupHistory(MethodView):
             from flask_smorest import abort
             abort(403, message="Access denied. You are not a member of this group.")
         
-        GroupModel.query.get_or_404(group_id)
-
-        # Load expenses with splits to compute owed/paid/remaining
+        # Load expenses with splits to compute owed/paid/remaining (membership implies the group exists).
+        # selectinload rather than a join: the expense columns aren't repeated for every split row
         expenses = (
             ExpenseModel.query
-            .options(joinedload(ExpenseModel.splits))
+            .options(selectinload(ExpenseModel.splits), raiseload("*"))
             .filter(ExpenseModel.group_id == group_id)
             .all()
         )
@@ -43,7 +48,7 @@ class GroupHistory(MethodView):
             # paid = share for payer (they paid the whole amount, but for history we'll show they "paid" only their share here; net transfer uses balances)
             # remaining = owed - paid
             splits = []
-            for s in e.splits:
+            for s in e.split_items:
                 owed = float(s.amount)
                 paid = owed if s.user_id == e.paid_by else 0.0
                 remaining = float(round(owed - paid, 2))
@@ -82,5 +87,8 @@ class GroupHistory(MethodView):
                 "splits": None,
             })
 
+        if query_args["include_archived"]:
+            expense_items = archived_history_items(group_id) + expense_items
+
         items = expense_items + settlement_items
         return {"group_id": group_id, "items": items}
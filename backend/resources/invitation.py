@@ -1,14 +1,22 @@
 import uuid
+from datetime import datetime
 from flask import request
 from flask_smorest import Blueprint, abort
 from flask.views import MethodView
 from flask_jwt_extended import jwt_required, get_jwt, get_jwt_identity
 from sqlalchemy.exc import SQLAlchemyError, IntegrityError
+from sqlalchemy.orm import joinedload
+from marshmallow import validate, ValidationError
 
-from schemas import (GroupInviteEmailSchema, GroupInvitationSchema, GroupJoinByCodeSchema, GroupCodeInfoSchema)
+from schemas import (GroupInviteEmailSchema, GroupInvitationSchema, GroupJoinByCodeSchema, GroupCodeInfoSchema,
+                     GroupBulkInviteEmailSchema)
 from db import db
 from models import (GroupModel, GroupUserModel, UserModel, GroupInvitationModel)
 from utils.permissions import check_group_membership, check_group_admin
+from utils.live_events import publish_group_event
+from utils.change_log import record_change, MEMBERSHIP
+from utils.concurrency import optimistic_retry, read_group_version, bump_membership_version
+from utils.preview_cache import cached_preview
 
 blp = Blueprint("Invitation", __name__, description="Operations on group invitations")
 
@@ -44,7 +52,7 @@ class GroupEmailInvite(MethodView):
             group_id=group_id, email=email
         ).filter(
             GroupInvitationModel.used_at.is_(None),
-            GroupInvitationModel.expires_at > db.func.now()
+            GroupInvitationModel.expires_at > datetime.utcnow()
         ).first()
 
         if existing_invitation:
@@ -58,16 +66,21 @@ class GroupEmailInvite(MethodView):
         )
 
         db.session.add(invitation)
+        invite_token = invitation.invite_token
 
         try:
             db.session.commit()
 
+            # Reload the committed invitation together with its inviter (GroupInvitationSchema dumps invited_by)
+            invitation = (GroupInvitationModel.query.options(joinedload(GroupInvitationModel.invited_by))
+                          .filter_by(invite_token=invite_token).populate_existing().one())
+
             # Import here to avoid circular imports
             from flask import current_app
             from tasks import send_group_invitation_email
 
-            # Get member count
-            member_count = GroupUserModel.query.filter_by(group_id=group_id).count()
+            # Denormalized member count (no aggregate over group_user)
+            member_count = group.member_count
 
             # Create join URL (frontend will handle the invitation token)
             frontend_url = current_app.config.get('FRONTEND_URL', 'http://localhost:3000')
@@ -101,10 +114,128 @@ class GroupEmailInvite(MethodView):
             abort(500, message="An error occurred while creating the invitation")
 
 
+@blp.route("/group/<int:group_id>/invite-emails")
+class GroupBulkEmailInvite(MethodView):
+
+    @jwt_required()
+    @blp.arguments(GroupBulkInviteEmailSchema)
+    def post(self, invitation_data, group_id):
+        """Send email invitations to many addresses at once. Returns a per-email report."""
+        current_user_id = get_jwt_identity()
+
+        # Check if user is admin of the group
+        if not check_group_admin(group_id, current_user_id):
+            abort(403, message="Only group admins can send invitations")
+
+        group = GroupModel.query.get_or_404(group_id)
+        current_user = UserModel.query.get(current_user_id)
+
+        # Normalize and validate each address, keeping the request order
+        results = {}
+        emails = []
+        is_email = validate.Email()
+        for raw_email in invitation_data["emails"]:
+            email = raw_email.lower().strip()
+            if email in results:
+                continue
+            try:
+                is_email(email)
+            except ValidationError:
+                results[email] = {"email": email, "status": "invalid_email"}
+                continue
+            results[email] = None
+            emails.append(email)
+
+        # Existing members and pending invitations, one query each
+        member_emails = set()
+        pending_emails = set()
+        if emails:
+            member_emails = {row[0] for row in db.session.query(UserModel.email).join(
+                GroupUserModel, GroupUserModel.user_id == UserModel.id
+            ).filter(
+                GroupUserModel.group_id == group_id,
+                UserModel.email.in_(emails)
+            )}
+            pending_emails = {row[0] for row in db.session.query(GroupInvitationModel.email).filter(
+                GroupInvitationModel.group_id == group_id,
+                GroupInvitationModel.email.in_(emails),
+                GroupInvitationModel.used_at.is_(None),
+                GroupInvitationModel.expires_at > datetime.utcnow()
+            )}
+
+        invitations = []
+        for email in emails:
+            if email in member_emails:
+                results[email] = {"email": email, "status": "already_member"}
+            elif email in pending_emails:
+                results[email] = {"email": email, "status": "already_invited"}
+            else:
+                invitations.append(GroupInvitationModel(
+                    group_id=group_id,
+                    email=email,
+                    invited_by_user_id=current_user_id
+                ))
+
+        if invitations:
+            db.session.add_all(invitations)
+            invite_tokens = [invitation.invite_token for invitation in invitations]
+            try:
+                db.session.commit()
+            except SQLAlchemyError:
+                db.session.rollback()
+                abort(500, message="An error occurred while creating the invitations")
+
+            # Reload the committed invitations and their inviter in one query, not one refresh per invitation
+            invitations = (GroupInvitationModel.query.options(joinedload(GroupInvitationModel.invited_by))
+                           .filter(GroupInvitationModel.invite_token.in_(invite_tokens))
+                           .order_by(GroupInvitationModel.id).populate_existing().all())
+
+            # Import here to avoid circular imports
+            from flask import current_app
+            from tasks import send_group_invitation_emails
+
+            frontend_url = current_app.config.get('FRONTEND_URL', 'http://localhost:3000')
+            schema = GroupInvitationSchema()
+            outgoing = []
+            for invitation in invitations:
+                results[invitation.email] = {
+                    "email": invitation.email,
+                    "status": "invited",
+                    "invitation": schema.dump(invitation)
+                }
+                outgoing.append({
+                    "email": invitation.email,
+                    "expires_at": invitation.expires_at,
+                    "join_url": f"{frontend_url}/invite/{invitation.invite_token}"
+                })
+
+            # Queue one job for the whole batch so it goes out over a single SMTP session
+            try:
+                if hasattr(current_app, 'queue') and current_app.queue:
+                    job = current_app.queue.enqueue(
+                        send_group_invitation_emails,
+                        group.name,
+                        group.description,
+                        current_user.username,
+                        group.member_count,
+                        group.invite_code,
+                        outgoing,
+                        invitation_data.get("message") or None
+                    )
+                    current_app.logger.info(f"Bulk invitation email job queued: {job.id}")
+                else:
+                    current_app.logger.warning("Redis queue not available, skipping invitation emails")
+            except Exception as e:
+                current_app.logger.error(f"Failed to queue invitation emails: {str(e)}")
+
+        return {"invited": len(invitations), "results": list(results.values())}, 200
+
+
 @blp.route("/invite/<string:token>")
 class AcceptEmailInvite(MethodView):
 
     @jwt_required()
+    @optimistic_retry
     def get(self, token):
         """Accept group invitation via email token"""
         current_user_id = get_jwt_identity()
@@ -128,6 +259,8 @@ class AcceptEmailInvite(MethodView):
         if current_user.email != invitation.email:
             abort(403, message="This invitation was sent to a different email address")
 
+        group_version = read_group_version(invitation.group_id)
+
         # Check if user is already a member
         existing_membership = GroupUserModel.query.filter_by(
             group_id=invitation.group_id, user_id=current_user_id
@@ -140,10 +273,15 @@ class AcceptEmailInvite(MethodView):
         invitation.mark_as_used()
 
         db.session.add(group_user)
+        record_change(invitation.group_id, MEMBERSHIP, current_user.id)
 
         try:
+            bump_membership_version(invitation.group_id, group_version, member_delta=1)
             db.session.commit()
             group = GroupModel.query.get(invitation.group_id)
+            publish_group_event(group.id, "member_added",
+                                {"id": current_user.id, "username": current_user.username,
+                                 "email": current_user.email, "is_admin": False})
             return {
                 "message": f"Successfully joined group '{group.name}'",
                 "group": {
@@ -164,6 +302,7 @@ class JoinGroupByCode(MethodView):
 
     @jwt_required()
     @blp.arguments(GroupJoinByCodeSchema)
+    @optimistic_retry
     def post(self, join_data):
         """Join a group using invite code"""
         current_user_id = get_jwt_identity()
@@ -177,6 +316,7 @@ class JoinGroupByCode(MethodView):
         # Check if group is public (private groups require email invitation)
         if not group.is_public:
             abort(403, message="This is a private group. You need an email invitation to join.")
+        group_version = group.version
 
         # Check if user is already a member
         existing_membership = GroupUserModel.query.filter_by(
@@ -188,9 +328,15 @@ class JoinGroupByCode(MethodView):
         # Add user to group
         group_user = GroupUserModel(group_id=group.id, user_id=current_user_id)
         db.session.add(group_user)
+        record_change(group.id, MEMBERSHIP, int(current_user_id))
 
         try:
+            bump_membership_version(group.id, group_version, member_delta=1)
             db.session.commit()
+            current_user = UserModel.query.get(current_user_id)
+            publish_group_event(group.id, "member_added",
+                                {"id": current_user.id, "username": current_user.username,
+                                 "email": current_user.email, "is_admin": False})
             return {
                 "message": f"Successfully joined group '{group.name}'",
                 "group": {
@@ -206,6 +352,25 @@ class JoinGroupByCode(MethodView):
             abort(500, message="An error occurred while joining the group")
 
 
+def _load_group_preview(invite_code):
+    group = GroupModel.query.filter_by(invite_code=invite_code).first()
+    if not group:
+        return 404, "Invalid group code"
+
+    # Only show info for public groups
+    if not group.is_public:
+        return 403, "This is a private group"
+
+    return 200, {
+        "id": group.id,
+        "name": group.name,
+        "description": group.description,
+        "invite_code": group.invite_code,
+        "member_count": group.member_count,
+        "is_public": group.is_public
+    }
+
+
 @blp.route("/group/code/<string:code>")
 class GroupCodeInfo(MethodView):
 
@@ -213,21 +378,12 @@ class GroupCodeInfo(MethodView):
         """Get group information by invite code (public endpoint for previews)"""
         invite_code = code.upper().strip()
 
-        group = GroupModel.query.filter_by(invite_code=invite_code).first()
-        if not group:
+        # Can't be a code; don't let junk fill the cache
+        if len(invite_code) > GroupModel.invite_code.type.length:
             abort(404, message="Invalid group code")
 
-        # Only show info for public groups
-        if not group.is_public:
-            abort(403, message="This is a private group")
-
-        member_count = GroupUserModel.query.filter_by(group_id=group.id).count()
-
-        return {
-            "id": group.id,
-            "name": group.name,
-            "description": group.description,
-            "invite_code": group.invite_code,
-            "member_count": member_count,
-            "is_public": group.is_public
-        }, 200
+        status, payload = cached_preview(invite_code, _load_group_preview)
+        if status != 200:
+            abort(status, message=payload)
+
+        return payload, 200
@@ -1,11 +1,16 @@
 from flask_smorest import Blueprint, abort
 from flask.views import MethodView
 from sqlalchemy.exc import SQLAlchemyError
-from flask_jwt_extended import jwt_required, get_jwt
+from flask_jwt_extended import jwt_required, get_jwt, get_jwt_identity
 
 from db import db
-from models import SettlementModel, GroupModel, UserModel, ExpenseSplitModel, ExpenseModel
+from models import SettlementModel, GroupModel, UserModel, ExpenseSplitModel, ExpenseModel, GroupUserModel
 from schemas import SettlementSchema, SettlementCreateSchema, BalanceSchema
+from utils.notifications import record_group_event, SETTLEMENT_EVENT
+from utils.live_events import publish_group_event, settlement_balance_delta
+from utils.change_log import record_change, record_changes, SETTLEMENT, DELETE
+from utils.concurrency import optimistic_retry, bump_ledger_version
+from utils.balances import group_balances
 
 blp = Blueprint("Settlement", __name__, description="Operations on settlements")
 
@@ -15,9 +20,11 @@ class GroupSettlement(MethodView):
     @jwt_required()
     @blp.arguments(SettlementCreateSchema)
     @blp.response(201, SettlementSchema)
+    @optimistic_retry
     def post(self, settlement_data, group_id):
         """Create a settlement between two group members."""
         group = GroupModel.query.get_or_404(group_id)
+        membership_version = group.membership_version
 
         paid_by = settlement_data["paid_by"]
         paid_to = settlement_data["paid_to"]
@@ -28,7 +35,9 @@ class GroupSettlement(MethodView):
         if amount <= 0:
             abort(400, message="Settlement amount must be positive")
 
-        member_ids = {u.id for u in group.users}
+        # Only the two parties' memberships, not every member row
+        member_ids = {row[0] for row in db.session.query(GroupUserModel.user_id).filter(
+            GroupUserModel.group_id == group_id, GroupUserModel.user_id.in_([paid_by, paid_to]))}
         if paid_by not in member_ids or paid_to not in member_ids:
             abort(403, message="Both users must be members of the group")
 
@@ -41,11 +50,24 @@ class GroupSettlement(MethodView):
 
         try:
             db.session.add(settlement)
+            db.session.flush()
+
+            # Queue group members' notification in the same transaction
+            record_group_event(group_id, int(get_jwt_identity()), SETTLEMENT_EVENT, settlement.id)
+            record_change(group_id, SETTLEMENT, settlement.id)
+
+            bump_ledger_version(group_id, membership_version)
             db.session.commit()
         except SQLAlchemyError:
             db.session.rollback()
             abort(500, message="An error occurred while recording settlement")
 
+        publish_group_event(
+            group_id, "settlement_created",
+            SettlementSchema().dump(settlement),
+            settlement_balance_delta(paid_by, paid_to, amount)
+        )
+
         return settlement
 
     @jwt_required()
@@ -63,12 +85,15 @@ class GroupBalances(MethodView):
     @blp.response(200, BalanceSchema(many=True))
     def get(self, group_id):
         """Calculate current balances for all group members."""
-        group = GroupModel.query.get_or_404(group_id)
-        members = group.users
+        GroupModel.query.get_or_404(group_id)
+        # Ids and names only; the response needs nothing else from the user rows
+        members = db.session.query(UserModel.id, UserModel.username).join(
+            GroupUserModel, GroupUserModel.user_id == UserModel.id
+        ).filter(GroupUserModel.group_id == group_id).all()
         if not members:
             return []
 
-        balances = _compute_balances(group_id)
+        balances = _compute_balances(group_id, {u.id for u in members})
 
         users_by_id = {u.id: u for u in members}
         result = []
@@ -84,33 +109,20 @@ class GroupBalances(MethodView):
         return result
 
 
-def _compute_balances(group_id: int):
+def _group_member_ids(group_id: int):
+    return {row[0] for row in db.session.query(GroupUserModel.user_id).filter_by(group_id=group_id)}
+
+
+def _compute_balances(group_id: int, member_ids=None):
     """Calculate net balances for group members based on expenses and settlements."""
-    group = GroupModel.query.get_or_404(group_id)
-    member_ids = {u.id for u in group.users}
+    if member_ids is None:
+        GroupModel.query.get_or_404(group_id)
+        member_ids = _group_member_ids(group_id)
     balances = {uid: 0.0 for uid in member_ids}
 
-    # All splits for expenses in this group
-    splits = (
-        ExpenseSplitModel.query
-        .join(ExpenseSplitModel.expenses)
-        .filter(ExpenseModel.group_id == group_id)
-        .all()
-    )
-
-    for split in splits:
-        payer_id = split.expenses.paid_by
-        user_id = split.user_id
-        amount = float(split.amount)
-        if user_id != payer_id:
-            balances[user_id] -= amount
-            balances[payer_id] += amount
-
-    # Apply recorded settlements (paid_by receives from paid_to)
-    settlements = SettlementModel.query.filter_by(group_id=group_id).all()
-    for s in settlements:
-        balances[s.paid_by] = balances.get(s.paid_by, 0.0) + float(s.amount)
-        balances[s.paid_to] = balances.get(s.paid_to, 0.0) - float(s.amount)
+    # Latest checkpoint plus everything recorded after it (see utils/balances.py)
+    for uid, amount in group_balances(group_id).items():
+        balances[uid] = balances.get(uid, 0.0) + amount
 
     return balances
 
@@ -119,10 +131,12 @@ def _compute_balances(group_id: int):
 class SettlementCleanup(MethodView):
 
     @jwt_required()
+    @optimistic_retry
     def delete(self, group_id):
         """Clean up settlements where users are no longer group members."""
         group = GroupModel.query.get_or_404(group_id)
-        member_ids = {u.id for u in group.users}
+        membership_version = group.membership_version
+        member_ids = _group_member_ids(group_id)
         
         # Find settlements with users not in the group
         invalid_settlements = []
@@ -133,10 +147,23 @@ class SettlementCleanup(MethodView):
                 invalid_settlements.append(settlement)
         
         # Delete invalid settlements
+        delta = {}
         for settlement in invalid_settlements:
+            for uid, amount in settlement_balance_delta(
+                    settlement.paid_by, settlement.paid_to, settlement.amount, sign=-1).items():
+                delta[uid] = delta.get(uid, 0.0) + amount
             db.session.delete(settlement)
+        record_changes(group_id, SETTLEMENT, [s.id for s in invalid_settlements], DELETE)
+        bump_ledger_version(group_id, membership_version)
         
         db.session.commit()
+
+        if invalid_settlements:
+            publish_group_event(
+                group_id, "settlements_deleted",
+                {"ids": [s.id for s in invalid_settlements]},
+                delta
+            )
         
         return {
             "message": f"Cleaned up {len(invalid_settlements)} invalid settlement(s)",
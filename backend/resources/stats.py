@@ -0,0 +1,185 @@
+from datetime import timedelta
+
+from flask import current_app
+from flask_smorest import Blueprint, abort
+from flask.views import MethodView
+from flask_jwt_extended import jwt_required, get_jwt_identity
+
+from db import db
+from models import GroupModel, UserModel, ExpenseModel, ExpenseSplitModel
+from schemas import GroupStatsQuerySchema, GroupStatsSchema
+from utils.permissions import check_group_membership
+from utils.preview_cache import read_through
+from utils.splits import COMPACT, expand_participants
+from utils.archive import archived_through
+from config import GROUP_STATS_CACHE_TTL_SECONDS, GROUP_STATS_TOP_PAYERS
+
+blp = Blueprint("Stats", __name__, description="Spending analytics for groups")
+
+
+def _period_start(day, bucket):
+    """First day of the week (Monday) or month containing `day`."""
+    if bucket == "week":
+        return day - timedelta(days=day.weekday())
+    return day.replace(day=1)
+
+
+def _period_label(start, bucket):
+    if bucket == "week":
+        year, week, _ = start.isocalendar()
+        return f"{year}-W{week:02d}"
+    return start.strftime("%Y-%m")
+
+
+def _money(value):
+    return round(float(value or 0), 2)
+
+
+def _compute_group_stats(group_id, start, end, bucket):
+    """Aggregate spend in SQL at day granularity, then roll days up into periods (JSON-ready)."""
+    expense_filters = [ExpenseModel.group_id == group_id]
+    if start:
+        expense_filters.append(ExpenseModel.date >= start)
+    if end:
+        expense_filters.append(ExpenseModel.date <= end)
+
+    # Expense totals per day, split type and payer
+    expense_rows = db.session.query(
+        ExpenseModel.date, ExpenseModel.split_type, ExpenseModel.paid_by,
+        db.func.sum(ExpenseModel.amount), db.func.count(ExpenseModel.id)
+    ).filter(*expense_filters).group_by(
+        ExpenseModel.date, ExpenseModel.split_type, ExpenseModel.paid_by
+    ).all()
+
+    # Shares per day and member
+    share_rows = db.session.query(
+        ExpenseModel.date, ExpenseSplitModel.user_id, db.func.sum(ExpenseSplitModel.amount)
+    ).join(ExpenseSplitModel, ExpenseSplitModel.expense_id == ExpenseModel.id).filter(
+        ExpenseSplitModel.group_id == group_id, *expense_filters
+    ).group_by(ExpenseModel.date, ExpenseSplitModel.user_id).all()
+
+    # Compact equal splits: one share per participant, summed per day and participant set
+    share_rows += expand_participants(db.session.query(
+        ExpenseModel.date, ExpenseModel.participants, db.func.sum(ExpenseModel.share_amount)
+    ).filter(COMPACT, *expense_filters).group_by(ExpenseModel.date, ExpenseModel.participants))
+
+    members = {}
+    periods = {}
+    split_types = {}
+    total_spent = 0.0
+    expense_count = 0
+
+    def member(user_id):
+        return members.setdefault(user_id, {"user_id": user_id, "paid": 0.0, "share": 0.0})
+
+    def period(day):
+        period_start = _period_start(day, bucket)
+        return periods.setdefault(period_start, {
+            "period": _period_label(period_start, bucket),
+            "start": period_start,
+            "total": 0.0,
+            "expense_count": 0,
+            "shares": {}
+        })
+
+    for day, split_type, paid_by, amount, count in expense_rows:
+        amount = float(amount)
+        total_spent += amount
+        expense_count += count
+        member(paid_by)["paid"] += amount
+
+        by_type = split_types.setdefault(split_type, {"split_type": split_type, "total": 0.0, "expense_count": 0})
+        by_type["total"] += amount
+        by_type["expense_count"] += count
+
+        # Undated expenses count towards totals but not towards any period
+        if day is not None:
+            bucket_row = period(day)
+            bucket_row["total"] += amount
+            bucket_row["expense_count"] += count
+
+    for day, user_id, amount in share_rows:
+        amount = float(amount)
+        member(user_id)["share"] += amount
+        if day is not None:
+            shares = period(day)["shares"]
+            shares[user_id] = shares.get(user_id, 0.0) + amount
+
+    usernames = {}
+    if members:
+        usernames = dict(db.session.query(UserModel.id, UserModel.username).filter(
+            UserModel.id.in_(list(members))
+        ).all())
+
+    member_list = [
+        {"user_id": uid, "username": usernames.get(uid), "paid": _money(m["paid"]), "share": _money(m["share"])}
+        for uid, m in sorted(members.items())
+    ]
+
+    archived_date = archived_through(group_id)
+    return {
+        "group_id": group_id,
+        "archived_through": archived_date.isoformat() if archived_date else None,
+        "start": start.isoformat() if start else None,
+        "end": end.isoformat() if end else None,
+        "bucket": bucket,
+        "total_spent": _money(total_spent),
+        "expense_count": expense_count,
+        "members": member_list,
+        "periods": [
+            {
+                "period": p["period"],
+                "start": p["start"].isoformat(),
+                "total": _money(p["total"]),
+                "expense_count": p["expense_count"],
+                "members": [
+                    {"user_id": uid, "username": usernames.get(uid), "share": _money(share)}
+                    for uid, share in sorted(p["shares"].items())
+                ]
+            }
+            for _, p in sorted(periods.items())
+        ],
+        "split_types": [
+            {"split_type": t["split_type"], "total": _money(t["total"]), "expense_count": t["expense_count"]}
+            for _, t in sorted(split_types.items())
+        ],
+        "top_payers": sorted(
+            (m for m in member_list if m["paid"] > 0), key=lambda m: -m["paid"]
+        )[:GROUP_STATS_TOP_PAYERS]
+    }
+
+
+@blp.route("/group/<int:group_id>/stats")
+class GroupStats(MethodView):
+
+    @jwt_required()
+    @blp.arguments(GroupStatsQuerySchema, location="query")
+    @blp.response(200, GroupStatsSchema)
+    def get(self, query_args, group_id):
+        """Get spend per member, per period, per split type and top payers - only if user is a member.
+
+        `start`/`end` (inclusive dates) limit the range; `bucket` is `month` (default) or
+        `week`. Undated expenses are counted in the totals of unbounded queries but do not
+        appear in any period. Archived expenses are not counted: `archived_through` is
+        the date of the newest one, so ranges starting after it are complete.
+        """
+        # Get the current logged-in user ID
+        current_user_id = int(get_jwt_identity())
+        check_group_membership(group_id, current_user_id)
+
+        start = query_args.get("start")
+        end = query_args.get("end")
+        bucket = query_args["bucket"]
+        if start and end and start > end:
+            abort(400, message="start must not be after end")
+
+        # Every expense write bumps the group version, so results are cached per version;
+        # back-dated or edited expenses change closed periods too, so they are not frozen
+        group = GroupModel.query.get_or_404(group_id)
+        key = f"{group_id}:{group.version}:{start}:{end}:{bucket}"
+        return read_through(
+            getattr(current_app, "stats_cache", None),
+            key,
+            lambda: _compute_group_stats(group_id, start, end, bucket),
+            GROUP_STATS_CACHE_TTL_SECONDS
+        )
@@ -0,0 +1,145 @@
+from flask_smorest import Blueprint, abort
+from flask.views import MethodView
+from flask_jwt_extended import jwt_required, get_jwt_identity
+
+from db import db
+from models import (GroupModel, GroupChangeModel, ExpenseModel, ExpenseSplitModel, SettlementModel,
+                    GroupUserModel, UserModel)
+from schemas import GroupChangesQuerySchema, SettlementSchema, GroupMemberSchema
+from utils.permissions import check_group_membership
+from utils.change_log import EXPENSE, SETTLEMENT, MEMBERSHIP, DELETE
+from config import CHANGE_LOG_PAGE_SIZE
+
+blp = Blueprint("Sync", __name__, description="Delta sync for offline-first clients")
+
+
+def _latest_version(group):
+    latest = db.session.query(db.func.max(GroupChangeModel.id)).filter(
+        GroupChangeModel.group_id == group.id
+    ).scalar()
+    return max(latest or 0, group.change_log_floor)
+
+
+@blp.route("/group/<int:group_id>/changes")
+class GroupChanges(MethodView):
+
+    @jwt_required()
+    @blp.arguments(GroupChangesQuerySchema, location="query")
+    def get(self, query_args, group_id):
+        """Get changes after a ledger version - only if user is a member.
+
+        Returns the current state of every expense (with its splits), settlement and
+        membership changed after `since`, plus tombstones for deleted ones. An upserted
+        expense carries its complete split list. Pass the returned `version` as `since`
+        next time. If `full_resync` is true the log no longer reaches back to `since`:
+        reload the group and continue from the returned `version`.
+        """
+        current_user_id = int(get_jwt_identity())
+        check_group_membership(group_id, current_user_id)
+
+        group = GroupModel.query.get_or_404(group_id)
+        since = query_args["since"]
+        limit = min(query_args.get("limit") or CHANGE_LOG_PAGE_SIZE, CHANGE_LOG_PAGE_SIZE)
+        if since < 0 or limit < 1:
+            abort(400, message="since must be >= 0 and limit must be positive")
+
+        if since < group.change_log_floor:
+            return {
+                "group_id": group_id,
+                "since": since,
+                "version": _latest_version(group),
+                "full_resync": True,
+                "has_more": False
+            }, 200
+
+        changes = (
+            GroupChangeModel.query
+            .filter(GroupChangeModel.group_id == group_id, GroupChangeModel.id > since)
+            .order_by(GroupChangeModel.id)
+            .limit(limit + 1)
+            .all()
+        )
+        has_more = len(changes) > limit
+        changes = changes[:limit]
+        version = changes[-1].id if changes else since
+
+        # Only the latest operation per entity matters
+        latest = {}
+        for change in changes:
+            latest[(change.entity, change.entity_id)] = change.op
+
+        upserts = {EXPENSE: [], SETTLEMENT: [], MEMBERSHIP: []}
+        deleted = {EXPENSE: [], SETTLEMENT: [], MEMBERSHIP: []}
+        for (entity, entity_id), op in latest.items():
+            (deleted if op == DELETE else upserts)[entity].append(entity_id)
+
+        expenses = []
+        expense_splits = []
+        if upserts[EXPENSE]:
+            for e in ExpenseModel.query.filter(
+                    ExpenseModel.group_id == group_id, ExpenseModel.id.in_(upserts[EXPENSE])):
+                expenses.append({
+                    "id": e.id,
+                    "amount": float(e.amount),
+                    "description": e.description,
+                    "paid_by": e.paid_by,
+                    "date": e.date.isoformat() if e.date else None,
+                    "group_id": e.group_id,
+                    "split_type": e.split_type
+                })
+                # Compact equal splits have no split rows (and no split ids)
+                for split in (e.split_items if e.participants is not None else []):
+                    expense_splits.append({
+                        "id": None,
+                        "expense_id": e.id,
+                        "user_id": split.user_id,
+                        "amount": float(split.amount)
+                    })
+            split_rows = db.session.query(
+                ExpenseSplitModel.id, ExpenseSplitModel.expense_id,
+                ExpenseSplitModel.user_id, ExpenseSplitModel.amount
+            ).filter(ExpenseSplitModel.group_id == group_id,
+                     ExpenseSplitModel.expense_id.in_(upserts[EXPENSE])).order_by(ExpenseSplitModel.id)
+            for split_id, expense_id, user_id, amount in split_rows:
+                expense_splits.append({
+                    "id": split_id,
+                    "expense_id": expense_id,
+                    "user_id": user_id,
+                    "amount": float(amount)
+                })
+
+        settlements = []
+        if upserts[SETTLEMENT]:
+            settlements = SettlementSchema(many=True).dump(SettlementModel.query.filter(
+                SettlementModel.group_id == group_id, SettlementModel.id.in_(upserts[SETTLEMENT])))
+
+        memberships = []
+        if upserts[MEMBERSHIP]:
+            rows = db.session.query(
+                UserModel.id, UserModel.username, UserModel.email, GroupUserModel.is_admin
+            ).join(
+                GroupUserModel, UserModel.id == GroupUserModel.user_id
+            ).filter(
+                GroupUserModel.group_id == group_id, GroupUserModel.user_id.in_(upserts[MEMBERSHIP])
+            )
+            memberships = GroupMemberSchema(many=True).dump([
+                {"id": user_id, "username": username, "email": email, "is_admin": is_admin}
+                for user_id, username, email, is_admin in rows
+            ])
+
+        return {
+            "group_id": group_id,
+            "since": since,
+            "version": version,
+            "full_resync": False,
+            "has_more": has_more,
+            "expenses": expenses,
+            "expense_splits": expense_splits,
+            "settlements": settlements,
+            "memberships": memberships,
+            "deleted": {
+                "expenses": deleted[EXPENSE],
+                "settlements": deleted[SETTLEMENT],
+                "memberships": deleted[MEMBERSHIP]
+            }
+        }, 200
@@ -4,16 +4,17 @@ from threading import Thread
 
 from flask_smorest import Blueprint, abort
 from flask.views import MethodView
-from passlib.hash import pbkdf2_sha256
+from sqlalchemy.orm import selectinload
 from flask_jwt_extended import create_access_token, create_refresh_token, get_jwt_identity, get_jwt, jwt_required
 
 from blocklist import BLOCKLIST
 
-from schemas import UserSchema, UserLoginSchema
+from schemas import UserSchema, UserLoginSchema, UserBalanceSummarySchema
 from db import db
 
-from models import UserModel
-from tasks import send_user_registration_email
+from models import UserModel, ExpenseModel
+from utils.balance_summary import user_balance_summary
+from utils.splits import COMPACT, has_participant
 
 blp = Blueprint("User", __name__, description="Opeartion on users")
 
@@ -22,6 +23,8 @@ class UserRegister(MethodView):
     @blp.arguments(UserSchema)
     def post(self, user_data):
         """Register a new user with unique email."""
+        from passlib.hash import pbkdf2_sha256
+
         # Check if email already exists (usernames can be duplicate)
         if UserModel.query.filter(UserModel.email == user_data["email"]).first():
             abort(409, message="Email already exists")
@@ -34,7 +37,8 @@ class UserRegister(MethodView):
         db.session.add(user)
         db.session.commit()
 
-        # Queue welcome email
+        # Queue welcome email (imported here: tasks is only needed once someone registers)
+        from tasks import send_user_registration_email
         try:
             if hasattr(current_app, 'queue') and current_app.queue:
                 job = current_app.queue.enqueue(
@@ -55,6 +59,8 @@ class UserLogin(MethodView):
     @blp.arguments(UserLoginSchema)
     def post(self, user_data):
         """Login with email and password to get access tokens."""
+        from passlib.hash import pbkdf2_sha256
+
         email = user_data["email"]
         password = user_data["password"]
         
@@ -93,6 +99,17 @@ class UserLogout(MethodView):
 
         return {"message":"Successfully logged out."}
 
+@blp.route("/user/me/balances")
+class UserBalances(MethodView):
+
+    @jwt_required()
+    @blp.response(200, UserBalanceSummarySchema)
+    def get(self):
+        """Net balance of the current user in every group and against every counterparty."""
+        # Get the current logged-in user ID
+        current_user_id = int(get_jwt_identity())
+        return user_balance_summary(current_user_id)
+
 @blp.route("/user/<int:user_id>")
 class User(MethodView):
     
@@ -106,7 +123,8 @@ class User(MethodView):
     @jwt_required()
     def delete(self, user_id):
         """Delete user permanently. Cannot delete if user has financial obligations."""
-        user = UserModel.query.get_or_404(user_id)
+        # Both collections are counted below and cascaded by the delete
+        user = UserModel.query.options(selectinload(UserModel.splits), selectinload(UserModel.groups)).get_or_404(user_id)
         
         constraints = []
         
@@ -115,6 +133,7 @@ class User(MethodView):
             constraints.append(f"has paid for {expenses_count} expense(s)")
         
         splits_count = len(user.splits)
+        splits_count += ExpenseModel.query.filter(COMPACT, has_participant(user_id)).count()
         if splits_count > 0:
             constraints.append(f"has {splits_count} outstanding expense split(s)")
         
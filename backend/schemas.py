@@ -1,5 +1,6 @@
-from marshmallow import Schema, fields
+from marshmallow import Schema, fields, validate, post_dump
 from datetime import datetime as dt
+from config import BULK_MEMBERSHIP_MAX_ITEMS
 
 # User related Schema
 class UserSchema(Schema):
@@ -33,6 +34,10 @@ class UserIdInputSchema(Schema):
     """This Schema takes input from the client"""
     user_id = fields.Int(required=True)
 
+class BulkUserIdsInputSchema(Schema):
+    """Takes a list of user ids for bulk membership operations"""
+    user_ids = fields.List(fields.Int(), required=True, validate=validate.Length(min=1, max=BULK_MEMBERSHIP_MAX_ITEMS))
+
 # Group realted Schema
 class GroupCreateSchema(Schema):
     """This Group schema will create groups"""
@@ -56,6 +61,11 @@ class GroupInviteEmailSchema(Schema):
     email = fields.Email(required=True)
     message = fields.Str(load_default="", allow_none=True)  # Optional personal message
 
+class GroupBulkInviteEmailSchema(Schema):
+    """Schema for inviting many emails at once; each address is validated individually"""
+    emails = fields.List(fields.Str(), required=True, validate=validate.Length(min=1, max=BULK_MEMBERSHIP_MAX_ITEMS))
+    message = fields.Str(load_default="", allow_none=True)
+
 class GroupJoinByCodeSchema(Schema):
     """Schema for joining a group using invite code"""
     invite_code = fields.Str(required=True)
@@ -90,20 +100,12 @@ class ExpenseSplitInputSchema(Schema):
     percentage = fields.Float(required=False)  # For percentage splits
 
 class ExpenseSplitSchema(Schema):
-    id = fields.Method("get_index", dump_only=True)
+    # 1-based position of the split in its expense, numbered by ExpenseSchema
+    id = fields.Int(dump_only=True)
     split_id = fields.Int(attribute="id", dump_only=True)
     user_id = fields.Int(required=True)
     amount = fields.Float(dump_only=True)
 
-    def get_index(self, obj):
-        try:
-            parent = getattr(obj, "expenses", None)
-            if parent and parent.splits:
-                return parent.splits.index(obj) + 1
-        except Exception:
-            pass
-        return None
-
 class ExpenseCreateSchema(Schema):
     amount = fields.Float(required=True)
     description = fields.Str(required=True)
@@ -115,13 +117,20 @@ class ExpenseCreateSchema(Schema):
 class ExpenseSchema(ExpenseCreateSchema):
     id = fields.Int(dump_only=True)
     group_id = fields.Int(required=True)
-    splits = fields.List(fields.Nested(ExpenseSplitSchema), dump_only=True)
+    splits = fields.List(fields.Nested(ExpenseSplitSchema), attribute="split_items", dump_only=True)
     split_type = fields.Str(dump_only=True)
 
     class Meta:
         ordered = True
         fields = ("id", "amount", "description", "paid_by", "date", "group_id", "split_type", "splits")
 
+    @post_dump
+    def number_splits(self, data, **kwargs):
+        # Positions come from split_items' order, not from the split's back-reference to its expense
+        for position, split in enumerate(data.get("splits") or [], start=1):
+            split["id"] = position
+        return data
+
 # Settlement realted schemas
 class SettlementCreateSchema(Schema):
     amount = fields.Float(required=True)
@@ -141,6 +150,23 @@ class BalanceSchema(Schema):
     username = fields.Str()
     balance = fields.Float()
 
+class CounterpartyBalanceSchema(BalanceSchema):
+    """Positive balance: the counterparty owes the current user"""
+
+class GroupBalanceSummarySchema(Schema):
+    group_id = fields.Int()
+    group_name = fields.Str()
+    balance = fields.Float()
+    counterparties = fields.List(fields.Nested(CounterpartyBalanceSchema))
+
+class UserBalanceSummarySchema(Schema):
+    """The current user's position across all of their groups"""
+    owed_to_you = fields.Float()
+    you_owe = fields.Float()
+    net = fields.Float()
+    groups = fields.List(fields.Nested(GroupBalanceSummarySchema))
+    counterparties = fields.List(fields.Nested(CounterpartyBalanceSchema))
+
 # Expense history schemas
 class ExpenseHistorySplitSchema(Schema):
     user_id = fields.Int(required=True)
@@ -185,11 +211,84 @@ class HistoryItemSchema(Schema):
     paid_to = fields.Int(allow_none=True)
     group_id = fields.Int(required=True)
     splits = fields.List(fields.Nested(ExpenseHistorySplitSchema), allow_none=True)
+    archived = fields.Bool()  # Only present on expenses read from cold storage
 
     class Meta:
         ordered = True
-        fields = ("id", "type", "description", "amount", "date", "paid_by", "paid_to", "group_id", "splits")
+        fields = ("id", "type", "description", "amount", "date", "paid_by", "paid_to", "group_id", "splits",
+                  "archived")
 
 class ExpenseHistoryResponseSchema(Schema):
     group_id = fields.Int(required=True)
     items = fields.List(fields.Nested(HistoryItemSchema), required=True)
+
+class GroupHistoryQuerySchema(Schema):
+    include_archived = fields.Bool(load_default=False)
+
+# Archive schemas
+class GroupArchiveCreateSchema(Schema):
+    before = fields.Date(load_default=None)  # Archive expenses dated before this day
+
+class GroupArchiveSchema(Schema):
+    id = fields.Int(dump_only=True)
+    group_id = fields.Int(dump_only=True)
+    archived_by = fields.Int(dump_only=True)
+    created_at = fields.DateTime(dump_only=True)
+    first_date = fields.Date(dump_only=True)
+    last_date = fields.Date(dump_only=True)
+    expense_count = fields.Int(dump_only=True)
+    split_count = fields.Int(dump_only=True)
+
+# Delta sync schemas
+class GroupChangesQuerySchema(Schema):
+    since = fields.Int(required=True)  # Last version the client applied
+    limit = fields.Int(load_default=None)
+
+# Group analytics schemas
+class GroupStatsQuerySchema(Schema):
+    start = fields.Date(load_default=None)
+    end = fields.Date(load_default=None)
+    bucket = fields.Str(load_default="month", validate=validate.OneOf(["month", "week"]))
+
+class MemberSpendSchema(Schema):
+    user_id = fields.Int()
+    username = fields.Str()
+    paid = fields.Float()
+    share = fields.Float()
+
+class PeriodShareSchema(Schema):
+    user_id = fields.Int()
+    username = fields.Str()
+    share = fields.Float()
+
+class PeriodSpendSchema(Schema):
+    period = fields.Str()  # "2025-03" or "2025-W11"
+    start = fields.Str()  # ISO date of the period's first day
+    total = fields.Float()
+    expense_count = fields.Int()
+    members = fields.List(fields.Nested(PeriodShareSchema))
+
+class SplitTypeSpendSchema(Schema):
+    split_type = fields.Str()
+    total = fields.Float()
+    expense_count = fields.Int()
+
+class GroupStatsSchema(Schema):
+    group_id = fields.Int()
+    start = fields.Str(allow_none=True)
+    end = fields.Str(allow_none=True)
+    bucket = fields.Str()
+    total_spent = fields.Float()
+    expense_count = fields.Int()
+    members = fields.List(fields.Nested(MemberSpendSchema))
+    periods = fields.List(fields.Nested(PeriodSpendSchema))
+    split_types = fields.List(fields.Nested(SplitTypeSpendSchema))
+    top_payers = fields.List(fields.Nested(MemberSpendSchema))
+    archived_through = fields.Str(allow_none=True)
+
+# Group export schemas
+class GroupExportQuerySchema(Schema):
+    format = fields.Str(load_default="csv", validate=validate.OneOf(["csv", "jsonl", "parquet"]))
+    gzip = fields.Bool(load_default=False)
+    mode = fields.Str(load_default="stream", validate=validate.OneOf(["stream", "job"]))
+    include_archived = fields.Bool(load_default=True)
@@ -3,10 +3,14 @@ import jinja2
 import logging
 import smtplib
 import ssl
+import time
+from datetime import datetime, timedelta, timezone
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from dotenv import load_dotenv
 
+from utils.tracing import traced_job, span
+
 load_dotenv()
 
 logging.basicConfig(level=logging.INFO)
@@ -17,15 +21,40 @@ gmail_password = os.getenv("GMAIL_APP_PASSWORD")
 
 template_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "templates")
 template_loader = jinja2.FileSystemLoader(template_dir)
-template_env = jinja2.Environment(loader=template_loader)
+# Names, descriptions and invitation messages are user input: escape them in HTML emails
+template_env = jinja2.Environment(loader=template_loader, autoescape=jinja2.select_autoescape(["html"]))
 
 def render_template(template_filename, **context):
     try:
-        return template_env.get_template(template_filename).render(**context)
+        with span("email.render", template=template_filename):
+            return template_env.get_template(template_filename).render(**context)
     except Exception as e:
         logger.error(f"Template rendering failed for {template_filename}: {str(e)}")
         raise
 
+def _build_message(to_email, subject, html_content, plain_text):
+    message = MIMEMultipart("alternative")
+    message["Subject"] = subject
+    message["From"] = f"SplitFree <{gmail_email}>"
+    message["To"] = to_email
+    
+    part1 = MIMEText(plain_text, "plain")
+    part2 = MIMEText(html_content, "html")
+    
+    message.attach(part1)
+    message.attach(part2)
+    return message
+
+def _open_gmail_session():
+    with span("smtp.connect"):
+        context = ssl.create_default_context()
+        server = smtplib.SMTP("smtp.gmail.com", 587, timeout=30)
+        server.ehlo()
+        server.starttls(context=context)
+        server.ehlo()
+        server.login(gmail_email, gmail_password)
+    return server
+
 def send_email_with_gmail(to_email, subject, html_content, plain_text):
     """
     Send email using Gmail SMTP
@@ -34,33 +63,87 @@ def send_email_with_gmail(to_email, subject, html_content, plain_text):
         logger.error("Missing Gmail credentials (GMAIL_EMAIL or GMAIL_APP_PASSWORD)")
         return {"status": "error", "message": "Missing Gmail credentials"}
     
+    started = time.perf_counter()
     try:
-        message = MIMEMultipart("alternative")
-        message["Subject"] = subject
-        message["From"] = f"SplitFree <{gmail_email}>"
-        message["To"] = to_email
-        
-        part1 = MIMEText(plain_text, "plain")
-        part2 = MIMEText(html_content, "html")
+        message = _build_message(to_email, subject, html_content, plain_text)
         
-        message.attach(part1)
-        message.attach(part2)
-        
-        context = ssl.create_default_context()
-        with smtplib.SMTP("smtp.gmail.com", 587, timeout=30) as server:
-            server.ehlo()
-            server.starttls(context=context)
-            server.ehlo()
-            server.login(gmail_email, gmail_password)
+        with _open_gmail_session() as server, span("smtp.send", recipients=1):
             server.sendmail(gmail_email, to_email, message.as_string())
             
         logger.info(f"Gmail email sent successfully to {to_email}")
+        _record_send_latency(started, "success")
         return {"status": "success", "message": "Email sent successfully via Gmail"}
         
     except Exception as e:
         logger.error(f"Failed to send Gmail email to {to_email}: {str(e)}")
+        _record_send_latency(started, "error")
         return {"status": "error", "message": f"Gmail SMTP error: {str(e)}"}
 
+def _record_send_latency(started, status):
+    """Report the send latency to /metrics through Redis (only when running as an RQ job)."""
+    _record_send_latencies([(time.perf_counter() - started, status)])
+
+def _record_send_latencies(samples):
+    """Report (seconds, status) send latencies to /metrics through Redis in one round trip."""
+    from rq import get_current_job
+
+    job = get_current_job()
+    if job is None or not samples:
+        return
+    try:
+        from utils.metrics import record_email_sends
+        record_email_sends(job.connection, samples)
+    except Exception as e:
+        logger.warning(f"Failed to record email send latency: {str(e)}")
+
+def send_emails_with_gmail(emails):
+    """
+    Send many emails over a single Gmail SMTP session.
+    `emails` is a list of (to_email, subject, html_content, plain_text) tuples.
+    The result lists the addresses that were `delivered` and the ones the server
+    `refused` (retrying those won't help); any other address was not attempted.
+    """
+    if not gmail_email or not gmail_password:
+        logger.error("Missing Gmail credentials (GMAIL_EMAIL or GMAIL_APP_PASSWORD)")
+        return {"status": "error", "message": "Missing Gmail credentials", "sent": 0, "failed": len(emails),
+                "delivered": [], "refused": []}
+
+    if not emails:
+        return {"status": "success", "message": "Nothing to send", "sent": 0, "failed": 0,
+                "delivered": [], "refused": []}
+
+    delivered = []
+    refused = []
+    latencies = []  # (seconds, status) per message; the session setup is not attributed to any
+    try:
+        with _open_gmail_session() as server, span("smtp.send", recipients=len(emails)):
+            for to_email, subject, html_content, plain_text in emails:
+                started = time.perf_counter()
+                try:
+                    message = _build_message(to_email, subject, html_content, plain_text)
+                    server.sendmail(gmail_email, to_email, message.as_string())
+                    delivered.append(to_email)
+                    latencies.append((time.perf_counter() - started, "success"))
+                except smtplib.SMTPRecipientsRefused as e:
+                    # A bad recipient should not abort the rest of the batch
+                    logger.error(f"Failed to send Gmail email to {to_email}: {str(e)}")
+                    refused.append(to_email)
+                    latencies.append((time.perf_counter() - started, "error"))
+                except Exception:
+                    latencies.append((time.perf_counter() - started, "error"))
+                    raise
+    except Exception as e:
+        logger.error(f"Gmail SMTP session failed after {len(delivered)} email(s): {str(e)}")
+        _record_send_latencies(latencies)
+        return {"status": "error", "message": f"Gmail SMTP error: {str(e)}", "sent": len(delivered),
+                "failed": len(emails) - len(delivered), "delivered": delivered, "refused": refused}
+
+    _record_send_latencies(latencies)
+    logger.info(f"Gmail batch sent: {len(delivered)} delivered, {len(refused)} failed")
+    return {"status": "success", "message": "Batch sent via Gmail", "sent": len(delivered), "failed": len(refused),
+            "delivered": delivered, "refused": refused}
+
+@traced_job
 def send_user_registration_email(email, username):
     try:
         html_content = render_template("emails/welcome_email.html", username=username)
@@ -86,33 +169,32 @@ def send_user_registration_email(email, username):
         return {"status": "error", "message": str(e)}
 
 
-def send_group_invitation_email(email, group_name, group_description, invited_by_name, 
-                               member_count, invite_token, group_invite_code, 
-                               expires_at, join_url):
-    """
-    Send group invitation email with both email token and group code
-    """
-    try:
-        # Format expiration date
-        formatted_expires = expires_at.strftime("%B %d, %Y at %I:%M %p UTC")
-        
-        # Render HTML template
-        html_content = render_template("emails/group_invitation.html",
-            group_name=group_name,
-            group_description=group_description,
-            invited_by_name=invited_by_name,
-            member_count=member_count,
-            expires_at=formatted_expires,
-            join_url=join_url,
-            group_invite_code=group_invite_code
-        )
-        
-        # Plain text version
-        plain_text = f"""
+def _render_group_invitation(group_name, group_description, invited_by_name,
+                             member_count, group_invite_code, expires_at, join_url, personal_message=None):
+    """Subject, HTML and plain text of a group invitation email, with the inviter's optional message."""
+    # Format expiration date
+    formatted_expires = expires_at.strftime("%B %d, %Y at %I:%M %p UTC")
+    
+    # Render HTML template
+    html_content = render_template("emails/group_invitation.html",
+        group_name=group_name,
+        group_description=group_description,
+        invited_by_name=invited_by_name,
+        member_count=member_count,
+        expires_at=formatted_expires,
+        join_url=join_url,
+        group_invite_code=group_invite_code,
+        personal_message=personal_message
+    )
+    
+    quoted_message = f'\n"{personal_message}"\n' if personal_message else ""
+
+    # Plain text version
+    plain_text = f"""
 You're Invited to Join {group_name} on SplitFree!
 
 {invited_by_name} has invited you to join their SplitFree group:
-
+{quoted_message}
 Group: {group_name}
 Description: {group_description}
 Members: {member_count} people
@@ -127,9 +209,23 @@ What is SplitFree?
 SplitFree helps groups track shared expenses and settle debts easily.
 
 © 2025 SplitFree - Making expense splitting simple
-        """.strip()
-        
-        subject = f"You're invited to join '{group_name}' on SplitFree!"
+    """.strip()
+    
+    subject = f"You're invited to join '{group_name}' on SplitFree!"
+    return subject, html_content, plain_text
+
+@traced_job
+def send_group_invitation_email(email, group_name, group_description, invited_by_name, 
+                               member_count, invite_token, group_invite_code, 
+                               expires_at, join_url):
+    """
+    Send group invitation email with both email token and group code
+    """
+    try:
+        subject, html_content, plain_text = _render_group_invitation(
+            group_name, group_description, invited_by_name,
+            member_count, group_invite_code, expires_at, join_url
+        )
         
         result = send_email_with_gmail(
             email,
@@ -147,4 +243,458 @@ SplitFree helps groups track shared expenses and settle debts easily.
         
     except Exception as e:
         logger.error(f"Failed to send group invitation to {email}: {str(e)}")
-        return {"status": "error", "message": str(e)}
\ No newline at end of file
+        return {"status": "error", "message": str(e)}
+
+@traced_job
+def send_group_invitation_emails(group_name, group_description, invited_by_name,
+                                 member_count, group_invite_code, invitations, personal_message=None):
+    """
+    Send many invitations to one group over a single SMTP session.
+    `invitations` is a list of {"email", "expires_at", "join_url"} dicts.
+    """
+    try:
+        emails = []
+        for invitation in invitations:
+            subject, html_content, plain_text = _render_group_invitation(
+                group_name, group_description, invited_by_name, member_count,
+                group_invite_code, invitation["expires_at"], invitation["join_url"], personal_message
+            )
+            emails.append((invitation["email"], subject, html_content, plain_text))
+
+        result = send_emails_with_gmail(emails)
+        logger.info(f"Bulk invitations for group {group_name}: "
+                    f"{result.get('sent', 0)} sent, {result.get('failed', 0)} failed")
+        return result
+
+    except Exception as e:
+        logger.error(f"Failed to send bulk invitations for group {group_name}: {str(e)}")
+        return {"status": "error", "message": str(e)}
+
+
+# ---------------------------------------------------------------------------
+# Periodic jobs (run by the RQ scheduler that worker.py enables)
+# ---------------------------------------------------------------------------
+
+_flask_app = None
+
+def _app_context():
+    """Application context for jobs that need the database (one app per worker process)."""
+    global _flask_app
+    if _flask_app is None:
+        from app import create_app
+        _flask_app = create_app(with_api=False)
+    return _flask_app.app_context()
+
+def schedule_periodic_job(queue, func, interval):
+    """
+    Schedule the next run of a periodic job `interval` from now.
+    The job id is derived from the run slot, so several workers (or a worker restart)
+    scheduling the same job collapse into a single run per interval.
+    """
+    run_at = datetime.now(timezone.utc) + interval
+    slot = int(run_at.timestamp() // interval.total_seconds())
+    return queue.enqueue_at(run_at, func, job_id=f"{func.__name__}-{slot}")
+
+def _schedule_next_run(func, interval):
+    """Re-schedule a periodic job from inside its own execution."""
+    from rq import get_current_job, Queue
+
+    job = get_current_job()
+    if job is None:
+        # Called synchronously (e.g. from a shell), nothing to chain
+        return
+    schedule_periodic_job(Queue(job.origin, connection=job.connection), func, interval)
+
+
+def _format_money(value):
+    return f"{float(value):.2f}"
+
+def _collect_digests(events):
+    """
+    Turn pending notification events into one digest per recipient, as
+    {user: (items, event_ids)}. Recipients an event was already delivered to are skipped.
+    Everything is loaded with set-based queries, independent of the number of events.
+    """
+    from db import db
+    from models import (ExpenseModel, ExpenseSplitModel, SettlementModel, GroupModel,
+                        GroupUserModel, UserModel, NotificationDeliveryModel)
+    from utils.notifications import EXPENSE_EVENT, SETTLEMENT_EVENT
+
+    expense_ids = {e.object_id for e in events if e.event_type == EXPENSE_EVENT}
+    settlement_ids = {e.object_id for e in events if e.event_type == SETTLEMENT_EVENT}
+    group_ids = {e.group_id for e in events}
+
+    expenses = {x.id: x for x in ExpenseModel.query.filter(ExpenseModel.id.in_(expense_ids))} if expense_ids else {}
+    settlements = {x.id: x for x in SettlementModel.query.filter(SettlementModel.id.in_(settlement_ids))} if settlement_ids else {}
+    groups = {g.id: g for g in GroupModel.query.filter(GroupModel.id.in_(group_ids))}
+
+    members_by_group = {}
+    for group_id, user_id in db.session.query(GroupUserModel.group_id, GroupUserModel.user_id).filter(
+            GroupUserModel.group_id.in_(group_ids)):
+        members_by_group.setdefault(group_id, []).append(user_id)
+
+    shares = {}
+    if expense_ids:
+        for expense_id, user_id, amount in db.session.query(
+                ExpenseSplitModel.expense_id, ExpenseSplitModel.user_id, ExpenseSplitModel.amount).filter(
+                ExpenseSplitModel.group_id.in_(group_ids), ExpenseSplitModel.expense_id.in_(expense_ids)):
+            shares[(expense_id, user_id)] = amount
+        for expense in expenses.values():
+            for split in (expense.split_items if expense.participants is not None else []):
+                shares[(expense.id, split.user_id)] = split.amount
+
+    user_ids = {uid for ids in members_by_group.values() for uid in ids}
+    user_ids |= {x.paid_by for x in expenses.values()}
+    user_ids |= {x.paid_by for x in settlements.values()} | {x.paid_to for x in settlements.values()}
+    users = {u.id: u for u in UserModel.query.filter(UserModel.id.in_(user_ids))} if user_ids else {}
+
+    delivered = set(db.session.query(NotificationDeliveryModel.event_id, NotificationDeliveryModel.user_id).filter(
+        NotificationDeliveryModel.event_id.in_([e.id for e in events])))
+
+    digests = {}
+    for event in events:
+        group = groups.get(event.group_id)
+        if event.event_type == EXPENSE_EVENT:
+            obj = expenses.get(event.object_id)
+        else:
+            obj = settlements.get(event.object_id)
+        if not group or not obj:
+            # Deleted since it was recorded
+            continue
+
+        for user_id in members_by_group.get(event.group_id, []):
+            if user_id == event.actor_id or (event.id, user_id) in delivered:
+                continue
+            if event.event_type == EXPENSE_EVENT:
+                share = shares.get((obj.id, user_id))
+                item = {
+                    "type": EXPENSE_EVENT,
+                    "group_id": group.id,
+                    "group_name": group.name,
+                    "expense_description": obj.description,
+                    "expense_amount": _format_money(obj.amount),
+                    "payer_name": users[obj.paid_by].username if obj.paid_by in users else "",
+                    "expense_date": obj.date.strftime("%B %d, %Y") if obj.date else "",
+                    "your_share": _format_money(share) if share is not None else None,
+                }
+            else:
+                item = {
+                    "type": SETTLEMENT_EVENT,
+                    "group_id": group.id,
+                    "group_name": group.name,
+                    "settlement_amount": _format_money(obj.amount),
+                    "payer_name": users[obj.paid_by].username if obj.paid_by in users else "",
+                    "payee_name": users[obj.paid_to].username if obj.paid_to in users else "",
+                }
+            items, event_ids = digests.setdefault(user_id, ([], []))
+            items.append(item)
+            event_ids.append(event.id)
+
+    return {users[uid]: digest for uid, digest in digests.items() if uid in users}
+
+def _render_digest(user, items, frontend_url):
+    """Render one email for a user: the single-event template, or a digest of all of them."""
+    if len(items) == 1:
+        item = items[0]
+        template = f"emails/{item['type']}_notification.html"
+        html_content = render_template(template, username=user.username, frontend_url=frontend_url, **item)
+        if item["type"] == "expense":
+            subject = f"New expense in '{item['group_name']}': {item['expense_description']}"
+            plain_text = (f"{item['payer_name']} added '{item['expense_description']}' "
+                          f"(${item['expense_amount']}) to {item['group_name']}.")
+        else:
+            subject = f"New settlement in '{item['group_name']}'"
+            plain_text = (f"{item['payer_name']} paid {item['payee_name']} "
+                          f"${item['settlement_amount']} in {item['group_name']}.")
+        return subject, html_content, plain_text
+
+    html_content = render_template("emails/activity_digest.html",
+        username=user.username,
+        items=items,
+        frontend_url=frontend_url
+    )
+    lines = []
+    for item in items:
+        if item["type"] == "expense":
+            lines.append(f"- [{item['group_name']}] {item['payer_name']} added "
+                         f"'{item['expense_description']}' (${item['expense_amount']})")
+        else:
+            lines.append(f"- [{item['group_name']}] {item['payer_name']} paid "
+                         f"{item['payee_name']} ${item['settlement_amount']}")
+    plain_text = f"Hi {user.username}, here is what happened in your groups:\n\n" + "\n".join(lines)
+    subject = f"{len(items)} new updates in your SplitFree groups"
+    return subject, html_content, plain_text
+
+def _defer_notification_events(events, now):
+    """
+    Count a failed run against each event and back it off (doubling from one digest
+    window), so it stops blocking newer events; after NOTIFICATION_DIGEST_MAX_ATTEMPTS
+    it is dropped (marked processed). Returns the ids of the dropped events.
+    """
+    from config import NOTIFICATION_DIGEST_WINDOW_MINUTES, NOTIFICATION_DIGEST_MAX_ATTEMPTS
+    from models import NotificationDeliveryModel
+
+    dropped = []
+    for event in events:
+        event.attempts += 1
+        if event.attempts >= NOTIFICATION_DIGEST_MAX_ATTEMPTS:
+            event.processed_at = now
+            dropped.append(event.id)
+        else:
+            event.next_attempt_at = now + timedelta(
+                minutes=NOTIFICATION_DIGEST_WINDOW_MINUTES * 2 ** (event.attempts - 1))
+    if dropped:
+        NotificationDeliveryModel.query.filter(NotificationDeliveryModel.event_id.in_(dropped)).delete(
+            synchronize_session=False)
+    return dropped
+
+@traced_job
+def send_group_activity_digests():
+    """
+    Fan out pending expense/settlement events as one email per recipient.
+    Runs every NOTIFICATION_DIGEST_WINDOW_MINUTES, so all events recorded in a window
+    are coalesced per user, and all emails go out over a single SMTP session.
+    """
+    from config import NOTIFICATION_DIGEST_WINDOW_MINUTES, NOTIFICATION_DIGEST_BATCH_SIZE
+
+    interval = timedelta(minutes=NOTIFICATION_DIGEST_WINDOW_MINUTES)
+    try:
+        # Nothing could be sent; leave the events untouched until the server is configured
+        if not gmail_email or not gmail_password:
+            logger.error("Activity digests skipped: missing Gmail credentials (GMAIL_EMAIL or GMAIL_APP_PASSWORD)")
+            return {"status": "error", "message": "Missing Gmail credentials", "events": 0, "emails": 0}
+
+        with _app_context():
+            from db import db
+            from models import NotificationEventModel, NotificationDeliveryModel
+
+            now = datetime.utcnow()
+            events = (NotificationEventModel.query
+                      .filter(NotificationEventModel.processed_at.is_(None),
+                              db.or_(NotificationEventModel.next_attempt_at.is_(None),
+                                     NotificationEventModel.next_attempt_at <= now))
+                      .order_by(NotificationEventModel.id)
+                      .limit(NOTIFICATION_DIGEST_BATCH_SIZE)
+                      .all())
+            if not events:
+                return {"status": "success", "events": 0, "emails": 0}
+
+            try:
+                frontend_url = os.getenv("FRONTEND_URL", "http://localhost:3000")
+                digests = _collect_digests(events)
+                emails = []
+                for user, (items, _) in digests.items():
+                    subject, html_content, plain_text = _render_digest(user, items, frontend_url)
+                    emails.append((user.email, subject, html_content, plain_text))
+
+                result = send_emails_with_gmail(emails)
+            except Exception:
+                db.session.rollback()
+                dropped = _defer_notification_events(events, now)
+                db.session.commit()
+                logger.exception(f"Activity digests failed; {len(events) - len(dropped)} event(s) deferred, "
+                                 f"{len(dropped)} dropped")
+                raise
+
+            # Remember who got what, so a retry only goes to the recipients that were missed
+            delivered = set(result["delivered"])
+            db.session.add_all(NotificationDeliveryModel(event_id=event_id, user_id=user.id)
+                               for user, (_, event_ids) in digests.items() if user.email in delivered
+                               for event_id in event_ids)
+
+            # Events with a recipient still waiting are retried later; refused addresses are not retried
+            handled = delivered | set(result["refused"])
+            pending = {event_id for user, (_, event_ids) in digests.items() if user.email not in handled
+                       for event_id in event_ids}
+            dropped = _defer_notification_events([e for e in events if e.id in pending], now)
+            event_ids = [e.id for e in events if e.id not in pending]
+            if event_ids:
+                NotificationEventModel.query.filter(NotificationEventModel.id.in_(event_ids)).update(
+                    {NotificationEventModel.processed_at: now}, synchronize_session=False)
+                NotificationDeliveryModel.query.filter(NotificationDeliveryModel.event_id.in_(event_ids)).delete(
+                    synchronize_session=False)
+            db.session.commit()
+
+            if pending:
+                logger.error(f"Activity digests: {len(pending) - len(dropped)} event(s) deferred for retry, "
+                             f"{len(dropped)} dropped: {result['message']}")
+            logger.info(f"Activity digests: {len(event_ids)} event(s) -> {len(delivered)} email(s)")
+            return {"status": result["status"], "events": len(event_ids), "emails": len(delivered)}
+    finally:
+        _schedule_next_run(send_group_activity_digests, interval)
+
+@traced_job
+def compact_change_log():
+    """
+    Drop delta-sync change log rows older than CHANGE_LOG_RETENTION_DAYS.
+    Each affected group's change_log_floor is raised first, so a client whose version
+    falls into the removed range is told to resync instead of silently missing changes.
+    """
+    from config import CHANGE_LOG_RETENTION_DAYS, CHANGE_LOG_COMPACTION_BATCH_SIZE
+
+    interval = timedelta(days=1)
+    try:
+        with _app_context():
+            from db import db
+            from models import GroupChangeModel, GroupModel
+
+            horizon = datetime.utcnow() - timedelta(days=CHANGE_LOG_RETENTION_DAYS)
+
+            floors = (db.session.query(GroupChangeModel.group_id, db.func.max(GroupChangeModel.id))
+                      .filter(GroupChangeModel.created_at < horizon)
+                      .group_by(GroupChangeModel.group_id)
+                      .all())
+            for group_id, floor in floors:
+                GroupModel.query.filter(
+                    GroupModel.id == group_id, GroupModel.change_log_floor < floor
+                ).update({GroupModel.change_log_floor: floor}, synchronize_session=False)
+            db.session.commit()
+
+            deleted = 0
+            while True:
+                ids = [row[0] for row in db.session.query(GroupChangeModel.id)
+                       .filter(GroupChangeModel.created_at < horizon)
+                       .order_by(GroupChangeModel.id)
+                       .limit(CHANGE_LOG_COMPACTION_BATCH_SIZE)]
+                if not ids:
+                    break
+                GroupChangeModel.query.filter(GroupChangeModel.id.in_(ids)).delete(synchronize_session=False)
+                db.session.commit()
+                deleted += len(ids)
+
+            logger.info(f"Change log compacted: {deleted} row(s) removed from {len(floors)} group(s)")
+            return {"status": "success", "deleted": deleted, "groups": len(floors)}
+    finally:
+        _schedule_next_run(compact_change_log, interval)
+
+@traced_job
+def purge_stale_invitations():
+    """
+    Delete invitations that expired or were used more than INVITATION_PURGE_GRACE_HOURS ago.
+    Works in batches of INVITATION_PURGE_BATCH_SIZE so it never holds long locks.
+    """
+    from config import (INVITATION_SWEEP_INTERVAL_MINUTES, INVITATION_PURGE_GRACE_HOURS,
+                        INVITATION_PURGE_BATCH_SIZE)
+
+    interval = timedelta(minutes=INVITATION_SWEEP_INTERVAL_MINUTES)
+    try:
+        with _app_context():
+            from db import db
+            from models import GroupInvitationModel
+
+            cutoff = datetime.utcnow() - timedelta(hours=INVITATION_PURGE_GRACE_HOURS)
+
+            # One pass per condition, so each is a range scan on its own index
+            purged = 0
+            for stale in (GroupInvitationModel.expires_at < cutoff, GroupInvitationModel.used_at < cutoff):
+                while True:
+                    ids = [row[0] for row in db.session.query(GroupInvitationModel.id)
+                           .filter(stale)
+                           .limit(INVITATION_PURGE_BATCH_SIZE)]
+                    if not ids:
+                        break
+                    GroupInvitationModel.query.filter(GroupInvitationModel.id.in_(ids)).delete(
+                        synchronize_session=False)
+                    db.session.commit()
+                    purged += len(ids)
+
+            logger.info(f"Invitation sweep: {purged} stale invitation(s) purged")
+            return {"status": "success", "purged": purged}
+    finally:
+        _schedule_next_run(purge_stale_invitations, interval)
+
+@traced_job
+def checkpoint_group_balances():
+    """
+    Take a balance checkpoint for groups whose ledger grew by BALANCE_CHECKPOINT_MIN_ROWS
+    rows since their last one. A group that is written to concurrently is skipped until
+    the next run.
+    """
+    from config import (BALANCE_CHECKPOINT_INTERVAL_MINUTES, BALANCE_CHECKPOINT_MIN_ROWS,
+                        BALANCE_CHECKPOINT_BATCH_GROUPS)
+
+    interval = timedelta(minutes=BALANCE_CHECKPOINT_INTERVAL_MINUTES)
+    try:
+        with _app_context():
+            from db import db
+            from utils.balances import groups_needing_checkpoint, create_balance_checkpoint
+            from utils.concurrency import ConcurrentUpdateError
+
+            group_ids = groups_needing_checkpoint(BALANCE_CHECKPOINT_MIN_ROWS, BALANCE_CHECKPOINT_BATCH_GROUPS)
+            created = skipped = 0
+            for group_id in group_ids:
+                try:
+                    if create_balance_checkpoint(group_id):
+                        created += 1
+                    db.session.commit()
+                except ConcurrentUpdateError:
+                    db.session.rollback()
+                    skipped += 1
+
+            logger.info(f"Balance checkpoints: {created} created, {skipped} skipped (busy)")
+            return {"status": "success", "created": created, "skipped": skipped}
+    finally:
+        _schedule_next_run(checkpoint_group_balances, interval)
+
+# ---------------------------------------------------------------------------
+# Background exports
+# ---------------------------------------------------------------------------
+
+def _export_dir():
+    import tempfile
+    return os.getenv("EXPORT_DIR", os.path.join(tempfile.gettempdir(), "splitfree-exports"))
+
+@traced_job
+def export_group_data(group_id, fmt, compress=False, include_archived=True):
+    """
+    Write a group export to EXPORT_DIR (shared with the API) for later download.
+    Used for groups too large to stream within a request timeout.
+    """
+    import tempfile
+    from utils.export import export_chunks, export_filename
+    from utils.archive import archived_through
+
+    export_dir = _export_dir()
+    os.makedirs(export_dir, exist_ok=True)
+
+    with _app_context():
+        filename = export_filename(group_id, fmt, compress)
+        fd, path = tempfile.mkstemp(prefix=f"group-{group_id}-", suffix=f"-{filename}", dir=export_dir)
+        size = 0
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for chunk in export_chunks(group_id, fmt, compress, include_archived):
+                    f.write(chunk)
+                    size += len(chunk)
+        except Exception:
+            os.remove(path)
+            raise
+        archived_date = archived_through(group_id)
+
+    logger.info(f"Export of group {group_id} written to {path} ({size} bytes)")
+    return {"status": "success", "path": path, "filename": filename, "size": size,
+            "archived_through": archived_date.isoformat() if archived_date else None}
+
+@traced_job
+def purge_expired_exports():
+    """Delete export files older than EXPORT_RESULT_TTL_SECONDS (their jobs have expired too)."""
+    from config import EXPORT_RESULT_TTL_SECONDS
+
+    interval = timedelta(hours=1)
+    try:
+        export_dir = _export_dir()
+        if not os.path.isdir(export_dir):
+            return {"status": "success", "removed": 0}
+
+        cutoff = time.time() - EXPORT_RESULT_TTL_SECONDS
+        removed = 0
+        for entry in os.scandir(export_dir):
+            if entry.is_file() and entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+                removed += 1
+
+        logger.info(f"Export sweep: {removed} expired file(s) removed")
+        return {"status": "success", "removed": removed}
+    finally:
+        _schedule_next_run(purge_expired_exports, interval)
+
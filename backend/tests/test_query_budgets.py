@@ -0,0 +1,46 @@
+"""
+Query budgets (benchmarks/query_budgets.py) as a pytest suite: every request of the
+BUDGETS table runs under assert_max_queries at the small and the large group size,
+and a request over its budget (or failing, or missing eagerly loaded data) fails.
+"""
+
+import os
+
+import pytest
+
+from benchmarks.query_budgets import BUDGETS, GroupSize, run_size
+
+SIZES = {
+    "small": GroupSize("small", 3, 6, settlements=2, other_groups=1),
+    "large": GroupSize("large", 40, 90, settlements=30, other_groups=12),
+}
+
+
+@pytest.fixture(scope="session")
+def app(tmp_path_factory):
+    os.environ.setdefault("JWT_SECRET_KEY", "test-secret-key-not-for-production")
+    from app import create_app
+
+    return create_app(f"sqlite:///{tmp_path_factory.mktemp('budgets') / 'splitfree.db'}")
+
+
+@pytest.fixture(scope="session")
+def results(app):
+    """{size name: (counts, violations)}; each size seeds its own database and runs every request once."""
+    cache = {}
+
+    def run(name):
+        if name not in cache:
+            cache[name] = run_size(app, SIZES[name])
+        return cache[name]
+    return run
+
+
+@pytest.mark.parametrize("size", list(SIZES))
+@pytest.mark.parametrize("key", list(BUDGETS))
+def test_request_within_budget(results, size, key):
+    counts, violations = results(size)
+    prefix = f"{key} [{size}]"
+    problems = [violation for violation in violations if violation.startswith(prefix)]
+    assert not problems, "\n".join(problems)
+    assert counts[key][0] <= BUDGETS[key]
@@ -0,0 +1,179 @@
+"""
+Cold storage for a group's old expenses.
+
+Archiving moves expenses dated before a cutoff (and their splits) out of the hot
+expenses/expense_splits tables into group_archives rows, in batches of
+ARCHIVE_BATCH_SIZE expenses. Each row keeps:
+
+- the closing balance contribution of its expenses as debtor -> creditor edges, so
+  balance computations add the archived edges instead of replaying archived rows;
+- the expenses themselves as a compressed JSON blob, so /history and exports can
+  still show them.
+
+Archived expenses leave the hot tables, so each one is logged as an expense DELETE
+for delta sync (/group/<id>/changes); clients find them in /history afterwards.
+
+Balances are additive, so an archive is exact no matter which expenses it holds.
+Settlements stay in the hot table (one row each, and they carry no date).
+"""
+
+import json
+import zlib
+from datetime import date
+from decimal import Decimal
+
+from db import db
+from models import ExpenseModel, ExpenseSplitModel, GroupArchiveModel, BalanceCheckpointModel
+from utils.concurrency import read_group_version, bump_group_version
+from utils.splits import delete_participant_rows
+from utils.change_log import record_changes, EXPENSE, DELETE
+from config import ARCHIVE_BATCH_SIZE
+
+
+def _edges(expenses):
+    """Net debtor -> creditor amounts for a list of (expense, splits)."""
+    totals = {}
+    for expense, splits in expenses:
+        for split in splits:
+            if split.user_id == expense.paid_by:
+                continue
+            key = (split.user_id, expense.paid_by)
+            totals[key] = totals.get(key, Decimal("0")) + split.amount
+    return [[debtor, creditor, str(amount)] for (debtor, creditor), amount in sorted(totals.items()) if amount]
+
+
+def _payload(expenses):
+    items = [{
+        "id": expense.id,
+        "description": expense.description,
+        "amount": str(expense.amount),
+        "split_type": expense.split_type,
+        "date": expense.date.isoformat() if expense.date else None,
+        "paid_by": expense.paid_by,
+        "splits": [{"user_id": s.user_id, "amount": str(s.amount)} for s in splits]
+    } for expense, splits in expenses]
+    return zlib.compress(json.dumps(items, separators=(",", ":")).encode(), 9)
+
+
+def _load_batch(group_id, before, batch_size):
+    expenses = (ExpenseModel.query
+                .filter(ExpenseModel.group_id == group_id, ExpenseModel.date < before)
+                .order_by(ExpenseModel.id)
+                .limit(batch_size)
+                .all())
+    if not expenses:
+        return []
+
+    splits = {}
+    for split in (ExpenseSplitModel.query
+                  .filter(ExpenseSplitModel.group_id == group_id,
+                          ExpenseSplitModel.expense_id.in_([e.id for e in expenses]))
+                  .order_by(ExpenseSplitModel.id)):
+        splits.setdefault(split.expense_id, []).append(split)
+    return [(expense, expense.split_items if expense.participants is not None else splits.get(expense.id, []))
+            for expense in expenses]
+
+
+def archive_group_expenses(group_id, before, archived_by=None, batch_size=ARCHIVE_BATCH_SIZE):
+    """
+    Archive every expense of the group dated before `before`.
+    Each batch commits on its own (archive row + deletes + version bump), so a failure
+    part-way leaves the group consistent. Returns the created archive rows.
+    """
+    archives = []
+    while True:
+        group_version = read_group_version(group_id)
+        batch = _load_batch(group_id, before, batch_size)
+        if not batch:
+            return archives
+
+        dates = [expense.date for expense, _ in batch]
+        archive = GroupArchiveModel(
+            group_id=group_id,
+            archived_by=archived_by,
+            first_date=min(dates),
+            last_date=max(dates),
+            max_expense_id=batch[-1][0].id,
+            expense_count=len(batch),
+            split_count=sum(len(splits) for _, splits in batch),
+            edges=json.dumps(_edges(batch)),
+            payload=_payload(batch)
+        )
+        db.session.add(archive)
+
+        expense_ids = [expense.id for expense, _ in batch]
+        delete_participant_rows(expense_ids)
+        ExpenseSplitModel.query.filter(ExpenseSplitModel.group_id == group_id,
+                                       ExpenseSplitModel.expense_id.in_(expense_ids)).delete(synchronize_session=False)
+        ExpenseModel.query.filter(ExpenseModel.id.in_(expense_ids)).delete(synchronize_session=False)
+        record_changes(group_id, EXPENSE, expense_ids, DELETE)
+
+        # Bulk deletes skip the session hooks, so drop the group's balance checkpoints here
+        BalanceCheckpointModel.query.filter(BalanceCheckpointModel.group_id == group_id).delete(
+            synchronize_session=False)
+
+        # Balances and cached summaries keyed by version must see the move atomically
+        bump_group_version(group_id, group_version)
+        db.session.commit()
+        db.session.expire_all()
+        archives.append(archive)
+
+
+def archived_edges(group_ids):
+    """{group_id: {(debtor, creditor): float}} summed over every archive of the groups."""
+    result = {}
+    if not group_ids:
+        return result
+    rows = db.session.query(GroupArchiveModel.group_id, GroupArchiveModel.edges).filter(
+        GroupArchiveModel.group_id.in_(list(group_ids))
+    )
+    for group_id, edges in rows:
+        per_group = result.setdefault(group_id, {})
+        for debtor, creditor, amount in json.loads(edges):
+            per_group[(debtor, creditor)] = per_group.get((debtor, creditor), 0.0) + float(amount)
+    return result
+
+
+def archived_through(group_id):
+    """Date of the newest archived expense of the group, or None if nothing is archived."""
+    return db.session.query(db.func.max(GroupArchiveModel.last_date)).filter(
+        GroupArchiveModel.group_id == group_id).scalar()
+
+
+def iter_archived_expenses(group_id):
+    """Archived expenses as stored in the payloads, decompressing one archive at a time."""
+    payloads = (db.select(GroupArchiveModel.payload)
+                .where(GroupArchiveModel.group_id == group_id)
+                .order_by(GroupArchiveModel.id)
+                .execution_options(yield_per=1))
+    for payload in db.session.scalars(payloads):
+        yield from json.loads(zlib.decompress(payload))
+
+
+def archived_history_items(group_id):
+    """Archived expenses in /history item shape, oldest archive first."""
+    items = []
+    for expense in iter_archived_expenses(group_id):
+        splits = []
+        for split in expense["splits"]:
+            owed = float(split["amount"])
+            paid = owed if split["user_id"] == expense["paid_by"] else 0.0
+            splits.append({
+                "user_id": split["user_id"],
+                "owed": round(owed, 2),
+                "paid": round(paid, 2),
+                "remaining": round(owed - paid, 2)
+            })
+        items.append({
+            "id": expense["id"],
+            "type": "expense",
+            "description": expense["description"],
+            "amount": float(expense["amount"]),
+            "date": date.fromisoformat(expense["date"]) if expense["date"] else None,
+            "paid_by": expense["paid_by"],
+            "paid_to": None,
+            "group_id": group_id,
+            "splits": splits,
+            "archived": True
+        })
+    return items
@@ -0,0 +1,193 @@
+"""
+Net balance arithmetic over ledger columns.
+
+The ledger is read by a column-only query returning three integer columns -
+creditor id, debtor id, amount in cents - and summed per user: the creditor gains
+the amount, the debtor loses it. Integer cents keep every path exact and identical.
+
+- On PostgreSQL (psycopg2) with NumPy installed the query is streamed with
+  COPY ... (FORMAT binary) straight into int64 arrays, skipping per-row Python
+  objects, and folded with np.bincount BALANCE_ENGINE_BATCH_ROWS rows at a time.
+  Peak memory is one batch - 38 bytes of COPY buffer and 24 bytes of arrays per
+  row, ~6 MB at the default batch size - plus the bincount over the batch's id span,
+  whatever the size of the group.
+- Everywhere else rows are fetched in batches of BALANCE_ENGINE_BATCH_ROWS and
+  folded by a dict loop. Rows that already are Python tuples are slower to copy
+  into arrays than to add up directly, so NumPy is not used for them by default.
+
+NumPy is optional: install it on PostgreSQL servers that host very large groups. It
+is imported on first use so that app startup does not pay for it.
+"""
+
+from itertools import chain
+
+from sqlalchemy import BigInteger, cast, select
+
+from db import db
+from config import BALANCE_ENGINE_BATCH_ROWS
+
+np = None  # The numpy module once _load_numpy() found it
+_COPY_ROW = None
+_numpy_loaded = False
+
+_COPY_SIGNATURE = b"PGCOPY\n\xff\r\n\x00"
+
+# Above this id span a per-batch np.bincount would allocate more than it saves
+_MAX_DENSE_SPAN = 1 << 20
+
+
+def _load_numpy():
+    global np, _COPY_ROW, _numpy_loaded
+    if not _numpy_loaded:
+        _numpy_loaded = True
+        try:
+            import numpy
+        except ImportError:
+            return None
+        np = numpy
+        # Binary COPY rows of three NOT NULL bigints: field count, then (length, value) per column
+        _COPY_ROW = np.dtype([
+            ("fields", ">i2"),
+            ("creditor_len", ">i4"), ("creditor", ">i8"),
+            ("debtor_len", ">i4"), ("debtor", ">i8"),
+            ("cents_len", ">i4"), ("cents", ">i8"),
+        ])
+    return np
+
+
+def numpy_available():
+    return _load_numpy() is not None
+
+
+def _fold_arrays(creditors, debtors, cents, totals):
+    if not len(cents):
+        return
+    low = int(min(creditors.min(), debtors.min()))
+    span = int(max(creditors.max(), debtors.max())) - low + 1
+    weights = cents.astype(np.float64)
+    # Payer == user rows cancel out on their own
+    if span <= _MAX_DENSE_SPAN:
+        net = (np.bincount(creditors - low, weights=weights, minlength=span)
+               - np.bincount(debtors - low, weights=weights, minlength=span))
+        user_ids = np.flatnonzero(net)
+        net = net[user_ids]
+        user_ids += low
+    else:
+        user_ids, index = np.unique(np.concatenate([creditors, debtors]), return_inverse=True)
+        net = np.bincount(index, weights=np.concatenate([weights, -weights]), minlength=len(user_ids))
+    for user_id, amount in zip(user_ids.tolist(), net.tolist()):
+        totals[user_id] = totals.get(user_id, 0) + int(round(amount))
+
+
+def _fold_rows_numpy(rows, totals):
+    columns = np.fromiter(chain.from_iterable(rows), dtype=np.int64, count=3 * len(rows)).reshape(-1, 3)
+    _fold_arrays(columns[:, 0], columns[:, 1], columns[:, 2], totals)
+
+
+def _fold_rows_python(rows, totals):
+    for creditor, debtor, cents in rows:
+        if creditor != debtor:
+            totals[creditor] = totals.get(creditor, 0) + cents
+            totals[debtor] = totals.get(debtor, 0) - cents
+
+
+def net_cents(batches, use_numpy=None):
+    """
+    {user_id: net cents} over batches (lists) of (creditor_id, debtor_id, cents) rows;
+    users whose net is zero are left out. `use_numpy` forces an engine; by default
+    the Python fold is used (see the module docstring).
+    """
+    use_numpy = bool(use_numpy)
+    if use_numpy and _load_numpy() is None:
+        raise RuntimeError("NumPy is not installed")
+
+    fold = _fold_rows_numpy if use_numpy else _fold_rows_python
+    totals = {}
+    for rows in batches:
+        if rows:
+            fold(rows, totals)
+    return {user_id: cents for user_id, cents in totals.items() if cents}
+
+
+class _CopyFold:
+    """
+    File-like COPY target that folds whole rows into `totals` every `batch_rows` rows,
+    so at most one batch of the binary stream is held in memory at a time.
+    """
+
+    def __init__(self, totals, batch_rows):
+        self.totals = totals
+        self.batch_bytes = batch_rows * _COPY_ROW.itemsize
+        self.pending = bytearray()
+        self.header_read = False
+
+    def write(self, data):
+        self.pending += data
+        if len(self.pending) >= self.batch_bytes:
+            self._fold()
+
+    def _fold(self):
+        if not self.header_read:
+            # Header: signature, flags (int32), extension length (int32) + extension
+            if len(self.pending) < 19:
+                return
+            if bytes(self.pending[:11]) != _COPY_SIGNATURE:
+                raise ValueError("Unexpected COPY output")
+            start = 19 + int.from_bytes(self.pending[15:19], "big")
+            if len(self.pending) < start:
+                return
+            self.pending = self.pending[start:]
+            self.header_read = True
+
+        count = len(self.pending) // _COPY_ROW.itemsize
+        if not count:
+            return
+        rows = np.frombuffer(self.pending, dtype=_COPY_ROW, count=count)
+        if (rows["fields"] != 3).any() or (rows["cents_len"] != 8).any():
+            raise ValueError("Unexpected COPY row layout")
+        _fold_arrays(rows["creditor"].astype(np.int64), rows["debtor"].astype(np.int64),
+                     rows["cents"].astype(np.int64), self.totals)
+        del rows
+        self.pending = self.pending[count * _COPY_ROW.itemsize:]
+
+    def close(self):
+        self._fold()
+        # Trailer: int16 -1
+        if not self.header_read or bytes(self.pending) != b"\xff\xff":
+            raise ValueError("Unexpected COPY output")
+
+
+def _copy_fold(connection, statement, totals):
+    """Run `statement` through binary COPY, folding (creditor, debtor, cents) rows into `totals`."""
+    # Fixed-width rows: every column as a bigint
+    columns = statement.subquery()
+    statement = select(*[cast(column, BigInteger) for column in columns.c])
+    sql = str(statement.compile(dialect=connection.dialect, compile_kwargs={"literal_binds": True}))
+    target = _CopyFold(totals, BALANCE_ENGINE_BATCH_ROWS)
+    with connection.connection.cursor() as cursor:
+        cursor.copy_expert(f"COPY ({sql}) TO STDOUT WITH (FORMAT binary)", target)
+    target.close()
+
+
+def ledger_net_cents(statements, use_numpy=None):
+    """
+    {user_id: net cents} over column-only selects of (creditor_id, debtor_id, cents),
+    run in the current session's transaction. Same contract as net_cents(), except that
+    by default NumPy is used whenever the binary COPY path is available.
+    """
+    connection = db.session.connection()
+    copy_available = connection.dialect.name == "postgresql" and connection.dialect.driver == "psycopg2"
+    use_numpy = copy_available and numpy_available() if use_numpy is None else use_numpy
+    if use_numpy and _load_numpy() is None:
+        raise RuntimeError("NumPy is not installed")
+    if use_numpy and copy_available:
+        totals = {}
+        for statement in statements:
+            _copy_fold(connection, statement, totals)
+        return {user_id: cents for user_id, cents in totals.items() if cents}
+
+    batches = chain.from_iterable(
+        db.session.execute(statement.execution_options(yield_per=BALANCE_ENGINE_BATCH_ROWS)).partitions()
+        for statement in statements
+    )
+    return net_cents(batches, use_numpy)
@@ -0,0 +1,157 @@
+"""
+Cross-group balance summary for one user (GET /user/me/balances).
+
+Rather than running _compute_balances once per group, the caller's position against
+every counterparty in every group comes from a single aggregate: a UNION ALL of the
+ways money moves between the caller and someone else, summed per
+(group, counterparty) and restricted to groups the caller belongs to, plus compact
+equal splits the caller paid (one row per participant set, see utils/splits.py) and
+the closing balances of archived expenses (see utils/archive.py).
+
+Summaries are cached under a fingerprint of the caller's (group_id, version) pairs.
+Every expense and settlement write bumps groups.version, so any change produces a new
+key and stale entries just age out - no explicit invalidation is needed.
+"""
+
+import hashlib
+
+from flask import current_app
+from sqlalchemy import select, union_all, func
+
+from db import db
+from models import GroupModel, GroupUserModel, UserModel, ExpenseModel, ExpenseSplitModel, SettlementModel
+from config import BALANCE_SUMMARY_CACHE_TTL_SECONDS
+from utils.preview_cache import read_through
+from utils.archive import archived_edges
+from utils.splits import COMPACT, has_participant, expand_participants
+
+
+def _memberships(user_id):
+    """(group_id, name, version) for every group the user belongs to."""
+    return db.session.execute(
+        select(GroupModel.id, GroupModel.name, GroupModel.version)
+        .join(GroupUserModel, GroupUserModel.group_id == GroupModel.id)
+        .where(GroupUserModel.user_id == user_id)
+        .order_by(GroupModel.id)
+    ).all()
+
+
+def _fingerprint(user_id, memberships):
+    versions = ",".join(f"{group_id}:{version}" for group_id, _, version in memberships)
+    return f"{user_id}:{hashlib.blake2b(versions.encode(), digest_size=16).hexdigest()}"
+
+
+def _aggregate_positions(user_id, group_ids):
+    """
+    {group_id: {counterparty_id: amount}} from two aggregate queries.
+    A positive amount means the counterparty owes the user.
+    """
+    movements = union_all(
+        # Someone else paid, the user has a share: the user owes the payer
+        select(ExpenseModel.group_id, ExpenseModel.paid_by.label("counterparty"),
+               (-ExpenseSplitModel.amount).label("amount"))
+        .join(ExpenseSplitModel, (ExpenseSplitModel.expense_id == ExpenseModel.id)
+              & (ExpenseSplitModel.group_id == ExpenseModel.group_id))
+        .where(ExpenseSplitModel.user_id == user_id, ExpenseModel.paid_by != user_id),
+        # The user paid, someone else has a share: they owe the user
+        select(ExpenseModel.group_id, ExpenseSplitModel.user_id, ExpenseSplitModel.amount)
+        .join(ExpenseSplitModel, (ExpenseSplitModel.expense_id == ExpenseModel.id)
+              & (ExpenseSplitModel.group_id == ExpenseModel.group_id))
+        .where(ExpenseModel.paid_by == user_id, ExpenseSplitModel.user_id != user_id),
+        # Someone else paid a compact equal split the user takes part in
+        select(ExpenseModel.group_id, ExpenseModel.paid_by, -ExpenseModel.share_amount)
+        .where(ExpenseModel.group_id.in_(group_ids), COMPACT, has_participant(user_id),
+               ExpenseModel.paid_by != user_id),
+        # Settlements paid by the user
+        select(SettlementModel.group_id, SettlementModel.paid_to, SettlementModel.amount)
+        .where(SettlementModel.paid_by == user_id),
+        # Settlements received by the user
+        select(SettlementModel.group_id, SettlementModel.paid_by, -SettlementModel.amount)
+        .where(SettlementModel.paid_to == user_id),
+    ).subquery()
+
+    rows = db.session.execute(
+        select(movements.c.group_id, movements.c.counterparty, func.sum(movements.c.amount))
+        .join(GroupUserModel, (GroupUserModel.group_id == movements.c.group_id)
+              & (GroupUserModel.user_id == user_id))
+        .group_by(movements.c.group_id, movements.c.counterparty)
+    ).all()
+
+    positions = {}
+    for group_id, counterparty, amount in rows:
+        positions.setdefault(group_id, {})[counterparty] = float(amount or 0)
+
+    # The user paid compact equal splits: every other participant owes them the share,
+    # summed per distinct participant set before expanding
+    shared = db.session.execute(
+        select(ExpenseModel.group_id, ExpenseModel.participants, func.sum(ExpenseModel.share_amount))
+        .where(ExpenseModel.group_id.in_(group_ids), COMPACT, ExpenseModel.paid_by == user_id)
+        .group_by(ExpenseModel.group_id, ExpenseModel.participants)
+    ).all()
+    for group_id, counterparty, amount in expand_participants(shared):
+        if counterparty != user_id:
+            per_group = positions.setdefault(group_id, {})
+            per_group[counterparty] = per_group.get(counterparty, 0.0) + float(amount)
+
+    # Archived expenses are folded in from their closing balance edges
+    for group_id, edges in archived_edges(group_ids).items():
+        per_group = positions.setdefault(group_id, {})
+        for (debtor, creditor), amount in edges.items():
+            if debtor == user_id:
+                per_group[creditor] = per_group.get(creditor, 0.0) - amount
+            elif creditor == user_id:
+                per_group[debtor] = per_group.get(debtor, 0.0) + amount
+    return positions
+
+
+def _build_summary(memberships, positions):
+    counterparty_ids = {uid for per_group in positions.values() for uid in per_group}
+    usernames = {}
+    if counterparty_ids:
+        usernames = dict(db.session.execute(
+            select(UserModel.id, UserModel.username).where(UserModel.id.in_(counterparty_ids))
+        ).all())
+
+    groups = []
+    totals = {}
+    for group_id, name, _ in memberships:
+        counterparties = []
+        for uid, amount in sorted(positions.get(group_id, {}).items()):
+            if abs(amount) < 0.005:
+                continue
+            totals[uid] = totals.get(uid, 0.0) + amount
+            counterparties.append({"user_id": uid, "username": usernames.get(uid), "balance": round(amount, 2)})
+        groups.append({
+            "group_id": group_id,
+            "group_name": name,
+            "balance": round(sum(c["balance"] for c in counterparties), 2),
+            "counterparties": counterparties
+        })
+
+    counterparties = [
+        {"user_id": uid, "username": usernames.get(uid), "balance": round(amount, 2)}
+        for uid, amount in sorted(totals.items()) if abs(amount) >= 0.005
+    ]
+    owed_to_you = sum(c["balance"] for c in counterparties if c["balance"] > 0)
+    you_owe = -sum(c["balance"] for c in counterparties if c["balance"] < 0)
+
+    return {
+        "owed_to_you": round(owed_to_you, 2),
+        "you_owe": round(you_owe, 2),
+        "net": round(owed_to_you - you_owe, 2),
+        "groups": groups,
+        "counterparties": counterparties
+    }
+
+
+def user_balance_summary(user_id):
+    """Cached summary; cache failures fall back to computing it directly."""
+    # Versions are read before the balances, so a concurrent write can only leave
+    # newer data under an already-outdated key, never stale data under a current one
+    memberships = _memberships(user_id)
+    return read_through(
+        getattr(current_app, "balance_cache", None),
+        _fingerprint(user_id, memberships),
+        lambda: _build_summary(memberships, _aggregate_positions(user_id, [m[0] for m in memberships])),
+        BALANCE_SUMMARY_CACHE_TTL_SECONDS
+    )
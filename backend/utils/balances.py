@@ -0,0 +1,198 @@
+"""
+Group balance computation with incremental checkpoints.
+
+A checkpoint stores every member's net balance over the live ledger up to
+max_expense_id / max_settlement_id. Computing balances loads the latest checkpoint
+and folds in only the rows after it (plus archived edges, see utils/archive.py),
+instead of replaying the group's whole history.
+
+A checkpoint is only valid while the rows it covers are unchanged, so any flush that
+inserts, edits or deletes an expense, split or settlement at or below a checkpoint's
+high-water mark deletes that checkpoint in the same transaction
+(register_checkpoint_invalidation). Creating a checkpoint bumps the group version:
+a writer that was still in flight with a lower id then fails its own version check
+and retries, so a checkpoint can never skip an uncommitted row.
+"""
+
+import json
+
+from sqlalchemy import event, select
+
+from db import db
+from models import ExpenseModel, ExpenseSplitModel, SettlementModel, BalanceCheckpointModel
+from utils.archive import archived_edges
+from utils.splits import COMPACT, add_compact_balances
+from utils.concurrency import read_group_version, bump_group_version
+from utils.balance_engine import ledger_net_cents
+from config import BALANCE_CHECKPOINTS_KEPT
+
+
+def _cents(column):
+    return db.cast(db.func.round(column * 100), db.BigInteger)
+
+
+def latest_checkpoint(group_id):
+    return (BalanceCheckpointModel.query
+            .filter(BalanceCheckpointModel.group_id == group_id)
+            .order_by(BalanceCheckpointModel.id.desc())
+            .first())
+
+
+def _fold_ledger(group_id, balances, after_expense_id=0, after_settlement_id=0,
+                 upto_expense_id=None, upto_settlement_id=None):
+    """Add live expenses/settlements with ids in (after, upto] to `balances`."""
+    # Split rows: the payer is owed each share (read as integer cents, see utils/balance_engine.py)
+    splits = (select(ExpenseModel.paid_by, ExpenseSplitModel.user_id, _cents(ExpenseSplitModel.amount))
+              .join(ExpenseSplitModel, ExpenseSplitModel.expense_id == ExpenseModel.id)
+              .where(ExpenseSplitModel.group_id == group_id, ExpenseModel.group_id == group_id,
+                     ExpenseModel.id > after_expense_id))
+    if upto_expense_id is not None:
+        splits = splits.where(ExpenseModel.id <= upto_expense_id)
+
+    # Settlements: paid_by receives from paid_to
+    settlements = (select(SettlementModel.paid_by, SettlementModel.paid_to, _cents(SettlementModel.amount))
+                   .where(SettlementModel.group_id == group_id, SettlementModel.id > after_settlement_id))
+    if upto_settlement_id is not None:
+        settlements = settlements.where(SettlementModel.id <= upto_settlement_id)
+
+    for user_id, cents in ledger_net_cents([splits, settlements]).items():
+        balances[user_id] = balances.get(user_id, 0.0) + cents / 100
+
+    # Compact equal splits are aggregated without expanding participants
+    compact_filters = [ExpenseModel.group_id == group_id, ExpenseModel.id > after_expense_id]
+    if upto_expense_id is not None:
+        compact_filters.append(ExpenseModel.id <= upto_expense_id)
+    return add_compact_balances(balances, *compact_filters)
+
+
+def _add_archived(group_id, balances):
+    for (debtor, creditor), amount in archived_edges([group_id]).get(group_id, {}).items():
+        balances[debtor] = balances.get(debtor, 0.0) - amount
+        balances[creditor] = balances.get(creditor, 0.0) + amount
+    return balances
+
+
+def group_balances(group_id, use_checkpoint=True):
+    """{user_id: net balance} for everyone who appears in the group's ledger."""
+    balances = {}
+    checkpoint = latest_checkpoint(group_id) if use_checkpoint else None
+    if checkpoint is None:
+        _fold_ledger(group_id, balances)
+    else:
+        balances.update({int(uid): amount for uid, amount in json.loads(checkpoint.balances).items()})
+        _fold_ledger(group_id, balances, checkpoint.max_expense_id, checkpoint.max_settlement_id)
+    return _add_archived(group_id, balances)
+
+
+def create_balance_checkpoint(group_id):
+    """
+    Checkpoint the group's live ledger as of now and drop all but the newest
+    BALANCE_CHECKPOINTS_KEPT checkpoints. Raises ConcurrentUpdateError if a write
+    raced with it. Returns the new checkpoint, or None if nothing changed.
+    """
+    group_version = read_group_version(group_id)
+    max_expense_id = db.session.query(db.func.max(ExpenseModel.id)).filter(
+        ExpenseModel.group_id == group_id).scalar() or 0
+    max_settlement_id = db.session.query(db.func.max(SettlementModel.id)).filter(
+        SettlementModel.group_id == group_id).scalar() or 0
+
+    previous = latest_checkpoint(group_id)
+    if previous and (previous.max_expense_id, previous.max_settlement_id) == (max_expense_id, max_settlement_id):
+        return None
+
+    balances = {}
+    after_expense_id = after_settlement_id = 0
+    if previous:
+        balances = {int(uid): amount for uid, amount in json.loads(previous.balances).items()}
+        after_expense_id, after_settlement_id = previous.max_expense_id, previous.max_settlement_id
+    _fold_ledger(group_id, balances, after_expense_id, after_settlement_id, max_expense_id, max_settlement_id)
+
+    checkpoint = BalanceCheckpointModel(
+        group_id=group_id,
+        max_expense_id=max_expense_id,
+        max_settlement_id=max_settlement_id,
+        balances=json.dumps({str(uid): amount for uid, amount in sorted(balances.items())})
+    )
+    db.session.add(checkpoint)
+    db.session.flush()
+
+    stale = [row[0] for row in db.session.query(BalanceCheckpointModel.id)
+             .filter(BalanceCheckpointModel.group_id == group_id)
+             .order_by(BalanceCheckpointModel.id.desc())
+             .offset(BALANCE_CHECKPOINTS_KEPT)]
+    if stale:
+        BalanceCheckpointModel.query.filter(BalanceCheckpointModel.id.in_(stale)).delete(synchronize_session=False)
+
+    bump_group_version(group_id, group_version)
+    return checkpoint
+
+
+def groups_needing_checkpoint(min_rows, limit):
+    """Group ids with at least `min_rows` split rows, compact expenses and settlements after their latest checkpoint."""
+    covered = (db.session.query(BalanceCheckpointModel.group_id,
+                                db.func.max(BalanceCheckpointModel.max_expense_id).label("max_expense_id"),
+                                db.func.max(BalanceCheckpointModel.max_settlement_id).label("max_settlement_id"))
+               .group_by(BalanceCheckpointModel.group_id)
+               .subquery())
+
+    split_rows = (db.session.query(ExpenseSplitModel.group_id, db.func.count(ExpenseSplitModel.id))
+                  .outerjoin(covered, covered.c.group_id == ExpenseSplitModel.group_id)
+                  .filter(ExpenseSplitModel.expense_id > db.func.coalesce(covered.c.max_expense_id, 0))
+                  .group_by(ExpenseSplitModel.group_id))
+    # A compact equal split is a single row, whatever its participant count
+    compact_rows = (db.session.query(ExpenseModel.group_id, db.func.count(ExpenseModel.id))
+                    .outerjoin(covered, covered.c.group_id == ExpenseModel.group_id)
+                    .filter(COMPACT, ExpenseModel.id > db.func.coalesce(covered.c.max_expense_id, 0))
+                    .group_by(ExpenseModel.group_id))
+    settlement_rows = (db.session.query(SettlementModel.group_id, db.func.count(SettlementModel.id))
+                       .outerjoin(covered, covered.c.group_id == SettlementModel.group_id)
+                       .filter(SettlementModel.id > db.func.coalesce(covered.c.max_settlement_id, 0))
+                       .group_by(SettlementModel.group_id))
+
+    pending = {}
+    for group_id, count in list(split_rows) + list(compact_rows) + list(settlement_rows):
+        pending[group_id] = pending.get(group_id, 0) + count
+    ready = sorted((count, group_id) for group_id, count in pending.items() if count >= min_rows)
+    return [group_id for _, group_id in reversed(ready)][:limit]
+
+
+def _collect_ledger_writes(session, flush_context):
+    """After each flush, drop checkpoints covering any expense/split/settlement that changed."""
+    lowest = {}
+
+    def touch(group_id, kind, row_id):
+        if group_id is None or row_id is None:
+            return
+        key = (group_id, kind)
+        lowest[key] = min(lowest.get(key, row_id), row_id)
+
+    # Brand-new expenses and settlements always sort after every checkpoint, but a new
+    # split of an existing expense (an edit) changes rows a checkpoint covers
+    new_expense_ids = {obj.id for obj in session.new if isinstance(obj, ExpenseModel)}
+    for obj in session.new:
+        if isinstance(obj, ExpenseSplitModel) and obj.expense_id not in new_expense_ids:
+            touch(obj.group_id, "expense", obj.expense_id)
+
+    for obj in list(session.dirty) + list(session.deleted):
+        if isinstance(obj, ExpenseModel):
+            touch(obj.group_id, "expense", obj.id)
+        elif isinstance(obj, ExpenseSplitModel):
+            touch(obj.group_id, "expense", obj.expense_id)
+        elif isinstance(obj, SettlementModel):
+            touch(obj.group_id, "settlement", obj.id)
+
+    for (group_id, kind), row_id in lowest.items():
+        column = (BalanceCheckpointModel.max_expense_id if kind == "expense"
+                  else BalanceCheckpointModel.max_settlement_id)
+        session.execute(
+            db.delete(BalanceCheckpointModel)
+            .where(BalanceCheckpointModel.group_id == group_id, column >= row_id)
+            .execution_options(synchronize_session=False)
+        )
+
+
+def register_checkpoint_invalidation(session):
+    """Hook checkpoint invalidation into the (scoped) session's flush cycle."""
+    if event.contains(session, "after_flush", _collect_ledger_writes):
+        return
+    event.listen(session, "after_flush", _collect_ledger_writes)
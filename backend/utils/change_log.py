@@ -0,0 +1,35 @@
+"""
+Change log writes for delta sync.
+
+Handlers call these inside the transaction that makes the change, so a logged
+change is never visible without the row it describes (or vice versa).
+Splits are not logged on their own: they are created and deleted together with
+their expense, so an expense change carries them.
+"""
+
+from db import db
+from models import GroupChangeModel
+
+EXPENSE = "expense"
+SETTLEMENT = "settlement"
+MEMBERSHIP = "membership"
+
+UPSERT = "upsert"
+DELETE = "delete"
+
+
+def record_change(group_id, entity, entity_id, op=UPSERT):
+    """Stage one change log row in the current transaction."""
+    change = GroupChangeModel(group_id=group_id, entity=entity, entity_id=entity_id, op=op)
+    db.session.add(change)
+    return change
+
+
+def record_changes(group_id, entity, entity_ids, op=UPSERT):
+    """Stage change log rows for several entities of the same kind."""
+    changes = [
+        GroupChangeModel(group_id=group_id, entity=entity, entity_id=entity_id, op=op)
+        for entity_id in entity_ids
+    ]
+    db.session.add_all(changes)
+    return changes
@@ -0,0 +1,118 @@
+"""
+Optimistic concurrency control for group writes.
+
+Every write that changes a group's membership or ledger advances groups.version right
+before committing, but only some of them compare-and-swap it:
+
+- Membership and admin writes (bump_membership_version) and ledger maintenance
+  (bump_group_version) require groups.version to be unchanged since they read, so
+  a decision like "this member has a zero balance" is redone if any expense or
+  settlement committed meanwhile. Membership writes also advance
+  groups.membership_version.
+- Ledger writes (bump_ledger_version) only require membership_version to be
+  unchanged - "these are the split participants" - and increment groups.version
+  without comparing it. Unrelated expenses and settlements in the same group
+  therefore never conflict with each other.
+
+The loser of a conflict gets ConcurrentUpdateError, rolls back and is re-run by
+@optimistic_retry against fresh data. Membership rows additionally carry their own
+version (version_id_col), so lost updates on a single row are caught too.
+"""
+
+import random
+import time
+from functools import wraps
+
+from flask_smorest import abort
+from sqlalchemy.orm.exc import StaleDataError
+
+from db import db
+from models import GroupModel
+from config import OCC_MAX_RETRIES, OCC_RETRY_BACKOFF_SECONDS
+
+
+class ConcurrentUpdateError(Exception):
+    """The group changed after this request read it."""
+
+
+def read_group_version(group_id):
+    """Version to pass to bump_group_version; read it before reading the data you check."""
+    group = db.session.get(GroupModel, group_id)
+    if group is None:
+        abort(404, message="Group not found")
+    return group.version
+
+
+def read_membership_version(group_id):
+    """Version to pass to bump_ledger_version; read it before reading the members you use."""
+    group = db.session.get(GroupModel, group_id)
+    if group is None:
+        abort(404, message="Group not found")
+    return group.membership_version
+
+
+def _flush():
+    try:
+        db.session.flush()
+    except StaleDataError as e:
+        raise ConcurrentUpdateError(str(e))
+
+
+def _advance(group_id, condition, values):
+    result = db.session.execute(
+        db.update(GroupModel)
+        .where(GroupModel.id == group_id, condition)
+        .values(version=GroupModel.version + 1, **values)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount != 1:
+        raise ConcurrentUpdateError(f"Group {group_id} changed since it was read")
+
+
+def bump_group_version(group_id, expected_version):
+    """
+    Flush pending changes and advance the group version if nobody else did first
+    (ledger maintenance: checkpoints, compaction, archiving, group deletion).
+    Raises ConcurrentUpdateError on conflict.
+    """
+    _flush()
+    _advance(group_id, GroupModel.version == expected_version, {})
+
+
+def bump_membership_version(group_id, expected_version, member_delta=0, admin_delta=0):
+    """
+    bump_group_version for membership and admin writes: also advances membership_version,
+    so in-flight ledger writes that picked participants from the old members conflict.
+    `member_delta`/`admin_delta` adjust the denormalized counters in the same statement.
+    """
+    _flush()
+    values = {"membership_version": GroupModel.membership_version + 1}
+    if member_delta:
+        values["member_count"] = GroupModel.member_count + member_delta
+    if admin_delta:
+        values["admin_count"] = GroupModel.admin_count + admin_delta
+    _advance(group_id, GroupModel.version == expected_version, values)
+
+
+def bump_ledger_version(group_id, expected_membership_version):
+    """
+    Flush pending ledger changes and advance the group version, provided the membership
+    is unchanged since `expected_membership_version`. Concurrent ledger writes don't
+    conflict. Raises ConcurrentUpdateError if the membership changed.
+    """
+    _flush()
+    _advance(group_id, GroupModel.membership_version == expected_membership_version, {})
+
+
+def optimistic_retry(func):
+    """Re-run a write handler on conflict, a bounded number of times with jittered backoff."""
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        for attempt in range(OCC_MAX_RETRIES):
+            try:
+                return func(*args, **kwargs)
+            except (ConcurrentUpdateError, StaleDataError):
+                db.session.rollback()
+                time.sleep(OCC_RETRY_BACKOFF_SECONDS * (2 ** attempt) * random.uniform(0.5, 1.5))
+        abort(409, message="The group was modified concurrently. Please try again.")
+    return wrapper
@@ -0,0 +1,200 @@
+"""
+Streaming group exports (CSV, JSON Lines, Parquet).
+
+Rows are read with yield_per (a server-side cursor on Postgres), serialized into
+~EXPORT_CHUNK_BYTES chunks and optionally gzipped on the fly, so memory stays flat
+no matter how large the group is. The same chunk iterator backs both the streamed
+HTTP response and the background job that writes an export to disk.
+
+One row per expense split (the expense columns repeat on each split) followed by one
+row per settlement. Archived expenses (see utils/archive.py) come first, read back from
+cold storage one archive at a time, unless include_archived is off. Parquet needs pyarrow, which is an optional dependency.
+"""
+
+import csv
+import io
+import json
+import zlib
+
+from sqlalchemy import select
+
+from db import db
+from models import ExpenseModel, ExpenseSplitModel, SettlementModel
+from utils.splits import decode_participants
+from utils.archive import iter_archived_expenses
+from config import EXPORT_BATCH_SIZE, EXPORT_CHUNK_BYTES, EXPORT_PARQUET_ROW_GROUP_SIZE
+
+EXPORT_COLUMNS = ("record_type", "record_id", "date", "description", "split_type",
+                  "amount", "paid_by", "paid_to", "user_id", "share")
+
+EXPORT_FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "jsonl": ("application/x-ndjson", "jsonl"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+
+class ExportFormatUnavailable(Exception):
+    """Raised when a format's optional dependency is not installed."""
+
+
+def parquet_available():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def iter_export_rows(group_id, batch_size=EXPORT_BATCH_SIZE, include_archived=True):
+    """Yield one tuple per EXPORT_COLUMNS, streaming from the database."""
+    if include_archived:
+        for expense in iter_archived_expenses(group_id):
+            row = ("expense", expense["id"], expense["date"], expense["description"], expense["split_type"],
+                   expense["amount"], expense["paid_by"], None)
+            for split in expense["splits"]:
+                yield row + (split["user_id"], split["amount"])
+
+    # Compact equal splits have no split rows; they are expanded one row per participant
+    splits = (
+        select(ExpenseModel.id, ExpenseModel.date, ExpenseModel.description, ExpenseModel.split_type,
+               ExpenseModel.amount, ExpenseModel.paid_by, ExpenseSplitModel.user_id, ExpenseSplitModel.amount,
+               ExpenseModel.participants, ExpenseModel.share_amount)
+        .outerjoin(ExpenseSplitModel, (ExpenseSplitModel.expense_id == ExpenseModel.id)
+                   & (ExpenseSplitModel.group_id == group_id))
+        .where(ExpenseModel.group_id == group_id)
+        .order_by(ExpenseModel.id, ExpenseSplitModel.id)
+        .execution_options(yield_per=batch_size)
+    )
+    for (expense_id, date, description, split_type, amount, paid_by, user_id, share,
+         participants, share_amount) in db.session.execute(splits):
+        expense = ("expense", expense_id, date.isoformat() if date else None, description, split_type,
+                   str(amount), paid_by, None)
+        if participants is not None:
+            for participant in decode_participants(participants):
+                yield expense + (participant, str(share_amount))
+        elif user_id is not None:
+            yield expense + (user_id, str(share))
+
+    settlements = (
+        select(SettlementModel.id, SettlementModel.amount, SettlementModel.paid_by, SettlementModel.paid_to)
+        .where(SettlementModel.group_id == group_id)
+        .order_by(SettlementModel.id)
+        .execution_options(yield_per=batch_size)
+    )
+    for settlement_id, amount, paid_by, paid_to in db.session.execute(settlements):
+        yield ("settlement", settlement_id, None, None, None, str(amount), paid_by, paid_to, None, None)
+
+
+def _csv_chunks(rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    for row in rows:
+        writer.writerow(row)
+        if buffer.tell() >= EXPORT_CHUNK_BYTES:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+def _jsonl_chunks(rows):
+    lines = []
+    size = 0
+    for row in rows:
+        line = json.dumps(dict(zip(EXPORT_COLUMNS, row)), separators=(",", ":")) + "\n"
+        lines.append(line)
+        size += len(line)
+        if size >= EXPORT_CHUNK_BYTES:
+            yield "".join(lines).encode()
+            lines = []
+            size = 0
+    if lines:
+        yield "".join(lines).encode()
+
+
+class _DrainSink:
+    """Write-only file object whose contents are handed out (and forgotten) between row groups."""
+
+    def __init__(self):
+        self.closed = False
+        self._parts = []
+        self._position = 0
+
+    def write(self, data):
+        self._parts.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data = b"".join(self._parts)
+        self._parts = []
+        return data
+
+
+def _parquet_chunks(rows):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ExportFormatUnavailable("Parquet export requires pyarrow")
+
+    schema = pa.schema([
+        ("record_type", pa.string()), ("record_id", pa.int64()), ("date", pa.string()),
+        ("description", pa.string()), ("split_type", pa.string()), ("amount", pa.string()),
+        ("paid_by", pa.int64()), ("paid_to", pa.int64()), ("user_id", pa.int64()), ("share", pa.string()),
+    ])
+    sink = _DrainSink()
+    writer = pq.ParquetWriter(sink, schema, compression="snappy")
+
+    def write_group(batch):
+        columns = list(zip(*batch))
+        writer.write_table(pa.Table.from_arrays(
+            [pa.array(column, type=field.type) for column, field in zip(columns, schema)], schema=schema
+        ))
+
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= EXPORT_PARQUET_ROW_GROUP_SIZE:
+            write_group(batch)
+            batch = []
+            yield sink.drain()
+    if batch:
+        write_group(batch)
+    writer.close()
+    yield sink.drain()
+
+
+_WRITERS = {"csv": _csv_chunks, "jsonl": _jsonl_chunks, "parquet": _parquet_chunks}
+
+
+def gzip_chunks(chunks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_chunks(group_id, fmt, compress=False, include_archived=True):
+    """Byte chunks of a complete export file."""
+    chunks = _WRITERS[fmt](iter_export_rows(group_id, include_archived=include_archived))
+    return gzip_chunks(chunks) if compress else chunks
+
+
+def export_filename(group_id, fmt, compress=False):
+    name = f"group-{group_id}-export.{EXPORT_FORMATS[fmt][1]}"
+    return name + ".gz" if compress else name
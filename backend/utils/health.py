@@ -0,0 +1,125 @@
+"""
+Cached dependency probes for /health, /health/live and /health/ready.
+
+Orchestrators poll health endpoints several times a second per instance. Instead of
+pinging the database and Redis on every hit, a background thread probes them every
+HEALTH_PROBE_INTERVAL_SECONDS and the endpoints answer from the last snapshot:
+
+- database: SELECT 1 through the app's engine
+- redis: PING, when REDIS_URL is configured
+- workers: RQ workers listening on the `emails` queue whose heartbeat is recent
+
+The app is ready when the database and (if configured) Redis answered. Workers only
+count when HEALTH_REQUIRE_WORKER is set: without one the API still serves requests,
+emails just wait in the queue. A snapshot older than HEALTH_PROBE_STALE_SECONDS
+(e.g. the refresher hangs on an unresponsive dependency) is reported as not ready.
+
+The thread is started by the first probe request, so it runs in each gunicorn worker
+rather than in the master before the fork.
+"""
+
+import threading
+import time
+from datetime import datetime, timezone
+
+from sqlalchemy import text
+
+from db import db
+from config import (HEALTH_PROBE_INTERVAL_SECONDS, HEALTH_PROBE_STALE_SECONDS,
+                    HEALTH_WORKER_HEARTBEAT_MAX_AGE_SECONDS, HEALTH_REQUIRE_WORKER)
+
+
+class HealthMonitor:
+
+    def __init__(self, app, interval=HEALTH_PROBE_INTERVAL_SECONDS):
+        self.app = app
+        self.interval = interval
+        self.snapshot = None
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def _probe_database(self):
+        started = time.perf_counter()
+        try:
+            with self.app.app_context():
+                with db.engine.connect() as connection:
+                    connection.execute(text("SELECT 1"))
+            return {"ok": True, "latency_ms": round((time.perf_counter() - started) * 1000, 2)}
+        except Exception as e:
+            return {"ok": False, "error": str(e)}
+
+    def _probe_redis(self):
+        connection = getattr(self.app, "redis_connection", None)
+        if connection is None:
+            return {"ok": True, "status": "not_configured"}
+        started = time.perf_counter()
+        try:
+            connection.ping()
+            return {"ok": True, "status": "connected", "latency_ms": round((time.perf_counter() - started) * 1000, 2)}
+        except Exception as e:
+            return {"ok": False, "status": "disconnected", "error": str(e)}
+
+    def _probe_workers(self):
+        queue = getattr(self.app, "queue", None)
+        if queue is None:
+            return {"ok": not HEALTH_REQUIRE_WORKER, "alive": 0, "status": "no_queue"}
+        try:
+            from rq import Worker
+
+            now = datetime.now(timezone.utc)
+            ages = []
+            for worker in Worker.all(connection=queue.connection, queue=queue):
+                if worker.last_heartbeat is None:
+                    continue
+                heartbeat = worker.last_heartbeat
+                if heartbeat.tzinfo is None:
+                    heartbeat = heartbeat.replace(tzinfo=timezone.utc)
+                ages.append((now - heartbeat).total_seconds())
+            alive = [age for age in ages if age <= HEALTH_WORKER_HEARTBEAT_MAX_AGE_SECONDS]
+            return {"ok": bool(alive) or not HEALTH_REQUIRE_WORKER, "alive": len(alive),
+                    "oldest_heartbeat_seconds": round(max(alive), 1) if alive else None}
+        except Exception as e:
+            return {"ok": not HEALTH_REQUIRE_WORKER, "alive": 0, "error": str(e)}
+
+    def refresh(self):
+        """Probe every dependency once and publish the result."""
+        checks = {
+            "database": self._probe_database(),
+            "redis": self._probe_redis(),
+            "workers": self._probe_workers(),
+        }
+        self.snapshot = {
+            "checked_at": time.time(),
+            "ready": all(check["ok"] for check in checks.values()),
+            "checks": checks,
+        }
+        return self.snapshot
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.refresh()
+            except Exception as e:
+                self.app.logger.error(f"Health probe refresh failed: {str(e)}")
+
+    def current(self):
+        """Latest snapshot; the first call probes synchronously and starts the refresher."""
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self.refresh()
+                    self._thread = threading.Thread(target=self._run, name="health-probes", daemon=True)
+                    self._thread.start()
+        return self.snapshot
+
+    def readiness(self):
+        """(ready, body) for /health/ready."""
+        snapshot = self.current()
+        age = time.time() - snapshot["checked_at"]
+        ready = snapshot["ready"] and age <= HEALTH_PROBE_STALE_SECONDS
+        return ready, {
+            "status": "ready" if ready else "not_ready",
+            "checked_seconds_ago": round(age, 3),
+            "checks": snapshot["checks"],
+        }
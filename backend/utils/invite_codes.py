@@ -0,0 +1,137 @@
+"""
+Collision-free invite code allocation.
+
+Codes are a keyed permutation of a sequence number: each process reserves a block of
+sequence numbers from the invite_code_counters table (one UPDATE per
+INVITE_CODE_BLOCK_SIZE codes) and maps each number through a 4-round Feistel network
+over 40 bits, then encodes the result as 8 Crockford base32 characters. Because the
+Feistel network is a bijection, distinct sequence numbers always give distinct codes,
+so no lookup is needed and the unique constraint can't be hit by two creators.
+Codes look random to outsiders as long as the key stays secret.
+
+The key comes from INVITE_CODE_KEY (falling back to JWT_SECRET_KEY). It must never
+change once codes have been issued, or new codes may collide with old ones.
+"""
+
+import hashlib
+import os
+import threading
+
+from db import db
+from config import INVITE_CODE_BLOCK_SIZE
+
+CODE_PREFIX = "SPLIT-"
+ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"  # Crockford base32, no I/L/O/U
+CODE_LENGTH = 8
+CODE_BITS = 5 * CODE_LENGTH  # 40 bits, ~1.1 trillion codes
+HALF_BITS = CODE_BITS // 2
+HALF_MASK = (1 << HALF_BITS) - 1
+ROUNDS = 4
+
+COUNTER_NAME = "groups"
+
+
+def _key():
+    secret = os.getenv("INVITE_CODE_KEY") or os.getenv("JWT_SECRET_KEY")
+    if not secret:
+        raise ValueError("INVITE_CODE_KEY or JWT_SECRET_KEY must be set to allocate invite codes")
+    return hashlib.sha256(f"splitfree-invite-codes:{secret}".encode()).digest()
+
+
+def _round(key, round_index, half):
+    # Keyed BLAKE2b is a PRF and much cheaper per call than HMAC-SHA256
+    digest = hashlib.blake2b(bytes((round_index,)) + half.to_bytes(4, "big"), key=key, digest_size=4).digest()
+    return int.from_bytes(digest, "big") & HALF_MASK
+
+
+def permute(value, key=None):
+    """Keyed bijection on [0, 2**40)."""
+    key = key or _key()
+    left, right = value >> HALF_BITS, value & HALF_MASK
+    for r in range(ROUNDS):
+        left, right = right, left ^ _round(key, r, right)
+    return (left << HALF_BITS) | right
+
+
+def unpermute(value, key=None):
+    """Inverse of permute()."""
+    key = key or _key()
+    left, right = value >> HALF_BITS, value & HALF_MASK
+    for r in reversed(range(ROUNDS)):
+        left, right = right ^ _round(key, r, left), left
+    return (left << HALF_BITS) | right
+
+
+def encode(value):
+    chars = []
+    for _ in range(CODE_LENGTH):
+        chars.append(ALPHABET[value & 31])
+        value >>= 5
+    return CODE_PREFIX + "".join(reversed(chars))
+
+
+def decode(code):
+    value = 0
+    for char in code[len(CODE_PREFIX):]:
+        value = (value << 5) | ALPHABET.index(char)
+    return value
+
+
+def code_for_sequence(sequence, key=None):
+    """Invite code for a sequence number."""
+    if not 0 <= sequence < (1 << CODE_BITS):
+        raise ValueError("Invite code space exhausted")
+    return encode(permute(sequence, key))
+
+
+def _reserve_block(size):
+    """
+    Reserve [start, start + size) in its own transaction, independent of the caller's
+    session, so a rolled-back request can never cause a block to be handed out twice.
+    """
+    # Import here to avoid circular imports (GroupModel uses this module)
+    from models import InviteCodeCounterModel
+
+    counter = InviteCodeCounterModel.__table__
+    with db.engine.begin() as conn:
+        updated = conn.execute(
+            counter.update()
+            .where(counter.c.name == COUNTER_NAME)
+            .values(next_value=counter.c.next_value + size)
+        ).rowcount
+        if not updated:
+            conn.execute(counter.insert().values(name=COUNTER_NAME, next_value=1 + size))
+        next_value = conn.execute(
+            db.select(counter.c.next_value).where(counter.c.name == COUNTER_NAME)
+        ).scalar()
+    return next_value - size
+
+
+class InviteCodeAllocator:
+    """Hands out codes from a reserved block; reserves a new block when it runs out."""
+
+    def __init__(self, block_size=INVITE_CODE_BLOCK_SIZE):
+        self.block_size = block_size
+        self._lock = threading.Lock()
+        self._next = 0
+        self._end = 0
+        self._pid = None
+
+    def allocate(self):
+        with self._lock:
+            # A forked worker must not reuse its parent's block
+            if self._pid != os.getpid() or self._next >= self._end:
+                self._next = _reserve_block(self.block_size)
+                self._end = self._next + self.block_size
+                self._pid = os.getpid()
+            sequence = self._next
+            self._next += 1
+        return code_for_sequence(sequence)
+
+
+allocator = InviteCodeAllocator()
+
+
+def allocate_invite_code():
+    """Next unique invite code. Costs no queries except one UPDATE per block."""
+    return allocator.allocate()
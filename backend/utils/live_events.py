@@ -0,0 +1,187 @@
+"""
+Live group updates for the /group/<id>/events stream.
+
+Write handlers publish small delta events after they commit. Events go through
+Redis pub/sub when Redis is configured (so every gunicorn worker sees them) and
+through an in-process broker otherwise. Each group keeps a short backlog with
+increasing ids, which lets SSE clients resume via Last-Event-ID and long-poll
+clients ask for everything after the last id they saw.
+"""
+
+import json
+import queue
+import threading
+import time
+from collections import deque
+
+from flask import current_app
+
+from config import LIVE_EVENTS_BACKLOG_SIZE
+
+
+class _QueueSubscription:
+    def __init__(self, broker, group_id):
+        self._broker = broker
+        self._group_id = group_id
+        self._queue = queue.Queue()
+
+    def get(self, timeout):
+        """Next event, or None if nothing arrived within `timeout` seconds."""
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self._broker._unsubscribe(self._group_id, self._queue)
+
+
+class InProcessBroker:
+    """Broker for single-process deployments and development (no Redis)."""
+
+    def __init__(self, backlog_size=LIVE_EVENTS_BACKLOG_SIZE):
+        self._lock = threading.Lock()
+        self._subscribers = {}
+        self._backlog = {}
+        self._seq = {}
+        self.backlog_size = backlog_size
+
+    def publish(self, group_id, event):
+        with self._lock:
+            seq = self._seq.get(group_id, 0) + 1
+            self._seq[group_id] = seq
+            event = dict(event, id=seq)
+            self._backlog.setdefault(group_id, deque(maxlen=self.backlog_size)).append(event)
+            subscribers = list(self._subscribers.get(group_id, ()))
+        for q in subscribers:
+            q.put(event)
+        return event
+
+    def subscribe(self, group_id):
+        subscription = _QueueSubscription(self, group_id)
+        with self._lock:
+            self._subscribers.setdefault(group_id, set()).add(subscription._queue)
+        return subscription
+
+    def _unsubscribe(self, group_id, q):
+        with self._lock:
+            subscribers = self._subscribers.get(group_id)
+            if subscribers:
+                subscribers.discard(q)
+                if not subscribers:
+                    del self._subscribers[group_id]
+
+    def recent(self, group_id, since):
+        with self._lock:
+            return [e for e in self._backlog.get(group_id, ()) if e["id"] > since]
+
+
+class _RedisSubscription:
+    def __init__(self, pubsub):
+        self._pubsub = pubsub
+
+    def get(self, timeout):
+        """Next event, or None if nothing arrived within `timeout` seconds."""
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            message = self._pubsub.get_message(ignore_subscribe_messages=True, timeout=remaining)
+            if message and message["type"] == "message":
+                return json.loads(message["data"])
+
+    def close(self):
+        try:
+            self._pubsub.close()
+        except Exception:
+            pass
+
+
+class RedisBroker:
+    """Broker backed by Redis pub/sub, shared by all API processes."""
+
+    def __init__(self, connection, backlog_size=LIVE_EVENTS_BACKLOG_SIZE):
+        self.connection = connection
+        self.backlog_size = backlog_size
+
+    @staticmethod
+    def _key(group_id, suffix):
+        return f"splitfree:group:{group_id}:events:{suffix}"
+
+    def publish(self, group_id, event):
+        seq_key = self._key(group_id, "seq")
+        backlog_key = self._key(group_id, "backlog")
+
+        # Id, backlog push and publish in one MULTI (retried if another publisher got in
+        # first), so every worker's events land in the backlog and channel in id order
+        def push(pipe):
+            seq = int(pipe.get(seq_key) or 0) + 1
+            payload = json.dumps(dict(event, id=seq), default=str)
+            pipe.multi()
+            pipe.set(seq_key, seq)
+            pipe.lpush(backlog_key, payload)
+            pipe.ltrim(backlog_key, 0, self.backlog_size - 1)
+            pipe.publish(self._key(group_id, "channel"), payload)
+            return seq
+
+        seq = self.connection.transaction(push, seq_key, value_from_callable=True)
+        return dict(event, id=seq)
+
+    def subscribe(self, group_id):
+        pubsub = self.connection.pubsub()
+        pubsub.subscribe(self._key(group_id, "channel"))
+        return _RedisSubscription(pubsub)
+
+    def recent(self, group_id, since):
+        items = self.connection.lrange(self._key(group_id, "backlog"), 0, -1)
+        events = sorted((json.loads(item) for item in items), key=lambda e: e["id"])
+        return [e for e in events if e["id"] > since]
+
+
+def create_broker(redis_connection=None):
+    """Pick the Redis broker when Redis is available, the in-process one otherwise."""
+    if redis_connection is not None:
+        return RedisBroker(redis_connection)
+    return InProcessBroker()
+
+
+def balance_delta(payer_id, splits, sign=1):
+    """
+    Per-user balance change caused by an expense, using the same convention as
+    _compute_balances. `splits` is an iterable of (user_id, amount) pairs.
+    """
+    delta = {}
+    for user_id, amount in splits:
+        if user_id == payer_id:
+            continue
+        amount = float(amount) * sign
+        delta[user_id] = delta.get(user_id, 0.0) - amount
+        delta[payer_id] = delta.get(payer_id, 0.0) + amount
+    return delta
+
+
+def settlement_balance_delta(paid_by, paid_to, amount, sign=1):
+    """Per-user balance change caused by a settlement."""
+    amount = float(amount) * sign
+    return {paid_by: amount, paid_to: -amount}
+
+
+def publish_group_event(group_id, event_type, data=None, delta=None):
+    """
+    Publish a live update for a group. Call after the change is committed.
+    Failures are logged and never break the request that triggered them.
+    """
+    broker = getattr(current_app, "event_broker", None)
+    if broker is None:
+        return None
+
+    event = {"type": event_type, "group_id": group_id, "data": data or {}}
+    if delta:
+        event["balance_delta"] = {str(uid): round(amount, 2) for uid, amount in delta.items()}
+
+    try:
+        return broker.publish(group_id, event)
+    except Exception as e:
+        current_app.logger.error(f"Failed to publish live event {event_type} for group {group_id}: {str(e)}")
+        return None
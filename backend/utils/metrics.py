@@ -0,0 +1,176 @@
+"""
+Prometheus metrics, served as text by /metrics.
+
+- HTTP: request count and latency per blueprint + route (URL rule), method and status.
+- Database: statement count and latency per operation, connection pool usage.
+- Queue and email: depth and failed jobs of the `emails` RQ queue, and the latency of
+  tasks.send_email_with_gmail.
+
+HTTP and database metrics live in the serving process. Under gunicorn each worker
+writes them to PROMETHEUS_MULTIPROC_DIR (set by gunicorn.conf.py) and /metrics sums
+all workers (prometheus_client multiprocess mode). Emails are sent by the RQ worker,
+which forks a process per job and may run in another container, so their latencies
+are accumulated in Redis instead and read back together with the queue stats when
+/metrics is scraped.
+"""
+
+import os
+import time
+from collections import defaultdict
+
+from flask import g, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import Pool
+from prometheus_client import (CollectorRegistry, Counter, Gauge, Histogram, CONTENT_TYPE_LATEST,
+                               REGISTRY, generate_latest)
+from prometheus_client.core import GaugeMetricFamily, HistogramMetricFamily
+
+from config import METRICS_HTTP_BUCKETS, METRICS_DB_BUCKETS, METRICS_EMAIL_BUCKETS
+
+_HTTP_LABELS = ("method", "blueprint", "route")
+_DB_OPERATIONS = {"SELECT", "INSERT", "UPDATE", "DELETE"}
+_EMAIL_KEY = "splitfree:metrics:email-send"
+
+HTTP_REQUESTS = Counter("splitfree_http_requests_total", "HTTP requests handled.", _HTTP_LABELS + ("status",))
+HTTP_LATENCY = Histogram("splitfree_http_request_duration_seconds", "Time to produce an HTTP response.",
+                         _HTTP_LABELS, buckets=METRICS_HTTP_BUCKETS)
+DB_QUERIES = Counter("splitfree_db_queries_total", "SQL statements executed.", ("operation",))
+DB_LATENCY = Histogram("splitfree_db_query_duration_seconds", "SQL statement execution time.", ("operation",),
+                       buckets=METRICS_DB_BUCKETS)
+DB_POOL = Gauge("splitfree_db_pool_connections", "Database connections held by the pool.", ("state",),
+                multiprocess_mode="livesum")
+
+_registered = False
+
+
+def _operation(statement):
+    word = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else ""
+    return word if word in _DB_OPERATIONS else "OTHER"
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("metrics_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["metrics_started"].pop()
+    operation = _operation(statement)
+    DB_QUERIES.labels(operation).inc()
+    DB_LATENCY.labels(operation).observe(time.perf_counter() - started)
+
+
+def _handle_error(exception_context):
+    # Failed statements never reach after_cursor_execute
+    connection = exception_context.connection
+    if connection is not None and connection.info.get("metrics_started"):
+        connection.info["metrics_started"].pop()
+
+
+def _register_engine_events():
+    """Listen on every engine and pool once per process (create_app may run several times)."""
+    global _registered
+    if _registered:
+        return
+    _registered = True
+    event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(Engine, "handle_error", _handle_error)
+    event.listen(Pool, "connect", lambda *args: DB_POOL.labels("open").inc())
+    event.listen(Pool, "close", lambda *args: DB_POOL.labels("open").dec())
+    event.listen(Pool, "close_detached", lambda *args: DB_POOL.labels("open").dec())
+    event.listen(Pool, "checkout", lambda *args: DB_POOL.labels("checked_out").inc())
+    event.listen(Pool, "checkin", lambda *args: DB_POOL.labels("checked_out").dec())
+
+
+def register_metrics(app):
+    """Time every request of `app` and every SQL statement it runs."""
+    _register_engine_events()
+
+    @app.before_request
+    def _start_timer():
+        g.metrics_started = time.perf_counter()
+
+    @app.after_request
+    def _record_request(response):
+        started = g.pop("metrics_started", None)
+        if started is not None:
+            labels = (request.method, request.blueprint or "",
+                      request.url_rule.rule if request.url_rule else "unmatched")
+            HTTP_LATENCY.labels(*labels).observe(time.perf_counter() - started)
+            HTTP_REQUESTS.labels(*labels, str(response.status_code)).inc()
+        return response
+
+
+def record_email_send(connection, seconds, status):
+    """Add one send_email_with_gmail latency to the Redis-backed histogram."""
+    record_email_sends(connection, [(seconds, status)])
+
+
+def record_email_sends(connection, samples):
+    """Add (seconds, status) email latencies to the Redis-backed histogram in one round trip."""
+    increments = defaultdict(int)
+    sums = defaultdict(float)
+    for seconds, status in samples:
+        for bound in METRICS_EMAIL_BUCKETS:
+            if seconds <= bound:
+                increments[f"{status}:le:{bound}"] += 1
+        increments[f"{status}:count"] += 1
+        sums[f"{status}:sum"] += seconds
+    if not increments:
+        return
+    pipe = connection.pipeline(transaction=False)
+    for field, count in increments.items():
+        pipe.hincrby(_EMAIL_KEY, field, count)
+    for field, seconds in sums.items():
+        pipe.hincrbyfloat(_EMAIL_KEY, field, seconds)
+    pipe.execute()
+
+
+class _QueueCollector:
+    """Queue depth, failed jobs and email latency, read from Redis at scrape time."""
+
+    def __init__(self, queue):
+        self.queue = queue
+
+    def collect(self):
+        depth = GaugeMetricFamily("splitfree_rq_queue_jobs", "Jobs waiting in the RQ queue.", labels=["queue"])
+        failed = GaugeMetricFamily("splitfree_rq_failed_jobs", "Jobs in the RQ failed job registry.",
+                                   labels=["queue"])
+        available = GaugeMetricFamily("splitfree_rq_available", "1 if the RQ queue is reachable.")
+        if self.queue is None:
+            available.add_metric([], 0)
+            yield available
+            return
+        try:
+            depth.add_metric([self.queue.name], len(self.queue))
+            failed.add_metric([self.queue.name], self.queue.failed_job_registry.count)
+            fields = {key.decode(): value.decode() for key, value in self.queue.connection.hgetall(_EMAIL_KEY).items()}
+        except Exception:
+            available.add_metric([], 0)
+            yield available
+            return
+        available.add_metric([], 1)
+        yield from (available, depth, failed)
+
+        sends = HistogramMetricFamily("splitfree_email_send_duration_seconds",
+                                      "Time it took to send one email (single or batched).", labels=["status"])
+        for status in ("success", "error"):
+            count = int(fields.get(f"{status}:count", 0))
+            buckets = [(str(bound), int(fields.get(f"{status}:le:{bound}", 0))) for bound in METRICS_EMAIL_BUCKETS]
+            sends.add_metric([status], buckets + [("+Inf", count)], float(fields.get(f"{status}:sum", 0)))
+        yield sends
+
+
+def render_metrics(app):
+    """(body, content type) of the /metrics response."""
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    queue_registry = CollectorRegistry()
+    queue_registry.register(_QueueCollector(getattr(app, "queue", None)))
+    return generate_latest(registry) + generate_latest(queue_registry), CONTENT_TYPE_LATEST
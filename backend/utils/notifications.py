@@ -0,0 +1,26 @@
+"""
+Helpers for recording group activity that is later fanned out as digest emails.
+"""
+
+from db import db
+from models import NotificationEventModel
+
+EXPENSE_EVENT = "expense"
+SETTLEMENT_EVENT = "settlement"
+
+
+def record_group_event(group_id, actor_id, event_type, object_id):
+    """Stage a notification event in the current transaction.
+
+    The event is written together with the expense/settlement it describes, so the
+    request only pays for one extra insert. Rendering and sending happen later in
+    tasks.send_group_activity_digests.
+    """
+    event = NotificationEventModel(
+        group_id=group_id,
+        actor_id=actor_id,
+        event_type=event_type,
+        object_id=object_id
+    )
+    db.session.add(event)
+    return event
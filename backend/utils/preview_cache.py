@@ -0,0 +1,181 @@
+"""
+Read-through cache for the public /group/code/<code> preview.
+
+The endpoint is unauthenticated and hit by link unfurlers, so answers are cached by
+code - including "invalid code" and "private group" answers (negative caching), which
+keeps code-guessing traffic off the database. Redis is used when configured so all
+workers share the cache; otherwise each process keeps a small LRU.
+
+Entries for a group's old and new code are dropped after any commit that creates or
+deletes the group or changes its code, visibility, name or description (see
+register_preview_invalidation). member_count may lag by up to the positive TTL.
+"""
+
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app, has_app_context
+from sqlalchemy import event, inspect
+
+from config import (GROUP_PREVIEW_CACHE_TTL_SECONDS, GROUP_PREVIEW_NEGATIVE_TTL_SECONDS,
+                    GROUP_PREVIEW_CACHE_MAX_ENTRIES)
+
+_INVALIDATING_FIELDS = ("invite_code", "is_public", "name", "description")
+
+
+class LocalPreviewCache:
+    """Per-process LRU with expiry, for deployments without Redis."""
+
+    def __init__(self, max_entries=GROUP_PREVIEW_CACHE_MAX_ENTRIES):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.max_entries = max_entries
+
+    def get(self, code):
+        with self._lock:
+            entry = self._entries.get(code)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[code]
+                return None
+            self._entries.move_to_end(code)
+            return value
+
+    def set(self, code, value, ttl):
+        with self._lock:
+            self._entries[code] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(code)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, *codes):
+        with self._lock:
+            for code in codes:
+                self._entries.pop(code, None)
+
+
+class RedisPreviewCache:
+    """Cache shared by all API processes."""
+
+    def __init__(self, connection, namespace="group-preview"):
+        self.connection = connection
+        self.namespace = namespace
+
+    def _key(self, code):
+        return f"splitfree:{self.namespace}:{code}"
+
+    def get(self, code):
+        raw = self.connection.get(self._key(code))
+        return json.loads(raw) if raw else None
+
+    def set(self, code, value, ttl):
+        self.connection.setex(self._key(code), ttl, json.dumps(value))
+
+    def delete(self, *codes):
+        if codes:
+            self.connection.delete(*[self._key(code) for code in codes])
+
+
+def create_preview_cache(redis_connection=None, namespace="group-preview"):
+    if redis_connection is not None:
+        return RedisPreviewCache(redis_connection, namespace)
+    return LocalPreviewCache()
+
+
+def cached_preview(code, load):
+    """
+    Return (status, payload) for a code, calling load(code) on a miss.
+    Cache failures fall back to load() so previews never break because of Redis.
+    """
+    cache = getattr(current_app, "preview_cache", None)
+    if cache is None:
+        return load(code)
+
+    try:
+        hit = cache.get(code)
+    except Exception as e:
+        current_app.logger.error(f"Group preview cache read failed: {str(e)}")
+        return load(code)
+    if hit is not None:
+        return hit["status"], hit["payload"]
+
+    status, payload = load(code)
+    ttl = GROUP_PREVIEW_CACHE_TTL_SECONDS if status == 200 else GROUP_PREVIEW_NEGATIVE_TTL_SECONDS
+    try:
+        cache.set(code, {"status": status, "payload": payload}, ttl)
+    except Exception as e:
+        current_app.logger.error(f"Group preview cache write failed: {str(e)}")
+    return status, payload
+
+
+def read_through(cache, key, load, ttl):
+    """Generic cache-aside lookup; cache failures fall back to load()."""
+    if cache is None:
+        return load()
+
+    try:
+        hit = cache.get(key)
+    except Exception as e:
+        current_app.logger.error(f"Cache read failed: {str(e)}")
+        return load()
+    if hit is not None:
+        return hit
+
+    value = load()
+    try:
+        cache.set(key, value, ttl)
+    except Exception as e:
+        current_app.logger.error(f"Cache write failed: {str(e)}")
+    return value
+
+
+def _collect_codes(session, flush_context):
+    from models import GroupModel
+
+    codes = session.info.setdefault("group_preview_codes", set())
+    for obj in session.new:
+        if isinstance(obj, GroupModel) and obj.invite_code:
+            # A new code may have been negatively cached by someone guessing it
+            codes.add(obj.invite_code)
+    for obj in session.deleted:
+        if isinstance(obj, GroupModel) and obj.invite_code:
+            codes.add(obj.invite_code)
+    for obj in session.dirty:
+        if not isinstance(obj, GroupModel):
+            continue
+        state = inspect(obj)
+        if any(state.attrs[field].history.has_changes() for field in _INVALIDATING_FIELDS):
+            history = state.attrs.invite_code.history
+            codes.update(c for c in (history.deleted or ()) if c)
+            codes.update(c for c in (history.added or ()) if c)
+            codes.update(c for c in (history.unchanged or ()) if c)
+
+
+def _invalidate_after_commit(session):
+    codes = session.info.pop("group_preview_codes", None)
+    if not codes or not has_app_context():
+        return
+    cache = getattr(current_app, "preview_cache", None)
+    if cache is None:
+        return
+    try:
+        cache.delete(*codes)
+    except Exception as e:
+        current_app.logger.error(f"Group preview cache invalidation failed: {str(e)}")
+
+
+def _discard_after_rollback(session, previous_transaction):
+    session.info.pop("group_preview_codes", None)
+
+
+def register_preview_invalidation(session):
+    """Hook cache invalidation into the (scoped) session's flush/commit cycle."""
+    if event.contains(session, "after_commit", _invalidate_after_commit):
+        return
+    event.listen(session, "after_flush", _collect_codes)
+    event.listen(session, "after_commit", _invalidate_after_commit)
+    event.listen(session, "after_soft_rollback", _discard_after_rollback)
@@ -0,0 +1,64 @@
+"""
+Count the SQL statements a block of code runs, and fail when it runs too many.
+
+N+1 regressions (a lazy load per member, per expense or per split) barely show on a
+small test group but grow with every row. Budgets keep the statement count of a
+request fixed, independent of group size:
+
+    with assert_max_queries(8, "GET /group/<id>/history"):
+        client.get(f"/group/{group_id}/history", headers=headers)
+
+Only statements issued by the current thread are counted, so background threads
+(health probes, cache refreshers) don't interfere.
+"""
+
+import threading
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class QueryCounter:
+    """Context manager recording the SQL statements run by this thread inside the block."""
+
+    def __init__(self):
+        self.statements = []
+        self._thread = None
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        if threading.get_ident() == self._thread:
+            self.statements.append(statement)
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+    def __enter__(self):
+        self._thread = threading.get_ident()
+        event.listen(Engine, "before_cursor_execute", self._record)
+        return self
+
+    def __exit__(self, *exc_info):
+        event.remove(Engine, "before_cursor_execute", self._record)
+        return False
+
+
+class assert_max_queries(QueryCounter):
+    """QueryCounter that raises QueryBudgetExceeded on exit if more than `limit` statements ran."""
+
+    def __init__(self, limit, label=""):
+        super().__init__()
+        self.limit = limit
+        self.label = label
+
+    def __exit__(self, exc_type, exc, tb):
+        super().__exit__(exc_type, exc, tb)
+        if exc_type is None and self.count > self.limit:
+            listing = "\n".join(f"  {i + 1}. {' '.join(s.split())[:200]}" for i, s in enumerate(self.statements))
+            raise QueryBudgetExceeded(f"{self.label or 'block'} ran {self.count} SQL statements, "
+                                      f"budget is {self.limit}:\n{listing}")
+        return False
@@ -0,0 +1,139 @@
+"""
+Compact storage of equal splits.
+
+An equal split used to write one expense_splits row per participant, all with the
+same amount. It is now stored on the expense row itself: `participants` holds the
+sorted participant ids ("3,7,12"), `participant_count` their number and
+`share_amount` the per-head share; no split rows are written. The participant ids
+are also indexed in expense_participants (expense_id, user_id), so "expenses this
+user takes part in" is an index lookup, not a scan of `participants`. Expenses created
+before this keep their rows (`participants` is NULL) until `flask groups
+compact-splits` converts them.
+
+Single expenses are expanded with ExpenseModel.split_items. Aggregates never expand
+rows: a compact expense credits its payer share * count and debits the share to its
+participant set, so balances need one grouped query per payer and one per distinct
+participant set - not one row per participant.
+"""
+
+from decimal import Decimal, ROUND_HALF_UP
+
+from db import db
+from models import ExpenseModel, ExpenseSplitModel, ExpenseParticipantModel
+from utils.concurrency import ConcurrentUpdateError, read_group_version, bump_group_version
+
+COMPACT = ExpenseModel.participants.isnot(None)
+
+
+def encode_participants(user_ids):
+    return ",".join(str(uid) for uid in sorted(set(user_ids)))
+
+
+def equal_share(amount, count):
+    """Per-head share rounded to cents the way a NUMERIC(10, 2) column stores it."""
+    return (Decimal(str(amount)) / count).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+
+
+def decode_participants(participants):
+    return [int(uid) for uid in participants.split(",")] if participants else []
+
+
+def has_participant(user_id):
+    """SQL condition: `user_id` takes part in a compact equal split."""
+    return ExpenseModel.id.in_(db.select(ExpenseParticipantModel.expense_id)
+                               .where(ExpenseParticipantModel.user_id == user_id))
+
+
+def add_participant_rows(group_id, participants_by_expense):
+    """Index the participants of the group's compact expenses, given {expense_id: user_ids}."""
+    rows = [{"expense_id": expense_id, "group_id": group_id, "user_id": user_id}
+            for expense_id, user_ids in participants_by_expense.items() for user_id in set(user_ids)]
+    if rows:
+        db.session.execute(ExpenseParticipantModel.__table__.insert(), rows)
+
+
+def delete_participant_rows(expense_ids):
+    """Drop the participant index rows of expenses about to be deleted (bulk deletes skip the FK cascade on SQLite)."""
+    ExpenseParticipantModel.query.filter(ExpenseParticipantModel.expense_id.in_(expense_ids)).delete(
+        synchronize_session=False)
+
+
+def expand_participants(rows):
+    """(key, participants, amount) rows -> (key, user_id, amount), one per participant."""
+    for key, participants, amount in rows:
+        for user_id in decode_participants(participants):
+            yield key, user_id, amount
+
+
+def add_compact_balances(balances, *filters):
+    """Add the compact equal splits of the expenses matching `filters` to `balances`."""
+    # The payer is owed every share, including their own which their debit below cancels
+    credits = (db.session.query(ExpenseModel.paid_by,
+                                db.func.sum(ExpenseModel.share_amount * ExpenseModel.participant_count))
+               .filter(COMPACT, *filters)
+               .group_by(ExpenseModel.paid_by))
+    debits = (db.session.query(ExpenseModel.participants, db.func.sum(ExpenseModel.share_amount))
+              .filter(COMPACT, *filters)
+              .group_by(ExpenseModel.participants))
+
+    for payer_id, amount in credits:
+        balances[payer_id] = balances.get(payer_id, 0.0) + float(amount)
+    for _, user_id, amount in expand_participants((None, participants, amount) for participants, amount in debits):
+        balances[user_id] = balances.get(user_id, 0.0) - float(amount)
+    return balances
+
+
+def compact_group_splits(group_id, batch_size):
+    """
+    Convert the group's older equal-split expenses whose split rows all carry the
+    same amount to compact storage, one commit per batch. Returns the number of
+    expenses converted.
+    """
+    converted = 0
+    last_id = 0
+    while True:
+        group_version = read_group_version(group_id)
+        expense_ids = [row[0] for row in db.session.query(ExpenseModel.id)
+                       .filter(ExpenseModel.group_id == group_id, ExpenseModel.split_type == "equal",
+                               ExpenseModel.participants.is_(None), ExpenseModel.id > last_id)
+                       .order_by(ExpenseModel.id)
+                       .limit(batch_size)]
+        if not expense_ids:
+            return converted
+
+        splits = {}
+        for expense_id, user_id, amount in (db.session.query(ExpenseSplitModel.expense_id,
+                                                             ExpenseSplitModel.user_id, ExpenseSplitModel.amount)
+                                            .filter(ExpenseSplitModel.group_id == group_id,
+                                                    ExpenseSplitModel.expense_id.in_(expense_ids))):
+            splits.setdefault(expense_id, []).append((user_id, amount))
+
+        compacted = {}
+        for expense_id, rows in splits.items():
+            amounts = {amount for _, amount in rows}
+            user_ids = [user_id for user_id, _ in rows]
+            # Only uniform splits with one row per participant are lossless to compact
+            if len(amounts) != 1 or len(set(user_ids)) != len(user_ids):
+                continue
+            ExpenseModel.query.filter_by(id=expense_id).update({
+                ExpenseModel.participants: encode_participants(user_ids),
+                ExpenseModel.participant_count: len(user_ids),
+                ExpenseModel.share_amount: amounts.pop()
+            }, synchronize_session=False)
+            compacted[expense_id] = user_ids
+
+        if compacted:
+            ExpenseSplitModel.query.filter(ExpenseSplitModel.group_id == group_id,
+                                           ExpenseSplitModel.expense_id.in_(list(compacted))).delete(
+                synchronize_session=False)
+            add_participant_rows(group_id, compacted)
+            # Balances are unchanged, but in-flight writers must not act on the old rows
+            try:
+                bump_group_version(group_id, group_version)
+            except ConcurrentUpdateError:
+                # A write raced with this batch; redo it against the new state
+                db.session.rollback()
+                continue
+        db.session.commit()
+        converted += len(compacted)
+        last_id = expense_ids[-1]
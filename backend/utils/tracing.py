@@ -0,0 +1,249 @@
+"""
+OpenTelemetry tracing for requests, SQL statements and RQ jobs.
+
+Off unless the TRACING environment variable selects an exporter:
+
+- TRACING=console: spans are printed to stdout
+- TRACING=file: spans are appended as JSON lines to TRACING_FILE (TRACING_DEFAULT_FILE)
+- TRACING=otlp: spans are sent to an OpenTelemetry collector over OTLP/HTTP
+  (opentelemetry-exporter-otlp-proto-http, configured by the standard OTEL_EXPORTER_OTLP_* variables)
+
+TRACING_SAMPLE_RATIO (default TRACING_DEFAULT_SAMPLE_RATIO) is the fraction of new
+traces that are recorded. Child spans follow their parent's decision, including a W3C
+`traceparent` header sent by the client. SQL statements only get spans inside a
+recorded trace, so unsampled requests cost next to nothing.
+
+Jobs carry the enqueuing span's context in job.meta["trace_context"]. traced_job
+continues the trace in the worker, with the time spent waiting in the queue as its
+own span, so a slow invitation email splits into request, enqueue, queue wait,
+template render and SMTP.
+
+Needs opentelemetry-sdk, which is not in requirements.txt: pip install opentelemetry-sdk.
+Without it (or with TRACING unset) every helper here is a no-op.
+"""
+
+import contextlib
+import functools
+import logging
+import os
+from datetime import timezone
+
+from flask import g, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from config import TRACING_DEFAULT_SAMPLE_RATIO, TRACING_DEFAULT_FILE, TRACING_STATEMENT_MAX_LENGTH
+
+logger = logging.getLogger(__name__)
+
+_tracer = None  # Set by init_tracing() when tracing is enabled
+_provider = None
+_initialized = False
+_queue_class = None
+
+
+def init_tracing(service_name):
+    """Set up the tracer for this process from TRACING / TRACING_SAMPLE_RATIO; True if tracing is on."""
+    global _tracer, _provider, _initialized
+    if _initialized:
+        return _tracer is not None
+    _initialized = True
+
+    exporter_name = os.getenv("TRACING", "").lower()
+    if not exporter_name:
+        return False
+    try:
+        from opentelemetry import trace
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter, SimpleSpanProcessor
+        from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+    except ImportError:
+        logger.warning("TRACING is set but opentelemetry-sdk is not installed; tracing disabled")
+        return False
+
+    ratio = float(os.getenv("TRACING_SAMPLE_RATIO", TRACING_DEFAULT_SAMPLE_RATIO))
+    provider = TracerProvider(resource=Resource.create({"service.name": service_name}),
+                              sampler=ParentBased(TraceIdRatioBased(ratio)))
+    if exporter_name == "console":
+        provider.add_span_processor(SimpleSpanProcessor(ConsoleSpanExporter()))
+    elif exporter_name == "file":
+        out = open(os.getenv("TRACING_FILE", TRACING_DEFAULT_FILE), "a", buffering=1)
+        exporter = ConsoleSpanExporter(out=out, formatter=lambda span: span.to_json(indent=None) + "\n")
+        provider.add_span_processor(SimpleSpanProcessor(exporter))
+    elif exporter_name == "otlp":
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter()))
+    else:
+        logger.warning(f"Unknown TRACING exporter {exporter_name!r}; tracing disabled")
+        return False
+
+    trace.set_tracer_provider(provider)
+    _provider = provider
+    _tracer = trace.get_tracer("splitfree")
+    _register_engine_events()
+    return True
+
+
+@contextlib.contextmanager
+def span(name, **attributes):
+    """Child span of the current one (no-op when tracing is off)."""
+    if _tracer is None:
+        yield None
+        return
+    with _tracer.start_as_current_span(name, attributes=attributes) as current:
+        yield current
+
+
+def _current_span_recording():
+    from opentelemetry import trace
+    return trace.get_current_span().is_recording()
+
+
+# SQL statements
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    current = None
+    if _current_span_recording():
+        operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "SQL"
+        current = _tracer.start_span(f"db {operation}", attributes={
+            "db.system": conn.dialect.name,
+            "db.statement": statement[:TRACING_STATEMENT_MAX_LENGTH],
+        })
+    conn.info.setdefault("trace_spans", []).append(current)
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    current = conn.info["trace_spans"].pop()
+    if current is not None:
+        current.end()
+
+
+def _handle_error(exception_context):
+    connection = exception_context.connection
+    if connection is None or not connection.info.get("trace_spans"):
+        return
+    current = connection.info["trace_spans"].pop()
+    if current is not None:
+        from opentelemetry.trace import Status, StatusCode
+        current.record_exception(exception_context.original_exception)
+        current.set_status(Status(StatusCode.ERROR))
+        current.end()
+
+
+def _register_engine_events():
+    event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(Engine, "handle_error", _handle_error)
+
+
+# Flask requests
+
+def register_request_tracing(app):
+    """One server span per request of `app`, continuing the caller's traceparent if any."""
+    if _tracer is None:
+        return
+    from opentelemetry import context, propagate, trace
+    from opentelemetry.trace import SpanKind, Status, StatusCode
+
+    @app.before_request
+    def _start_request_span():
+        parent = propagate.extract(request.headers)
+        route = request.url_rule.rule if request.url_rule else "unmatched"
+        current = _tracer.start_span(f"{request.method} {route}", context=parent, kind=SpanKind.SERVER,
+                                     attributes={"http.request.method": request.method, "http.route": route,
+                                                 "flask.endpoint": request.endpoint or ""})
+        g.trace_span = current
+        g.trace_token = context.attach(trace.set_span_in_context(current, parent))
+
+    @app.after_request
+    def _annotate_request_span(response):
+        current = g.get("trace_span")
+        if current is not None:
+            current.set_attribute("http.response.status_code", response.status_code)
+            if response.status_code >= 500:
+                current.set_status(Status(StatusCode.ERROR))
+        return response
+
+    @app.teardown_request
+    def _end_request_span(exc):
+        current = g.pop("trace_span", None)
+        if current is None:
+            return
+        if exc is not None:
+            current.record_exception(exc)
+            current.set_status(Status(StatusCode.ERROR))
+        current.end()
+        context.detach(g.pop("trace_token"))
+
+
+# RQ jobs
+
+def _function_name(func):
+    return func if isinstance(func, str) else getattr(func, "__name__", repr(func))
+
+
+def create_job_queue(name, connection):
+    """RQ queue for the app; with tracing on, enqueues get a span and pass their context to the job."""
+    global _queue_class
+    from rq import Queue
+
+    if _tracer is None:
+        return Queue(name=name, connection=connection)
+    if _queue_class is None:
+        from opentelemetry import propagate
+        from opentelemetry.trace import SpanKind
+
+        class TracingQueue(Queue):
+            def enqueue_call(self, func, *args, **kwargs):
+                with _tracer.start_as_current_span(f"rq.enqueue {_function_name(func)}", kind=SpanKind.PRODUCER,
+                                                   attributes={"messaging.system": "rq",
+                                                               "messaging.destination.name": self.name}):
+                    return super().enqueue_call(func, *args, **kwargs)
+
+            def create_job(self, *args, meta=None, **kwargs):
+                carrier = {}
+                propagate.inject(carrier)
+                if carrier:
+                    meta = dict(meta or {}, trace_context=carrier)
+                return super().create_job(*args, meta=meta, **kwargs)
+
+        _queue_class = TracingQueue
+    return _queue_class(name=name, connection=connection)
+
+
+def _ns(moment):
+    # RQ timestamps are UTC, naive in older versions
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return int(moment.timestamp() * 1e9)
+
+
+def traced_job(func):
+    """Run an RQ job function inside a span that continues the trace it was enqueued from."""
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not init_tracing("splitfree-worker"):
+            return func(*args, **kwargs)
+        from rq import get_current_job
+        from opentelemetry import propagate
+        from opentelemetry.trace import SpanKind
+
+        job = get_current_job()
+        parent = propagate.extract(job.meta.get("trace_context", {})) if job is not None else None
+        attributes = {"messaging.system": "rq"}
+        if job is not None:
+            attributes.update({"messaging.message.id": job.id, "messaging.destination.name": job.origin})
+        try:
+            with _tracer.start_as_current_span(f"rq.job {func.__name__}", context=parent, kind=SpanKind.CONSUMER,
+                                               attributes=attributes) as current:
+                if job is not None and job.enqueued_at and job.started_at and current.is_recording():
+                    waited = _tracer.start_span("rq.queue_wait", start_time=_ns(job.enqueued_at))
+                    waited.end(end_time=_ns(job.started_at))
+                return func(*args, **kwargs)
+        finally:
+            # Work-horses exit without running atexit hooks
+            _provider.force_flush()
+
+    return wrapper
@@ -5,6 +5,7 @@ This script runs as a separate process/container and listens to the Redis queue.
 import os
 import sys
 import logging
+from datetime import timedelta
 from dotenv import load_dotenv
 import redis
 from rq import Worker, Queue
@@ -36,6 +37,21 @@ def main():
         listen = ['emails']
         logger.info(f"Listening to queues: {listen}")
         
+        # Kick off periodic maintenance jobs; each one re-schedules itself
+        from tasks import (schedule_periodic_job, send_group_activity_digests, compact_change_log,
+                           purge_stale_invitations, purge_expired_exports, checkpoint_group_balances)
+        from config import (NOTIFICATION_DIGEST_WINDOW_MINUTES, INVITATION_SWEEP_INTERVAL_MINUTES,
+                            BALANCE_CHECKPOINT_INTERVAL_MINUTES)
+        queue = Queue('emails', connection=redis_conn)
+        schedule_periodic_job(queue, send_group_activity_digests,
+                              timedelta(minutes=NOTIFICATION_DIGEST_WINDOW_MINUTES))
+        schedule_periodic_job(queue, compact_change_log, timedelta(days=1))
+        schedule_periodic_job(queue, purge_stale_invitations,
+                              timedelta(minutes=INVITATION_SWEEP_INTERVAL_MINUTES))
+        schedule_periodic_job(queue, purge_expired_exports, timedelta(hours=1))
+        schedule_periodic_job(queue, checkpoint_group_balances,
+                              timedelta(minutes=BALANCE_CHECKPOINT_INTERVAL_MINUTES))
+
         # Create worker and start processing jobs
         worker = Worker(listen, connection=redis_conn)
         logger.info("Worker is ready to process jobs!")